@@ -1,31 +1,195 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, stream_with_context, make_response, g
 from flask_cors import CORS
-from services.rsa_service import RSAService
+from services.crypto_engine import RSAEngine, ENCRYPTION_MODES, key_cache
+from services.key_pool import KeyPairPool
+from services.extraction_cache import ExtractionCache
+from services.text_extraction import iter_text, extract_text as extract_document_text, UnsupportedFileType, ExtractionLimitExceeded, DOCX_INCLUDE_TABLES
+from services.uploads import SpooledUploadRequest
+from services.key_registry import KeyRegistry, UnknownKey
+from services.metrics import registry, http_requests_total, http_request_duration_seconds
+from services.profiling import RequestProfiler, PROFILE_HEADER, summarize
+from services.asgi import AsyncApp, ExecutorPool
 import os
-from auth.auth_helper import require_auth
+import math
+import time
+import click
+import hashlib
+from auth.auth_helper import require_auth, get_user_info_from_request
 from models.savedCiphertext import SavedCiphertext
+from models.storedKey import StoredKey
+from models.savedCiphertextRevision import SavedCiphertextRevision, DeletedCiphertext
 from database.database import db
+from database.pagination import encode_cursor, after_keyset
+from database.engine import engine_options, install_sqlite_pragmas
+from database.migrations import upgrade_schema, dedupe_private_keys, pack_saved_ciphertexts, ciphertext_storage_report
+from sqlalchemy.orm import undefer, joinedload
 from werkzeug.utils import secure_filename
-import PyPDF2
-from docx import Document
+from werkzeug.exceptions import RequestEntityTooLarge
+from itertools import chain
 
 app = Flask(__name__, static_folder='static')
 CORS(app)  # Enable CORS for all routes
 
-# Create a global RSA service instance
-rsa_service = RSAService()
+# Spool large uploads to temp files instead of holding them in memory
+app.request_class = SpooledUploadRequest
+
+# Stateless RSA engine shared by all request threads
+rsa_engine = RSAEngine()
+
+# Parsed keys addressed by keyId (the fingerprint of a key registered through /api/keys)
+key_registry = KeyRegistry(rsa_engine)
+
+# Largest number of messages accepted by the batch endpoints
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+# Upper bounds for the strict avalanche sweep, whatever the request asks for
+AVALANCHE_MAX_SECONDS = float(os.environ.get('AVALANCHE_MAX_SECONDS', 10))
+AVALANCHE_MAX_FLIPS = int(os.environ.get('AVALANCHE_MAX_FLIPS', 65536))
+AVALANCHE_MAX_PLAINTEXT_BYTES = int(os.environ.get('AVALANCHE_MAX_PLAINTEXT_BYTES', 64 * 1024))
+
+# Largest request body accepted by each upload endpoint
+UPLOAD_LIMITS = {
+    'extract_text': int(os.environ.get('EXTRACT_TEXT_MAX_UPLOAD_BYTES', 16 * 1024 * 1024)),
+    'encrypt_file': int(os.environ.get('ENCRYPT_FILE_MAX_UPLOAD_BYTES', 16 * 1024 * 1024)),
+}
+
+# Page sizes for listing saved ciphertexts
+SAVED_CIPHERTEXTS_PAGE_SIZE = int(os.environ.get('SAVED_CIPHERTEXTS_PAGE_SIZE', 50))
+SAVED_CIPHERTEXTS_MAX_PAGE_SIZE = int(os.environ.get('SAVED_CIPHERTEXTS_MAX_PAGE_SIZE', 200))
+
+# Pre-generated key pairs served by /api/generate (KEY_POOL_DEPTH=0 disables the pool);
+# the refill thread starts with the first request, in the process that serves it
+key_pool = KeyPairPool(rsa_engine, depth=int(os.environ.get('KEY_POOL_DEPTH', 4)))
 
 # Initialise db
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
+# Pool sizing for server databases, busy timeout for SQLite (DB_* and SQLITE_* settings)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 db.init_app(app)
 
-# Create tables in the DB
+# Cache of extracted document text, keyed by upload content (EXTRACTION_DISK_CACHE=1 adds a disk tier under instance/)
+extraction_cache = ExtractionCache(
+    max_memory_bytes=int(os.environ.get('EXTRACTION_CACHE_MEMORY_BYTES', 64 * 1024 * 1024)),
+    disk_dir=os.path.join(app.instance_path, 'extraction-cache') if os.environ.get('EXTRACTION_DISK_CACHE') == '1' else None,
+    max_disk_bytes=int(os.environ.get('EXTRACTION_CACHE_DISK_BYTES', 512 * 1024 * 1024)),
+    settings=f'docx_include_tables={int(DOCX_INCLUDE_TABLES)}'
+)
+
+# Opt-in cProfile of sampled requests (PROFILE_SAMPLE_RATE) or requests sent with PROFILE_TOKEN
+profiler = RequestProfiler(os.environ.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles'))
+
+# Create missing tables in the DB; older databases are upgraded with `flask upgrade-schema`
 with app.app_context():
     from models.savedCiphertext import SavedCiphertext
 
     if app.config["SQLALCHEMY_DATABASE_URI"]:
+        # WAL, synchronous=NORMAL, busy timeout and mmap on every SQLite connection
+        install_sqlite_pragmas(db.engine)
         db.create_all()
 
+@app.cli.command('upgrade-schema')
+def upgrade_schema_command():
+    """
+    Add columns and indexes missing from an older database, and relax changed NOT NULLs
+    """
+    applied = upgrade_schema(db.engine)
+    for change in applied:
+        click.echo(f"Applied {change}")
+    click.echo(f"{len(applied)} schema changes applied")
+
+@app.cli.command('dedupe-keys')
+def dedupe_keys_command():
+    """
+    Move private keys stored on saved ciphertexts into the key registry
+    """
+    result = dedupe_private_keys(db.session, rsa_engine)
+    click.echo(f"Migrated {result['rows']} rows onto {result['keys']} new keys, skipped {result['skipped']}")
+
+@app.cli.command('pack-ciphertexts')
+def pack_ciphertexts_command():
+    """
+    Move saved ciphertexts stored as text into binary storage and report the size change
+    """
+    result = pack_saved_ciphertexts(db.session)
+    click.echo(f"Packed {result['rows']} rows: {result['text_bytes']} bytes as text, {result['stored_bytes']} bytes stored")
+
+@app.cli.command('ciphertext-storage-report')
+def ciphertext_storage_report_command():
+    """
+    Print how many saved ciphertexts, and bytes, are in text and in binary storage
+    """
+    report = ciphertext_storage_report(db.session)
+    click.echo(f"Text:   {report['text_rows']} rows, {report['text_bytes']} bytes")
+    click.echo(f"Binary: {report['binary_rows']} rows, {report['binary_bytes']} bytes")
+
+@app.cli.command('profile-report')
+@click.option('--top', default=30, help='Number of functions to list')
+def profile_report_command(top):
+    """
+    Merge the kept request profiles and print the top functions by cumulative time
+    """
+    paths = profiler.profiles()
+    if not paths:
+        click.echo(f"No profiles in {profiler.directory}")
+        return
+    click.echo(f"{len(paths)} profiles in {profiler.directory}")
+    click.echo(summarize(paths, top))
+
+def load_public_key(key_id):
+    """
+    Parsed public key for a registered keyId, from memory or the database
+    """
+    def load_pem():
+        row = db.session.query(StoredKey.public_key).filter_by(fingerprint=key_id).first()
+        return row.public_key if row else None
+
+    return key_registry.public(key_id, load_pem)
+
+def load_private_key(key_id, user_id):
+    """
+    Parsed private key for one of the user's registered keyIds, from memory or the database
+    """
+    def load_pem():
+        row = StoredKey.query.options(undefer(StoredKey.private_key)).filter_by(
+            fingerprint=key_id, user_id=user_id
+        ).first()
+        return row.private_key if row else None
+
+    return key_registry.private(key_id, user_id, load_pem)
+
+def validate_key_id(key_id, label='Field'):
+    """
+    Return an error response tuple if a keyId is present but not a string, otherwise None
+    """
+    if key_id is not None and not isinstance(key_id, str):
+        return jsonify({
+            'success': False,
+            'error': f'{label} "keyId" must be a string'
+        }), 400
+
+    return None
+
+def register_key(user_info, private_key_pem=None, public_key_pem=None):
+    """
+    Add a key to the user's registry, or return the existing entry for the same key
+
+    Returns:
+        StoredKey: Registry row, flushed but not committed
+    """
+    if private_key_pem:
+        handle = rsa_engine.private_handle(private_key_pem)
+    else:
+        handle = rsa_engine.public_handle(public_key_pem)
+
+    return StoredKey.find_or_add(
+        db.session,
+        user_id=user_info['user_id'],
+        fingerprint=key_registry.key_id(handle),
+        key_size=handle.key_size,
+        public_key=rsa_engine.export_public_key(handle),
+        private_key=private_key_pem
+    )
+
 def is_valid_utf8(text):
     try:
         text.encode('utf-8').decode('utf-8')
@@ -33,6 +197,87 @@ def is_valid_utf8(text):
     except UnicodeError:
         return False
 
+@app.before_request
+def start_request_timer():
+    """
+    Note when the request started; registered first so the other hooks are timed too
+    """
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Count the request and observe its latency under its route pattern
+    """
+    started = g.get('request_started')
+    if started is not None:
+        # The rule pattern ('/api/saved-ciphertexts/<ciphertext_id>') keeps label cardinality bounded
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        http_requests_total.inc(route, request.method, str(response.status_code))
+        http_request_duration_seconds.observe(time.perf_counter() - started, route, request.method)
+    return response
+
+@app.before_request
+def start_profile():
+    """
+    Profile the request if it is sampled or carries the profiling token
+    """
+    if not profiler.enabled or not profiler.wanted(request.headers.get(PROFILE_HEADER)):
+        return None
+    profile = profiler.start()
+    if profile is not None:
+        g.profile = profile
+        g.profile_id = profiler.profile_id(f'{request.method} {request.path}')
+    return None
+
+@app.after_request
+def add_profile_id(response):
+    """
+    Tell the caller which profile file belongs to their request
+    """
+    if 'profile' in g:
+        response.headers['X-Profile-Id'] = g.profile_id
+    return response
+
+@app.teardown_request
+def finish_profile(exc):
+    """
+    Stop and save the request's profile; runs after streamed bodies finish and on errors
+    """
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    try:
+        profiler.finish(profile, g.profile_id, f'{request.method} {request.full_path}')
+    except OSError as e:
+        app.logger.warning('Could not save profile %s: %s', g.profile_id, e)
+
+@app.before_request
+def enforce_upload_limit():
+    """
+    Reject oversized uploads with a 413 before their body is read
+    """
+    limit = UPLOAD_LIMITS.get(request.endpoint)
+    if limit is None:
+        return None
+
+    error = jsonify({
+        'success': False,
+        'error': f'Upload exceeds the limit of {limit} bytes'
+    }), 413
+
+    # Trust Content-Length when it is sent, so nothing is read at all
+    if request.content_length is not None and request.content_length > limit:
+        return error
+
+    # Otherwise parse now under the limit, so a body that runs past it still gets a JSON error
+    request.max_content_length = limit
+    try:
+        request.files
+    except RequestEntityTooLarge:
+        return error
+    return None
+
 @app.route('/api/generate', methods=['POST'])
 def generate_keys():
     """
@@ -49,8 +294,8 @@ def generate_keys():
                 'error': 'Key size must be either 1024 or 2048 bits'
             }), 400
             
-        # Generate key pair
-        key_pair = rsa_service.generate_key_pair(key_size)
+        # Take a pre-generated key pair, falling back to inline generation
+        key_pair = rsa_engine.export_key_pair(key_pool.get(key_size))
         
         return jsonify({
             'success': True,
@@ -70,21 +315,52 @@ def encrypt_message():
     """
     try:
         data = request.get_json()
-        public_key = data.get('publicKey')
-        plaintext = data.get('plaintext')
+        public_key = data.get('publicKey') or ''
+        key_id = data.get('keyId')
+        plaintext = data.get('plaintext') or ''
+        mode = data.get('mode', 'chunked')
+        output = data.get('format', 'legacy')
+
+        error = validate_key_id(key_id)
+        if error:
+            return error
 
-        if not public_key.strip() or not plaintext.strip():
+        if not (public_key.strip() or key_id) or not plaintext.strip():
             return jsonify({
                 'success': False,
                 'error': 'Public key and plaintext are required'
             }), 400
+
+        if mode not in ENCRYPTION_MODES:
+            return jsonify({
+                'success': False,
+                'error': "Mode must be either 'chunked' or 'envelope'"
+            }), 400
+
+        if output not in ('legacy', 'container'):
+            return jsonify({
+                'success': False,
+                'error': "Format must be either 'legacy' or 'container'"
+            }), 400
             
-        ciphertext = rsa_service.encrypt(plaintext, public_key)
+        # A keyId resolves to a key parsed once and held in memory
+        if key_id:
+            try:
+                public_key = load_public_key(key_id)
+            except UnknownKey as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 404
+
+        ciphertext = rsa_engine.encrypt(plaintext, public_key, mode=mode, output=output)
         
         return jsonify({
             'success': True,
             'data': {
-                'ciphertext': ciphertext
+                'ciphertext': ciphertext,
+                'mode': mode,
+                'format': output
             }
         })
         
@@ -101,14 +377,35 @@ def decrypt_message():
     """
     try:
         data = request.get_json()
-        private_key = data.get('privateKey')
-        ciphertext = data.get('ciphertext')
+        private_key = data.get('privateKey') or ''
+        key_id = data.get('keyId')
+        ciphertext = data.get('ciphertext') or ''
+
+        error = validate_key_id(key_id)
+        if error:
+            return error
         
-        if not private_key.strip() or not ciphertext.strip():
+        if not (private_key.strip() or key_id) or not ciphertext.strip():
             return jsonify({
                 'success': False,
                 'error': 'Private key and ciphertext are required'
             }), 400
+
+        # Registered private keys are only usable by their owner
+        if key_id:
+            user_info = get_user_info_from_request()
+            if not user_info:
+                return jsonify({
+                    'success': False,
+                    'error': 'Authentication required'
+                }), 401
+            try:
+                private_key = load_private_key(key_id, user_info['user_id'])
+            except UnknownKey as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 404
         
         # After extracting text, validate UTF-8
         if not is_valid_utf8(ciphertext):
@@ -117,7 +414,7 @@ def decrypt_message():
                 'error': 'Plaintext contains non-UTF-8 characters. Only UTF-8 encoded characters are supported.'
             }), 400
             
-        plaintext = rsa_service.decrypt(ciphertext, private_key)
+        plaintext = rsa_engine.decrypt(ciphertext, private_key)
         
         return jsonify({
             'success': True,
@@ -132,6 +429,183 @@ def decrypt_message():
             'error': str(e)
         }), 500
 
+def validate_batch(items, field):
+    """
+    Return an error response tuple if a batch payload is malformed, otherwise None
+    """
+    if not isinstance(items, list) or not items:
+        return jsonify({
+            'success': False,
+            'error': f'Field "{field}" must be a non-empty list'
+        }), 400
+
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'Batch size must not exceed {MAX_BATCH_SIZE} items'
+        }), 400
+
+    return None
+
+def parse_non_negative(data, field, kind, default=None):
+    """
+    Read an optional non-negative int or float field
+
+    Returns:
+        tuple: (value or None, error response tuple or None)
+    """
+    value = data.get(field, default)
+    if value is None:
+        return None, None
+    try:
+        # bool is an int subclass; lists and dicts would otherwise reach kind() and raise TypeError
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(value)
+        parsed = kind(value)
+        if parsed != float(value) or not math.isfinite(parsed) or parsed < 0:
+            raise ValueError(value)
+    except (ValueError, OverflowError):
+        return None, (jsonify({
+            'success': False,
+            'error': f'Field "{field}" must be a non-negative {"integer" if kind is int else "number"}'
+        }), 400)
+    return parsed, None
+
+@app.route('/api/encrypt/batch', methods=['POST'])
+def encrypt_batch():
+    """
+    Encrypt many messages under one RSA public key
+    """
+    try:
+        data = request.get_json()
+        public_key = data.get('publicKey')
+        messages = data.get('messages')
+        mode = data.get('mode', 'chunked')
+        output = data.get('format', 'legacy')
+
+        if public_key is not None and not isinstance(public_key, str):
+            return jsonify({
+                'success': False,
+                'error': 'Field "publicKey" must be a string'
+            }), 400
+
+        if not public_key or not public_key.strip():
+            return jsonify({
+                'success': False,
+                'error': 'Public key is required'
+            }), 400
+
+        error = validate_batch(messages, 'messages')
+        if error:
+            return error
+
+        if mode not in ENCRYPTION_MODES:
+            return jsonify({
+                'success': False,
+                'error': "Mode must be either 'chunked' or 'envelope'"
+            }), 400
+
+        if output not in ('legacy', 'container'):
+            return jsonify({
+                'success': False,
+                'error': "Format must be either 'legacy' or 'container'"
+            }), 400
+
+        results = rsa_engine.encrypt_batch(messages, public_key, mode=mode, output=output)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/decrypt/batch', methods=['POST'])
+def decrypt_batch():
+    """
+    Decrypt many messages under one RSA private key
+    """
+    try:
+        data = request.get_json()
+        private_key = data.get('privateKey')
+        ciphertexts = data.get('ciphertexts')
+
+        if private_key is not None and not isinstance(private_key, str):
+            return jsonify({
+                'success': False,
+                'error': 'Field "privateKey" must be a string'
+            }), 400
+
+        if not private_key or not private_key.strip():
+            return jsonify({
+                'success': False,
+                'error': 'Private key is required'
+            }), 400
+
+        error = validate_batch(ciphertexts, 'ciphertexts')
+        if error:
+            return error
+
+        results = rsa_engine.decrypt_batch(ciphertexts, private_key)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/keys', methods=['POST'])
+@require_auth
+def create_key(user_info):
+    """
+    Register a key so later requests can send its keyId instead of the PEM
+    """
+    try:
+        data = request.get_json()
+        private_key = data.get('privateKey')
+        public_key = data.get('publicKey')
+
+        if not private_key and not public_key:
+            return jsonify({
+                'success': False,
+                'error': 'Field "privateKey" or "publicKey" is required'
+            }), 400
+
+        # A PEM that does not parse is the caller's mistake, as in create_saved_ciphertext
+        try:
+            key = register_key(user_info, private_key_pem=private_key, public_key_pem=public_key)
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        db.session.commit()
+
+        return jsonify({
+            'success': True,
+            'data': key.to_dict()
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/test-auth', methods=['GET'])
 @require_auth
 def test_auth(user_info):
@@ -155,25 +629,89 @@ def test_auth(user_info):
 @require_auth
 def get_saved_ciphertexts(user_info):
     """
-    Get all saved ciphertexts for the authenticated user
+    List saved ciphertexts for the authenticated user, oldest first, one page at a time
+
+    Query parameters: limit (page size), cursor (next_cursor of the previous page),
+    includeCiphertext (1 to include the ciphertexts themselves) and since (a
+    revision: only rows added after it, plus the ids removed after it).
+
+    Responses carry the user's revision as an ETag; an unchanged list answers
+    If-None-Match with 304 after a single primary key lookup.
     """
     try:
         # Get user ID from auth info
         user_id = user_info['user_id']
-        
-        # Query saved ciphertexts for this user
-        saved_ciphertexts = SavedCiphertext.query.filter_by(user_id=user_id).order_by(SavedCiphertext.created_at).all()
 
-        # Convert to list of dicts
-        result = [item.to_dict() for item in saved_ciphertexts]
-        
-        for item in result:
-            item.pop('private_key', None)
-        
-        return jsonify({
+        # Read the revision before the rows, so a concurrent change can only make the ETag stale
+        revision = SavedCiphertextRevision.current(db.session, user_id)
+        scope = hashlib.sha256(user_id.encode('utf-8') + b'?' + request.query_string).hexdigest()[:16]
+        etag = f'{revision}-{scope}'
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        limit = request.args.get('limit', SAVED_CIPHERTEXTS_PAGE_SIZE, type=int)
+        if limit is None or not 1 <= limit <= SAVED_CIPHERTEXTS_MAX_PAGE_SIZE:
+            return jsonify({
+                'success': False,
+                'error': f'Limit must be between 1 and {SAVED_CIPHERTEXTS_MAX_PAGE_SIZE}'
+            }), 400
+
+        include_ciphertext = request.args.get('includeCiphertext', '').lower() in ('1', 'true')
+
+        # Private keys are never loaded here; ciphertexts only when asked for
+        query = SavedCiphertext.query.options(joinedload(SavedCiphertext.key)).filter_by(user_id=user_id)
+        if include_ciphertext:
+            query = query.options(undefer(SavedCiphertext.ciphertext_data), undefer(SavedCiphertext.ciphertext_text))
+
+        since = request.args.get('since', type=int)
+        if 'since' in request.args and (since is None or since < 0):
+            return jsonify({
+                'success': False,
+                'error': 'Since must be a non-negative revision'
+            }), 400
+        if since is not None:
+            query = query.filter(SavedCiphertext.revision > since)
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                query = query.filter(after_keyset(SavedCiphertext.created_at, SavedCiphertext.id, cursor))
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
+
+        # One extra row tells whether another page follows
+        rows = query.order_by(SavedCiphertext.created_at, SavedCiphertext.id).limit(limit + 1).all()
+        page = rows[:limit]
+
+        result = [
+            item.to_dict(include_ciphertext=include_ciphertext, include_private_key=False)
+            for item in page
+        ]
+        next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+
+        body = {
             'success': True,
-            'data': result
-        })
+            'data': result,
+            'next_cursor': next_cursor,
+            'revision': revision
+        }
+        if since is not None:
+            body['removed'] = [
+                row.ciphertext_id for row in db.session.query(DeletedCiphertext.ciphertext_id).filter(
+                    DeletedCiphertext.user_id == user_id, DeletedCiphertext.revision > since
+                ).order_by(DeletedCiphertext.revision, DeletedCiphertext.id)
+            ]
+
+        response = make_response(jsonify(body))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         return jsonify({
             'success': False,
@@ -191,17 +729,46 @@ def create_saved_ciphertext(user_info):
         data = request.get_json()
         
         # Validate required fields
-        required_fields = ['name', 'ciphertext', 'privateKey']
+        required_fields = ['name', 'ciphertext']
         for field in required_fields:
             if not data.get(field):
                 return jsonify({
                     'success': False,
                     'error': f'Field "{field}" is required'
                 }), 400
+
+        if not data.get('privateKey') and not data.get('keyId'):
+            return jsonify({
+                'success': False,
+                'error': 'Field "privateKey" or "keyId" is required'
+            }), 400
+
+        error = validate_key_id(data.get('keyId'))
+        if error:
+            return error
         
         # Get user info from auth
         user_id = user_info['user_id']
         user_email = user_info['email']
+
+        # Reference the user's registered key, registering it first if only the PEM was sent
+        if data.get('keyId'):
+            key = StoredKey.query.filter_by(fingerprint=data['keyId'], user_id=user_id).filter(
+                StoredKey.private_key.isnot(None)
+            ).first()
+            if not key:
+                return jsonify({
+                    'success': False,
+                    'error': 'Key not found'
+                }), 404
+        else:
+            try:
+                key = register_key(user_info, private_key_pem=data['privateKey'])
+            except Exception as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
         
         # Create new saved ciphertext
         saved_ciphertext = SavedCiphertext(
@@ -209,15 +776,15 @@ def create_saved_ciphertext(user_info):
             user_email=user_email,
             name=data['name'],
             ciphertext=data['ciphertext'],
-            private_key=data['privateKey']
+            key_id=key.id,
+            revision=SavedCiphertextRevision.bump(db.session, user_id)
         )
         
         # Save to database
         db.session.add(saved_ciphertext)
         db.session.commit()
 
-        data = saved_ciphertext.to_dict()
-        data.pop('private_key', None)
+        data = saved_ciphertext.to_dict(include_private_key=False)
         
         return jsonify({
             'success': True,
@@ -231,6 +798,232 @@ def create_saved_ciphertext(user_info):
             'error': str(e)
         }), 500
 
+def validate_ids(ids):
+    """
+    Return an error response tuple if a list of saved ciphertext ids is malformed, otherwise None
+    """
+    error = validate_batch(ids, 'ids')
+    if error:
+        return error
+
+    if not all(isinstance(item, int) and not isinstance(item, bool) for item in ids):
+        return jsonify({
+            'success': False,
+            'error': 'Every id must be an integer'
+        }), 400
+
+    return None
+
+@app.route('/api/saved-ciphertexts/batch', methods=['POST'])
+@require_auth
+def create_saved_ciphertexts(user_info):
+    """
+    Create many saved ciphertexts in one transaction; nothing is saved if any item is invalid
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items')
+
+        error = validate_batch(items, 'items')
+        if error:
+            return error
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                return jsonify({
+                    'success': False,
+                    'error': f'Item {index} must be an object'
+                }), 400
+            for field in ('name', 'ciphertext'):
+                if not item.get(field):
+                    return jsonify({
+                        'success': False,
+                        'error': f'Item {index}: field "{field}" is required'
+                    }), 400
+            if not item.get('privateKey') and not item.get('keyId'):
+                return jsonify({
+                    'success': False,
+                    'error': f'Item {index}: field "privateKey" or "keyId" is required'
+                }), 400
+            error = validate_key_id(item.get('keyId'), f'Item {index}: field')
+            if error:
+                return error
+
+        user_id = user_info['user_id']
+
+        # Resolve every distinct key once: keyIds in one query, PEMs registered as needed
+        key_ids = {item['keyId'] for item in items if item.get('keyId')}
+        keys = {}
+        if key_ids:
+            keys = {
+                key.fingerprint: key
+                for key in StoredKey.query.filter(
+                    StoredKey.user_id == user_id,
+                    StoredKey.fingerprint.in_(key_ids),
+                    StoredKey.private_key.isnot(None)
+                )
+            }
+
+        pems = {}
+        saved_ciphertexts = []
+        for index, item in enumerate(items):
+            if item.get('keyId'):
+                key = keys.get(item['keyId'])
+                if key is None:
+                    db.session.rollback()
+                    return jsonify({
+                        'success': False,
+                        'error': f'Item {index}: key not found'
+                    }), 404
+            else:
+                key = pems.get(item['privateKey'])
+                if key is None:
+                    try:
+                        key = pems[item['privateKey']] = register_key(user_info, private_key_pem=item['privateKey'])
+                    except Exception as e:
+                        db.session.rollback()
+                        return jsonify({
+                            'success': False,
+                            'error': f'Item {index}: {e}'
+                        }), 400
+
+            saved_ciphertexts.append(SavedCiphertext(
+                user_id=user_id,
+                user_email=user_info['email'],
+                name=item['name'],
+                ciphertext=item['ciphertext'],
+                key=key
+            ))
+
+        # The whole batch lands in one revision of the user's list
+        revision = SavedCiphertextRevision.bump(db.session, user_id)
+        for saved_ciphertext in saved_ciphertexts:
+            saved_ciphertext.revision = revision
+
+        db.session.add_all(saved_ciphertexts)
+        db.session.flush()
+
+        # Serialize before the commit expires the rows
+        result = [item.to_dict(include_ciphertext=False, include_private_key=False) for item in saved_ciphertexts]
+        db.session.commit()
+
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': f'{len(result)} saved ciphertexts created successfully'
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/saved-ciphertexts/batch', methods=['DELETE'])
+@require_auth
+def delete_saved_ciphertexts(user_info):
+    """
+    Delete many saved ciphertexts in one transaction
+    """
+    try:
+        data = request.get_json()
+        ids = data.get('ids')
+
+        error = validate_ids(ids)
+        if error:
+            return error
+
+        user_id = user_info['user_id']
+
+        # Only the user's own rows are deleted; anything else is reported as not found
+        owned = SavedCiphertext.user_id == user_id, SavedCiphertext.id.in_(ids)
+        deleted = {row.id for row in db.session.query(SavedCiphertext.id).filter(*owned)}
+        if deleted:
+            revision = SavedCiphertextRevision.bump(db.session, user_id)
+            db.session.add_all(
+                DeletedCiphertext(user_id=user_id, ciphertext_id=item, revision=revision) for item in deleted
+            )
+            SavedCiphertext.query.filter(*owned).delete(synchronize_session=False)
+        db.session.commit()
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'deleted': [item for item in ids if item in deleted],
+                'not_found': [item for item in ids if item not in deleted]
+            },
+            'message': f'{len(deleted)} saved ciphertexts deleted successfully'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/saved-ciphertexts/decrypt/batch', methods=['POST'])
+@require_auth
+def decrypt_saved_ciphertexts(user_info):
+    """
+    Decrypt many saved ciphertexts, fetched together, with one result per requested id
+    """
+    try:
+        data = request.get_json()
+        ids = data.get('ids')
+
+        error = validate_ids(ids)
+        if error:
+            return error
+
+        user_id = user_info['user_id']
+
+        # One query brings the ciphertexts together with their keys
+        rows = SavedCiphertext.query.options(
+            undefer(SavedCiphertext.ciphertext_data),
+            undefer(SavedCiphertext.ciphertext_text),
+            undefer(SavedCiphertext.private_key),
+            joinedload(SavedCiphertext.key).undefer(StoredKey.private_key)
+        ).filter(SavedCiphertext.user_id == user_id, SavedCiphertext.id.in_(ids)).all()
+        by_id = {row.id: row for row in rows}
+
+        def private_key_for(row):
+            if row.key_id is None:
+                return row.private_key
+            # Already fetched with the row, so a registry miss needs no further query
+            return key_registry.private(row.key.fingerprint, user_id, lambda: row.key.private_key)
+
+        results = []
+        pending = []
+        for item in ids:
+            row = by_id.get(item)
+            if row is None:
+                results.append({'id': item, 'success': False, 'error': 'Saved ciphertext not found or not owned by you'})
+                continue
+            result = {'id': item}
+            results.append(result)
+            # A key that fails to resolve fails its own item, not the whole batch
+            try:
+                pending.append((result, (row.ciphertext, private_key_for(row))))
+            except Exception as e:
+                result.update(success=False, error=str(e))
+
+        decrypted = rsa_engine.decrypt_many([pair for _, pair in pending])
+        for (result, _), outcome in zip(pending, decrypted):
+            result.update(outcome)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'results': results
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/saved-ciphertexts/<ciphertext_id>', methods=['DELETE'])
 @require_auth
 def delete_saved_ciphertext(ciphertext_id, user_info):
@@ -250,7 +1043,9 @@ def delete_saved_ciphertext(ciphertext_id, user_info):
                 'error': 'Saved ciphertext not found or not owned by you'
             }), 404
         
-        # Delete the record
+        # Delete the record, leaving a tombstone for clients syncing with ?since=
+        revision = SavedCiphertextRevision.bump(db.session, user_id)
+        db.session.add(DeletedCiphertext(user_id=user_id, ciphertext_id=saved_ciphertext.id, revision=revision))
         db.session.delete(saved_ciphertext)
         db.session.commit()
         
@@ -276,7 +1071,9 @@ def decrypt_saved_ciphertext(ciphertext_id, user_info):
         user_id = user_info['user_id']
         
         # Find the saved ciphertext and verify ownership
-        saved_ciphertext = SavedCiphertext.query.filter_by(id=ciphertext_id, user_id=user_id).first()
+        saved_ciphertext = SavedCiphertext.query.options(
+            undefer(SavedCiphertext.ciphertext_data), joinedload(SavedCiphertext.key)
+        ).filter_by(id=ciphertext_id, user_id=user_id).first()
         
         if not saved_ciphertext:
             return jsonify({
@@ -284,8 +1081,14 @@ def decrypt_saved_ciphertext(ciphertext_id, user_info):
                 'error': 'Saved ciphertext not found or not owned by you'
             }), 404
         
+        # Registered keys come parsed from memory; rows not yet deduplicated carry their own PEM
+        if saved_ciphertext.key_id is not None:
+            private_key = load_private_key(saved_ciphertext.key.fingerprint, user_id)
+        else:
+            private_key = saved_ciphertext.private_key
+
         # Decrypt the ciphertext
-        plaintext = rsa_service.decrypt(saved_ciphertext.ciphertext, saved_ciphertext.private_key)
+        plaintext = rsa_engine.decrypt(saved_ciphertext.ciphertext, private_key)
         
         return jsonify({
             'success': True,
@@ -305,18 +1108,82 @@ def avalanche_effect():
     data = request.get_json()
     public_key = data.get('publicKey')
     plaintext = data.get('plaintext')
-    print(public_key, plaintext)
 
     if not public_key or not plaintext:
         return jsonify({"error": "Missing parameters"}), 400
     
     try:
-        result = RSAService().compute_avalanche_effect(public_key, plaintext)
-        print(result)
+        if data.get('mode') == 'sweep':
+            if len(plaintext.encode('utf-8')) > AVALANCHE_MAX_PLAINTEXT_BYTES:
+                return jsonify({
+                    'success': False,
+                    'error': f'Plaintext must not exceed {AVALANCHE_MAX_PLAINTEXT_BYTES} bytes for a sweep'
+                }), 400
+            samples, error = parse_non_negative(data, 'samples', int)
+            if error:
+                return error
+            max_flips, error = parse_non_negative(data, 'maxFlips', int, 4096)
+            if error:
+                return error
+            max_seconds, error = parse_non_negative(data, 'maxSeconds', float, 5)
+            if error:
+                return error
+            seed, error = parse_non_negative(data, 'seed', int)
+            if error:
+                return error
+
+            result = rsa_engine.strict_avalanche(
+                public_key,
+                plaintext,
+                samples=samples,
+                max_flips=min(max_flips, AVALANCHE_MAX_FLIPS),
+                max_seconds=min(max_seconds, AVALANCHE_MAX_SECONDS),
+                seed=seed
+            )
+            return jsonify({"success": True, "data": result})
+
+        include_hex = data.get('includeHex', True)
+        if not isinstance(include_hex, bool):
+            return jsonify({
+                'success': False,
+                'error': 'Field "includeHex" must be true or false'
+            }), 400
+
+        result = rsa_engine.compute_avalanche_effect(public_key, plaintext, include_hex=include_hex)
         return jsonify({"success": True, "data": result})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/key-cache/stats', methods=['GET'])
+def key_cache_stats():
+    """
+    Report hit/miss counters of the parsed key cache
+    """
+    return jsonify({
+        'success': True,
+        'data': key_cache.stats()
+    })
+
+@app.route('/api/key-pool/stats', methods=['GET'])
+def key_pool_stats():
+    """
+    Report depth and refill rate of the pre-generated key pair pool
+    """
+    return jsonify({
+        'success': True,
+        'data': key_pool.stats()
+    })
+
+@app.route('/api/extraction-cache/stats', methods=['GET'])
+def extraction_cache_stats():
+    """
+    Report hit ratio and bytes saved by the extracted text cache
+    """
+    return jsonify({
+        'success': True,
+        'data': extraction_cache.stats()
+    })
+
 @app.route('/api/extract-text', methods=['POST'])
 def extract_text():
     """
@@ -342,19 +1209,18 @@ def extract_text():
         file_ext = os.path.splitext(filename)[1].lower()
 
         # Read file based on extension
-        if file_ext == '.txt':
-            text = file.read().decode('utf-8')
-        elif file_ext == '.pdf':
-            reader = PyPDF2.PdfReader(file)
-            text = '\n'.join([page.extract_text() for page in reader.pages])
-        elif file_ext in ('.doc', '.docx'):
-            doc = Document(file)
-            text = '\n'.join([para.text for para in doc.paragraphs])
-        else:
+        try:
+            text = extraction_cache.get_or_extract(file.stream, file_ext, extract_document_text)
+        except UnsupportedFileType as e:
             return jsonify({
                 'success': False,
-                'error': 'Unsupported file type'
+                'error': str(e)
             }), 400
+        except ExtractionLimitExceeded as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 413
 
         # After extracting text, validate UTF-8
         if not is_valid_utf8(text):
@@ -377,6 +1243,91 @@ def extract_text():
             'error': str(e)
         }), 500
 
+@app.route('/api/encrypt-file', methods=['POST'])
+def encrypt_file():
+    """
+    Extract text from an uploaded file and stream back its encryption without
+    holding the whole document in memory
+    """
+    try:
+        if 'file' not in request.files:
+            return jsonify({
+                'success': False,
+                'error': 'No file uploaded'
+            }), 400
+
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({
+                'success': False,
+                'error': 'No selected file'
+            }), 400
+
+        public_key = request.form.get('publicKey', '')
+        mode = request.form.get('mode', 'chunked')
+
+        if not public_key.strip():
+            return jsonify({
+                'success': False,
+                'error': 'Public key is required'
+            }), 400
+
+        if mode not in ENCRYPTION_MODES:
+            return jsonify({
+                'success': False,
+                'error': "Mode must be either 'chunked' or 'envelope'"
+            }), 400
+
+        filename = secure_filename(file.filename)
+        file_ext = os.path.splitext(filename)[1].lower()
+
+        try:
+            pieces = iter_text(file.stream, file_ext)
+        except UnsupportedFileType as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+
+        # Open the document before the response starts so parse errors still get a JSON error
+        try:
+            first = next(pieces, '')
+        except ExtractionLimitExceeded as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 413
+
+        def validated(pieces):
+            for piece in pieces:
+                if not is_valid_utf8(piece):
+                    raise ValueError('File contains non-UTF-8 characters')
+                yield piece
+
+        fragments = rsa_engine.encrypt_stream(validated(chain([first], pieces)), public_key, mode=mode)
+
+        return Response(
+            stream_with_context(fragments),
+            mimetype='text/plain',
+            headers={
+                'X-Ciphertext-Mode': mode,
+                'X-Filename': filename
+            }
+        )
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/metrics')
+def metrics():
+    """
+    Request and RSA phase metrics in the Prometheus text format
+    """
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -398,6 +1349,34 @@ def health_check():
         'service': 'RSA-455'
     })
 
+# Endpoints whose work is RSA or document extraction; everything else is quick and runs on the 'io' pool
+ASGI_CRYPTO_ENDPOINTS = (
+    'generate_keys', 'encrypt_message', 'decrypt_message', 'encrypt_batch', 'decrypt_batch', 'create_key',
+    'create_saved_ciphertext', 'create_saved_ciphertexts', 'decrypt_saved_ciphertexts', 'decrypt_saved_ciphertext',
+    'avalanche_effect',
+)
+ASGI_EXTRACTION_ENDPOINTS = ('extract_text', 'encrypt_file')
+
+# ASGI entry point (e.g. `uvicorn app:asgi_app`): each kind of work gets its own bounded pool, so
+# saturated key generation or PDF extraction cannot hold up /health or the saved-ciphertext listing
+asgi_app = AsyncApp(
+    app,
+    pools={
+        'io': ExecutorPool('io', int(os.environ.get('ASGI_IO_THREADS', 16)),
+                           int(os.environ.get('ASGI_IO_QUEUE', 256))),
+        'crypto': ExecutorPool('crypto', int(os.environ.get('ASGI_CRYPTO_THREADS', os.cpu_count() or 1)),
+                               int(os.environ.get('ASGI_CRYPTO_QUEUE', 64))),
+        'extraction': ExecutorPool('extraction', int(os.environ.get('ASGI_EXTRACTION_THREADS', 2)),
+                                   int(os.environ.get('ASGI_EXTRACTION_QUEUE', 16))),
+    },
+    routes={
+        **dict.fromkeys(ASGI_CRYPTO_ENDPOINTS, 'crypto'),
+        **dict.fromkeys(ASGI_EXTRACTION_ENDPOINTS, 'extraction'),
+    },
+    default_pool='io',
+    max_body_bytes=int(os.environ.get('ASGI_MAX_BODY_BYTES', 64 * 1024 * 1024))
+)
+
 if __name__ == '__main__':
     # Get port from environment variable (for Azure) or use default 5000
     port = int(os.environ.get('PORT', 8000))
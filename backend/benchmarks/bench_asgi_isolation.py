@@ -0,0 +1,74 @@
+"""
+/health latency while key generation saturates the server: one shared pool versus asgi_app's split pools.
+
+The shared pool stands in for sync workers, where a health check waits for a
+free worker behind the key generations. Requests go straight to the ASGI app,
+so no server is needed. Run from the backend directory:
+    python -m benchmarks.bench_asgi_isolation --generators 8 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+# Every /api/generate pays for a fresh key
+os.environ.setdefault('KEY_POOL_DEPTH', '0')
+from app import app, asgi_app
+from services.asgi import AsyncApp, ExecutorPool
+from tests.asgi_client import call
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run(target, generators, seconds, key_size):
+    deadline = time.perf_counter() + seconds
+    body = json.dumps({'keySize': key_size}).encode('utf-8')
+    generated = []
+    health = []
+
+    async def generate():
+        while time.perf_counter() < deadline:
+            status, _, _, _ = await call(target, 'POST', '/api/generate', body=body,
+                                         headers=[('Content-Type', 'application/json')])
+            generated.append(status)
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await call(target, 'GET', '/health')
+            health.append(time.perf_counter() - started)
+            await asyncio.sleep(0.02)
+
+    await asyncio.gather(probe(), *(generate() for _ in range(generators)))
+    return generated, health
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--generators', type=int, default=8, help='Concurrent key generation clients')
+    parser.add_argument('--workers', type=int, default=4, help='Threads in the shared pool')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--key-size', type=int, default=2048)
+    args = parser.parse_args()
+
+    shared = AsyncApp(app, pools={'all': ExecutorPool('all', args.workers, 1024)}, routes={}, default_pool='all')
+    print(f"cpus={os.cpu_count()} generators={args.generators} key_size={args.key_size} seconds={args.seconds}")
+    print(f"{'pools':<8} {'keys/s':>8} {'health p50 ms':>14} {'health p95 ms':>14} {'health max ms':>14} {'503s':>6}")
+    for name, target in (('shared', shared), ('split', asgi_app)):
+        generated, health = asyncio.run(run(target, args.generators, args.seconds, args.key_size))
+        print(f"{name:<8} {generated.count(200) / args.seconds:8.1f} {percentile(health, 0.5) * 1000:14.2f} "
+              f"{percentile(health, 0.95) * 1000:14.2f} {max(health, default=0) * 1000:14.2f} "
+              f"{generated.count(503):6d}")
+
+
+if __name__ == '__main__':
+    main()
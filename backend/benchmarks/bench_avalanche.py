@@ -0,0 +1,59 @@
+"""
+Per-byte generator popcount versus the big-int bit_count used by the avalanche computation.
+
+Run from the backend directory:
+    python -m benchmarks.bench_avalanche
+"""
+import argparse
+import binascii
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from services.avalanche import count_bit_differences
+from services.crypto_engine import RSAEngine
+
+
+def legacy_bit_differences(original, modified):
+    # The implementation compute_avalanche_effect used before, including hex rendering
+    binascii.hexlify(original).decode()
+    binascii.hexlify(modified).decode()
+    return sum(bin(o ^ m).count('1') for o, m in zip(original, modified))
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='256,4096,65536,1048576', help='Ciphertext bytes')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--plaintext', type=int, default=20000, help='Plaintext size for the end-to-end run')
+    args = parser.parse_args()
+
+    print(f"{'bytes':>9} {'legacy':>10} {'bit_count':>10} {'x':>8}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        original, modified = os.urandom(size), os.urandom(size)
+        assert legacy_bit_differences(original, modified) == count_bit_differences(original, modified)
+        legacy = best_of(lambda: legacy_bit_differences(original, modified), args.repeat)
+        fast = best_of(lambda: count_bit_differences(original, modified), args.repeat)
+        print(f"{size:>9} {legacy * 1000:>8.2f}ms {fast * 1000:>8.3f}ms {legacy / fast:>8.1f}")
+
+    engine = RSAEngine()
+    keys = engine.generate_key_pair(2048)
+    plaintext = 'x' * args.plaintext
+    with_hex = best_of(lambda: engine.compute_avalanche_effect(keys['public_key'], plaintext), 3)
+    without_hex = best_of(lambda: engine.compute_avalanche_effect(keys['public_key'], plaintext, include_hex=False), 3)
+    print(f"compute_avalanche_effect({args.plaintext} chars, 2048-bit): "
+          f"{with_hex * 1000:.1f}ms with hex, {without_hex * 1000:.1f}ms without")
+
+
+if __name__ == '__main__':
+    main()
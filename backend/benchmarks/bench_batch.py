@@ -0,0 +1,64 @@
+"""
+Messages per second through /api/encrypt and /api/decrypt versus the batch endpoints.
+
+Run from the backend directory:
+    python -m benchmarks.bench_batch --messages 500 --key-size 2048
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('KEY_POOL_DEPTH', '0')
+from app import app, key_cache
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--key-size', type=int, default=2048)
+    parser.add_argument('--length', type=int, default=64, help='Characters per message')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    keys = client.post('/api/generate', json={'keySize': args.key_size}).get_json()['data']
+    messages = [f"{i:06d}".ljust(args.length, 'x') for i in range(args.messages)]
+    ciphertexts = []
+
+    def single_encrypt():
+        for message in messages:
+            response = client.post('/api/encrypt', json={'publicKey': keys['public_key'], 'plaintext': message})
+            ciphertexts.append(response.get_json()['data']['ciphertext'])
+
+    def single_decrypt():
+        for ciphertext in ciphertexts:
+            client.post('/api/decrypt', json={'privateKey': keys['private_key'], 'ciphertext': ciphertext})
+
+    def batch_encrypt():
+        client.post('/api/encrypt/batch', json={'publicKey': keys['public_key'], 'messages': messages})
+
+    def batch_decrypt():
+        client.post('/api/decrypt/batch', json={'privateKey': keys['private_key'], 'ciphertexts': ciphertexts})
+
+    print(f"cpus={os.cpu_count()} key_size={args.key_size} messages={args.messages} length={args.length}")
+    rows = [
+        ('encrypt single', rate(args.messages, single_encrypt)),
+        ('encrypt batch', rate(args.messages, batch_encrypt)),
+        ('decrypt single', rate(args.messages, single_decrypt)),
+        ('decrypt batch', rate(args.messages, batch_decrypt)),
+    ]
+    for name, value in rows:
+        print(f"{name:<24} {value:10.1f} msg/s")
+    print(f"key cache: {key_cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Throughput of the shared RSAEngine at increasing thread counts.
+
+Run from the backend directory:
+    python -m benchmarks.bench_concurrency --key-size 2048 --ops 400
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from services.crypto_engine import RSAEngine
+
+
+def run(threads, ops, engine, keys, plaintext):
+    def job(_):
+        ciphertext = engine.encrypt(plaintext, keys['public_key'])
+        if engine.decrypt(ciphertext, keys['private_key']) != plaintext:
+            raise AssertionError("Round trip mismatch")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(job, range(ops)))
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--key-size', type=int, default=2048)
+    parser.add_argument('--ops', type=int, default=400)
+    parser.add_argument('--threads', default='1,2,4,8,16')
+    args = parser.parse_args()
+
+    engine = RSAEngine()
+    keys = engine.generate_key_pair(args.key_size)
+    plaintext = "x" * 150
+
+    print(f"cpus={os.cpu_count()} key_size={args.key_size} ops={args.ops}")
+    baseline = None
+    for threads in [int(t) for t in args.threads.split(',')]:
+        rate = run(threads, args.ops, engine, keys, plaintext)
+        baseline = baseline or rate
+        print(f"threads={threads:>3}  {rate:10.1f} round trips/s  x{rate / baseline:.2f}")
+
+
+if __name__ == '__main__':
+    main()
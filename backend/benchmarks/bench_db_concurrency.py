@@ -0,0 +1,121 @@
+"""
+Mixed read/write throughput on SQLite with default settings versus the tuned engine.
+
+Several threads list pages of saved ciphertexts while a share of operations insert
+new ones, against a fresh SQLite file per configuration. Run from the backend directory:
+    python -m benchmarks.bench_db_concurrency --threads 8 --seconds 5 --write-ratio 0.2
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from database.database import db
+from database.engine import engine_options, install_sqlite_pragmas
+from models.savedCiphertext import SavedCiphertext
+from models.storedKey import StoredKey  # noqa: F401  (registers the table for create_all)
+
+USERS = 10
+
+
+def make_engine(path, tuned):
+    url = f'sqlite:///{path}'
+    if not tuned:
+        return create_engine(url)
+    engine = create_engine(url, **engine_options(url))
+    install_sqlite_pragmas(engine)
+    return engine
+
+
+def seed(engine, rows, payload):
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            SavedCiphertext(user_id=f'u{i % USERS}', user_email='e', name=f'row {i}', ciphertext=payload)
+            for i in range(rows)
+        )
+        session.commit()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run(engine, threads, seconds, write_ratio, payload):
+    reads, writes, errors = [], [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        local_reads, local_writes, local_errors = [], [], 0
+        while time.perf_counter() < deadline:
+            user_id = f'u{rng.randrange(USERS)}'
+            start = time.perf_counter()
+            try:
+                with Session(engine) as session:
+                    if rng.random() < write_ratio:
+                        session.add(SavedCiphertext(user_id=user_id, user_email='e', name='new', ciphertext=payload))
+                        session.commit()
+                        local_writes.append(time.perf_counter() - start)
+                    else:
+                        session.query(SavedCiphertext).filter_by(user_id=user_id).order_by(
+                            SavedCiphertext.created_at, SavedCiphertext.id
+                        ).limit(50).all()
+                        local_reads.append(time.perf_counter() - start)
+            except Exception:
+                local_errors += 1
+        with lock:
+            reads.extend(local_reads)
+            writes.extend(local_writes)
+            errors.append(local_errors)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return reads, writes, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = 'x' * 2048
+    print(f"cpus={os.cpu_count()} threads={args.threads} seconds={args.seconds} "
+          f"write_ratio={args.write_ratio} rows={args.rows}")
+    print(f"{'config':<8} {'ops/s':>9} {'reads/s':>9} {'writes/s':>9} "
+          f"{'read p95 ms':>12} {'write p95 ms':>13} {'errors':>7}")
+
+    for name, tuned in (('default', False), ('tuned', True)):
+        directory = tempfile.mkdtemp(prefix='bench-db-')
+        try:
+            engine = make_engine(os.path.join(directory, 'bench.db'), tuned)
+            seed(engine, args.rows, payload)
+            reads, writes, errors = run(engine, args.threads, args.seconds, args.write_ratio, payload)
+            engine.dispose()
+        finally:
+            shutil.rmtree(directory)
+
+        print(f"{name:<8} {(len(reads) + len(writes)) / args.seconds:9.1f} {len(reads) / args.seconds:9.1f} "
+              f"{len(writes) / args.seconds:9.1f} {percentile(reads, 0.95) * 1000:12.2f} "
+              f"{percentile(writes, 0.95) * 1000:13.2f} {errors:7d}")
+
+
+if __name__ == '__main__':
+    main()
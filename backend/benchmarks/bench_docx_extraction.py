@@ -0,0 +1,85 @@
+"""
+python-docx DOM extraction versus the streaming word/document.xml extractor: time and peak RSS.
+
+Each measurement runs in a fresh interpreter so lxml's native allocations are
+counted and earlier runs do not inflate the peak.
+
+Run from the backend directory:
+    python -m benchmarks.bench_docx_extraction --paragraphs 2000,10000 --table-rows 500
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+
+def python_docx(data):
+    from docx import Document
+    doc = Document(io.BytesIO(data))
+    return '\n'.join([para.text for para in doc.paragraphs])
+
+
+def streaming(data):
+    from services.text_extraction import extract_text
+    return extract_text(io.BytesIO(data), '.docx')
+
+
+def _peak_rss():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _child(name, data, queue):
+    fn = {'python-docx': python_docx, 'streaming': streaming}[name]
+    import docx, services.text_extraction  # noqa: F401  (import cost is not charged to the run)
+    try:
+        # Reset the high-water mark so import-time peaks are not counted (Linux only)
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+    before = _peak_rss()
+    start = time.perf_counter()
+    text = fn(data)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _peak_rss() - before, len(text)))
+
+
+def measure(name, data):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(name, data, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    from tests.documents import make_docx
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paragraphs', default='1000,5000,20000')
+    parser.add_argument('--table-rows', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'paras':>6} {'docx KiB':>9} {'dom time':>9} {'dom rss':>9} {'stream time':>12} {'stream rss':>11}")
+    for paragraphs in [int(p) for p in args.paragraphs.split(',')]:
+        data = make_docx(paragraphs, table_rows=args.table_rows)
+        assert python_docx(data) == streaming(data)
+        dom_time, dom_rss, _ = measure('python-docx', data)
+        stream_time, stream_rss, _ = measure('streaming', data)
+        print(f"{paragraphs:>6} {len(data) // 1024:>9} {dom_time * 1000:>7.0f}ms {dom_rss / 2**20:>7.1f}MB "
+              f"{stream_time * 1000:>10.0f}ms {stream_rss / 2**20:>9.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
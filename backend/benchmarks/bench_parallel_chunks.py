@@ -0,0 +1,63 @@
+"""
+Serial versus process-parallel chunked encryption and decryption by payload size.
+
+The first parallel call of each case starts the workers and parses the key in
+each of them; it is not timed. Run from the backend directory:
+    python -m benchmarks.bench_parallel_chunks --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from services import crypto_engine
+from services.crypto_engine import RSAEngine
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--key-sizes', default='1024,2048')
+    parser.add_argument('--sizes', default='1024,8192,65536,262144')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    crypto_engine.RSA_PARALLEL_WORKERS = args.workers
+    engine = RSAEngine(parallel=False, parallel_threshold=1)
+    print(f"cpus={os.cpu_count()} workers={args.workers}")
+    print(f"{'key':>5} {'bytes':>8} {'chunks':>7} {'enc serial':>11} {'enc par':>9} {'x':>5} "
+          f"{'dec serial':>11} {'dec par':>9} {'x':>5}")
+
+    try:
+        for key_size in [int(k) for k in args.key_sizes.split(',')]:
+            keys = engine.generate_key_pair(key_size)
+            for size in [int(s) for s in args.sizes.split(',')]:
+                plaintext = 'x' * size
+                ciphertext = engine.encrypt(plaintext, keys['public_key'])
+                engine.encrypt(plaintext, keys['public_key'], parallel=True)
+                engine.decrypt(ciphertext, keys['private_key'], parallel=True)
+
+                enc_serial = timed(lambda: engine.encrypt(plaintext, keys['public_key'], parallel=False), args.repeat)
+                enc_par = timed(lambda: engine.encrypt(plaintext, keys['public_key'], parallel=True), args.repeat)
+                dec_serial = timed(lambda: engine.decrypt(ciphertext, keys['private_key'], parallel=False), args.repeat)
+                dec_par = timed(lambda: engine.decrypt(ciphertext, keys['private_key'], parallel=True), args.repeat)
+
+                print(f"{key_size:>5} {size:>8} {ciphertext.count('|') + 1:>7} "
+                      f"{enc_serial * 1000:>9.1f}ms {enc_par * 1000:>7.1f}ms {enc_serial / enc_par:>5.2f} "
+                      f"{dec_serial * 1000:>9.1f}ms {dec_par * 1000:>7.1f}ms {dec_serial / dec_par:>5.2f}")
+    finally:
+        crypto_engine.shutdown_chunk_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Serial versus process-pool PDF text extraction on synthetic multi-page PDFs.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pdf_extraction --pages 10,50,150,300 --workers 4
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from services import text_extraction
+from tests.documents import make_pdf
+
+
+def timed(data, workers):
+    text_extraction.PDF_EXTRACT_WORKERS = workers
+    text_extraction.PDF_PARALLEL_MIN_PAGES = 2
+    start = time.perf_counter()
+    text = text_extraction.extract_text(io.BytesIO(data), '.pdf')
+    return time.perf_counter() - start, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', default='10,50,150,300')
+    parser.add_argument('--lines', type=int, default=40, help='Text lines per page')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()} workers={args.workers} lines/page={args.lines}")
+    print(f"{'pages':>6} {'pdf KiB':>8} {'serial':>9} {'parallel':>9} {'x':>6}")
+    # Warm the pool so process start-up is not charged to the first size
+    timed(make_pdf(2, 1), args.workers)
+
+    for pages in [int(p) for p in args.pages.split(',')]:
+        data = make_pdf(pages, lines_per_page=args.lines)
+        serial, expected = timed(data, 1)
+        parallel, text = timed(data, args.workers)
+        assert text == expected
+        print(f"{pages:>6} {len(data) // 1024:>8} {serial * 1000:>7.0f}ms {parallel * 1000:>7.0f}ms "
+              f"{serial / parallel:>6.2f}")
+
+    text_extraction.shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Saved ciphertexts per second: one request per item versus the batch endpoints.
+
+Uses a throwaway SQLite file so commits pay for real disk writes. Run from the backend directory:
+    python -m benchmarks.bench_saved_batch --items 200 --key-size 2048
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+_db_dir = tempfile.mkdtemp(prefix='bench-saved-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'bench.db')}")
+os.environ.setdefault('KEY_POOL_DEPTH', '0')
+from app import app
+
+HEADERS = {'X-MS-CLIENT-PRINCIPAL-ID': 'bench-user', 'X-MS-CLIENT-PRINCIPAL-NAME': 'bench@example.com'}
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--key-size', type=int, default=2048)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    keys = client.post('/api/generate', json={'keySize': args.key_size}).get_json()['data']
+    messages = [f"archived message {i:06d}" for i in range(args.items)]
+    ciphertexts = [
+        item['ciphertext'] for item in client.post('/api/encrypt/batch', json={
+            'publicKey': keys['public_key'], 'messages': messages
+        }).get_json()['data']['results']
+    ]
+    items = [
+        {'name': message, 'ciphertext': ciphertext, 'privateKey': keys['private_key']}
+        for message, ciphertext in zip(messages, ciphertexts)
+    ]
+    single_ids, batch_ids = [], []
+
+    def single_create():
+        for item in items:
+            response = client.post('/api/saved-ciphertexts', headers=HEADERS, json=item)
+            single_ids.append(response.get_json()['data']['id'])
+
+    def batch_create():
+        response = client.post('/api/saved-ciphertexts/batch', headers=HEADERS, json={'items': items})
+        batch_ids.extend(item['id'] for item in response.get_json()['data'])
+
+    def single_decrypt():
+        for item_id in single_ids:
+            client.post(f'/api/saved-ciphertexts/{item_id}/decrypt', headers=HEADERS)
+
+    def batch_decrypt():
+        client.post('/api/saved-ciphertexts/decrypt/batch', headers=HEADERS, json={'ids': batch_ids})
+
+    def single_delete():
+        for item_id in single_ids:
+            client.delete(f'/api/saved-ciphertexts/{item_id}', headers=HEADERS)
+
+    def batch_delete():
+        client.delete('/api/saved-ciphertexts/batch', headers=HEADERS, json={'ids': batch_ids})
+
+    print(f"cpus={os.cpu_count()} key_size={args.key_size} items={args.items} db={os.environ['DATABASE_URL']}")
+    rows = [
+        ('create single', rate(args.items, single_create)),
+        ('create batch', rate(args.items, batch_create)),
+        ('decrypt single', rate(args.items, single_decrypt)),
+        ('decrypt batch', rate(args.items, batch_decrypt)),
+        ('delete single', rate(args.items, single_delete)),
+        ('delete batch', rate(args.items, batch_delete)),
+    ]
+    for name, value in rows:
+        print(f"{name:<24} {value:10.1f} items/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""
+Load test one instance of the app under Werkzeug's WSGI server at increasing concurrency.
+
+Starts app.py in a child process on a free localhost port, so the load generator
+does not share the server's GIL. The server is threaded, or with --processes N
+forks a process per connection, up to N at once. A weighted mix of /api routes
+is driven from one thread per simulated client; each concurrency level runs for
+--seconds after a short warm-up and reports throughput plus p50/p95/p99 latency
+per route. --target points it at a server that is already running instead.
+Run from the backend directory:
+    python -m benchmarks.load_test --mix encrypt=6,decrypt=3,generate=1 --concurrency 1,2,4,8,16
+    python -m benchmarks.load_test --processes 4 --seconds 20 --out load.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.append(BACKEND_DIR)
+
+READY_PREFIX = 'listening on port '
+
+
+def serve(args):
+    """
+    Child process: run the app under Werkzeug's server and announce the port on stdout
+    """
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        # Keep-alive, so each client reuses one connection like a browser would
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    threaded = args.processes == 1
+    server = make_server(args.host, args.port, app, threaded=threaded, processes=args.processes,
+                         request_handler=QuietHandler)
+    print(f'{READY_PREFIX}{server.port}', flush=True)
+    server.serve_forever()
+
+
+def start_server(host, processes):
+    """
+    Start the serve subcommand in a child process
+
+    Returns:
+        tuple: (Popen, base URL)
+    """
+    env = dict(os.environ)
+    # A throwaway database, and the key pool as configured in production unless overridden
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='load-test-'), 'load.db')}")
+    child = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.load_test', 'serve', '--host', host, '--port', '0',
+         '--processes', str(processes)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True
+    )
+    for line in child.stdout:
+        if line.startswith(READY_PREFIX):
+            return child, f'http://{host}:{int(line[len(READY_PREFIX):])}'
+    child.wait()
+    raise RuntimeError(f"Server exited with status {child.returncode} before listening")
+
+
+class Client:
+    """
+    One keep-alive connection; http.client reopens it if the server closes it
+    """
+
+    def __init__(self, base_url, timeout=60):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+
+    def post(self, path, body):
+        try:
+            self.connection.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            raise
+
+    def close(self):
+        self.connection.close()
+
+
+def build_routes(base_url, key_size, payload):
+    """
+    Request bodies for every route in the mix, encoded once up front
+
+    Returns:
+        dict: route name -> (path, body bytes)
+    """
+    client = Client(base_url)
+    try:
+        def call(path, body):
+            status, data = client.post(path, json.dumps(body).encode('utf-8'))
+            if status != 200:
+                raise RuntimeError(f"{path} returned {status}: {data[:200]!r}")
+            return json.loads(data)['data']
+
+        keys = call('/api/generate', {'keySize': key_size})
+        plaintext = ''.join(random.Random(455).choice('abcdefghijklmnopqrstuvwxyz ') for _ in range(payload))
+        ciphertext = call('/api/encrypt', {'publicKey': keys['public_key'], 'plaintext': plaintext})['ciphertext']
+        envelope = call('/api/encrypt', {
+            'publicKey': keys['public_key'], 'plaintext': plaintext, 'mode': 'envelope'
+        })['ciphertext']
+    finally:
+        client.close()
+
+    bodies = {
+        'encrypt': ('/api/encrypt', {'publicKey': keys['public_key'], 'plaintext': plaintext}),
+        'encrypt-envelope': ('/api/encrypt', {'publicKey': keys['public_key'], 'plaintext': plaintext,
+                                              'mode': 'envelope'}),
+        'decrypt': ('/api/decrypt', {'privateKey': keys['private_key'], 'ciphertext': ciphertext}),
+        'decrypt-envelope': ('/api/decrypt', {'privateKey': keys['private_key'], 'ciphertext': envelope}),
+        'generate': ('/api/generate', {'keySize': key_size}),
+        'avalanche': ('/api/avalanche', {'publicKey': keys['public_key'], 'plaintext': plaintext,
+                                         'includeHex': False}),
+    }
+    return {name: (path, json.dumps(body).encode('utf-8')) for name, (path, body) in bodies.items()}
+
+
+def parse_mix(text, routes):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in routes:
+            raise SystemExit(f"Unknown route '{name}', choose from {', '.join(routes)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_level(base_url, routes, mix, concurrency, seconds, warmup):
+    """
+    Drive the mix from `concurrency` clients; only requests started after the warm-up count
+
+    Returns:
+        tuple: {route: {'latencies': [...], 'errors': n}} and the measured wall time
+    """
+    names, weights = list(mix), list(mix.values())
+    results = {name: {'latencies': [], 'errors': 0} for name in names}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + seconds
+
+    def worker(index):
+        rng = random.Random(index)
+        client = Client(base_url)
+        latencies = {name: [] for name in names}
+        errors = dict.fromkeys(names, 0)
+        try:
+            while True:
+                began = time.perf_counter()
+                if began >= deadline:
+                    break
+                name = rng.choices(names, weights)[0]
+                path, body = routes[name]
+                try:
+                    status, _ = client.post(path, body)
+                    ok = status == 200
+                except (OSError, http.client.HTTPException):
+                    ok = False
+                if began < measure_from:
+                    continue
+                if ok:
+                    latencies[name].append(time.perf_counter() - began)
+                else:
+                    errors[name] += 1
+        finally:
+            client.close()
+        with lock:
+            for name in names:
+                results[name]['latencies'] += latencies[name]
+                results[name]['errors'] += errors[name]
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    # Requests in flight at the deadline finish late; count the time they took
+    elapsed = max(time.perf_counter(), deadline) - measure_from
+    return results, elapsed
+
+
+def summarize(results, elapsed):
+    routes = {}
+    for name, result in results.items():
+        latencies = result['latencies']
+        routes[name] = {
+            'requests': len(latencies),
+            'errors': result['errors'],
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies, default=0.0),
+        }
+    return {
+        'rps': sum(route['rps'] for route in routes.values()),
+        'errors': sum(route['errors'] for route in routes.values()),
+        'routes': routes,
+    }
+
+
+def load(args):
+    child = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+    else:
+        child, base_url = start_server(args.host, args.processes)
+
+    try:
+        routes = build_routes(base_url, args.key_size, args.payload)
+        mix = parse_mix(args.mix, routes)
+        levels = [int(level) for level in args.concurrency.split(',')]
+
+        print(f"server={base_url} processes={args.processes} cpus={os.cpu_count()} key_size={args.key_size} "
+              f"payload={args.payload} mix={args.mix} seconds={args.seconds}")
+        print(f"{'clients':>7} {'route':<17} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'max ms':>9} {'errors':>7}")
+
+        report = []
+        for concurrency in levels:
+            summary = summarize(*run_level(base_url, routes, mix, concurrency, args.seconds, args.warmup))
+            report.append({'concurrency': concurrency, **summary})
+            for name, route in summary['routes'].items():
+                print(f"{concurrency:>7} {name:<17} {route['rps']:>9.1f} {route['p50'] * 1000:>9.2f} "
+                      f"{route['p95'] * 1000:>9.2f} {route['p99'] * 1000:>9.2f} {route['max'] * 1000:>9.2f} "
+                      f"{route['errors']:>7}")
+            print(f"{concurrency:>7} {'total':<17} {summary['rps']:>9.1f} {'':>39} {summary['errors']:>7}")
+
+        peak = max(report, key=lambda level: level['rps'])
+        print(f"Peak {peak['rps']:.1f} req/s at {peak['concurrency']} clients")
+
+        if args.out:
+            with open(args.out, 'w', encoding='utf-8') as out:
+                json.dump({
+                    'settings': {
+                        'server': base_url, 'processes': args.processes, 'key_size': args.key_size,
+                        'payload': args.payload, 'mix': mix, 'seconds': args.seconds, 'warmup': args.warmup,
+                        'cpu_count': os.cpu_count(),
+                    },
+                    'levels': report,
+                }, out, indent=2)
+            print(f"Wrote {args.out}")
+    finally:
+        if child is not None:
+            child.terminate()
+            child.wait()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command')
+
+    serve_parser = commands.add_parser('serve', help='Run the app server (used by the load test itself)')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=0)
+    serve_parser.add_argument('--processes', type=int, default=1)
+    serve_parser.set_defaults(handler=serve)
+
+    parser.add_argument('--target', help='Base URL of a running server; by default one is started')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--processes', type=int, default=1, help='Most forked server processes; 1 means threaded')
+    parser.add_argument('--mix', default='encrypt=6,decrypt=3,generate=1',
+                        help='Weighted routes: encrypt, encrypt-envelope, decrypt, decrypt-envelope, '
+                             'generate, avalanche')
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=1)
+    parser.add_argument('--key-size', type=int, default=2048)
+    parser.add_argument('--payload', type=int, default=256, help='Plaintext characters')
+    parser.add_argument('--out', help='Also write the results as JSON')
+    parser.set_defaults(handler=load)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+Benchmark suite for RSAService and the HTTP endpoints, with JSON results and a regression check.
+
+Sweeps key size and payload size over key generation, encrypt, decrypt and the
+avalanche computation, once through RSAService and once through the Flask routes
+with the test client. Each case is warmed up, then timed in `--repeat` samples
+of enough calls to last at least `--min-sample` seconds. compare checks the
+fastest sample per call by default: noise from other processes only ever adds
+time, so the minimum moves least between identical runs. Keys larger than the
+app can generate are made with cryptography directly, so only the generation
+cases are skipped for them. Key generation searches for random primes, so its
+time varies from call to call by design; give it a larger --repeat or threshold.
+
+Run from the backend directory:
+    python -m benchmarks.suite run --out baseline.json
+    python -m benchmarks.suite run --out current.json --filter encrypt
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.10
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import subprocess
+import sys
+import time
+from functools import partial
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+# Time inline key generation, not the pre-generated pool
+os.environ.setdefault('KEY_POOL_DEPTH', '0')
+import cryptography
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from app import app
+from services.crypto_engine import SUPPORTED_KEY_SIZES
+from services.rsa_service import RSAService
+
+FORMAT_VERSION = 1
+
+
+def make_plaintext(size, seed):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(string.ascii_letters + string.digits + ' ') for _ in range(size))
+
+
+def make_key_pair(key_size):
+    if key_size in SUPPORTED_KEY_SIZES:
+        return RSAService().generate_key_pair(key_size)
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    return {
+        'public_key': private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode('utf-8'),
+        'private_key': private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode('utf-8'),
+    }
+
+
+def cases(key_sizes, payloads, modes, seed, wanted=None):
+    """
+    Args:
+        wanted (callable, optional): Takes a case id and returns whether to run it
+
+    Yields:
+        tuple: (name, params, fn) for every wanted benchmark case; key pairs and
+            ciphertexts are only made once a case that needs them is wanted
+    """
+    service = RSAService()
+    client = app.test_client()
+    key_pairs = {}
+    ciphertexts = {}
+
+    def keys(key_size):
+        if key_size not in key_pairs:
+            key_pairs[key_size] = make_key_pair(key_size)
+        return key_pairs[key_size]
+
+    def ciphertext(key_size, plaintext, mode):
+        if (key_size, plaintext, mode) not in ciphertexts:
+            ciphertexts[key_size, plaintext, mode] = service.encrypt(plaintext, keys(key_size)['public_key'], mode=mode)
+        return ciphertexts[key_size, plaintext, mode]
+
+    def post(path, body):
+        response = client.post(path, json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return response
+
+    # (name, params, setup) where setup() does the expensive preparation and returns the timed call
+    def specs():
+        for key_size in key_sizes:
+            if key_size in SUPPORTED_KEY_SIZES:
+                yield 'service.generate_key_pair', {'key_size': key_size}, \
+                    lambda k=key_size: partial(service.generate_key_pair, k)
+                yield 'http.generate', {'key_size': key_size}, \
+                    lambda k=key_size: partial(post, '/api/generate', {'keySize': k})
+
+            for payload in payloads:
+                plaintext = make_plaintext(payload, seed)
+                for mode in modes:
+                    params = {'key_size': key_size, 'payload': payload, 'mode': mode}
+                    yield 'service.encrypt', params, lambda k=key_size, p=plaintext, m=mode: \
+                        partial(service.encrypt, p, keys(k)['public_key'], mode=m)
+                    yield 'service.decrypt', params, lambda k=key_size, p=plaintext, m=mode: \
+                        partial(service.decrypt, ciphertext(k, p, m), keys(k)['private_key'])
+                    yield 'http.encrypt', params, lambda k=key_size, p=plaintext, m=mode: partial(post, '/api/encrypt', {
+                        'publicKey': keys(k)['public_key'], 'plaintext': p, 'mode': m
+                    })
+                    yield 'http.decrypt', params, lambda k=key_size, p=plaintext, m=mode: partial(post, '/api/decrypt', {
+                        'privateKey': keys(k)['private_key'], 'ciphertext': ciphertext(k, p, m)
+                    })
+
+                params = {'key_size': key_size, 'payload': payload}
+                yield 'service.compute_avalanche_effect', params, lambda k=key_size, p=plaintext: \
+                    partial(service.compute_avalanche_effect, keys(k)['public_key'], p)
+                yield 'http.avalanche', params, lambda k=key_size, p=plaintext: partial(post, '/api/avalanche', {
+                    'publicKey': keys(k)['public_key'], 'plaintext': p
+                })
+
+    for name, params, setup in specs():
+        if wanted is None or wanted(case_id(name, params)):
+            yield name, params, setup()
+
+
+def case_id(name, params):
+    return name + '[' + ','.join(f'{key}={value}' for key, value in params.items()) + ']'
+
+
+def measure(fn, repeat, min_sample):
+    """
+    Time fn in `repeat` samples, with the garbage collector off like timeit
+
+    Returns:
+        dict: Calls per sample and per-call seconds (min, median, mean, stdev)
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    number = max(1, int(min_sample / max(first, 1e-9)))
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        'number': number,
+        'repeat': repeat,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'cryptography': cryptography.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run(args):
+    key_sizes = [int(size) for size in args.key_sizes.split(',')]
+    payloads = [int(size) for size in args.payloads.split(',')]
+    modes = args.modes.split(',')
+
+    results = []
+    print(f"{'case':<72} {'min':>11} {'median':>11} {'stdev':>9}")
+    wanted = (lambda identifier: args.filter in identifier) if args.filter else None
+    for name, params, fn in cases(key_sizes, payloads, modes, args.seed, wanted):
+        identifier = case_id(name, params)
+        result = {'id': identifier, 'name': name, 'params': params, **measure(fn, args.repeat, args.min_sample)}
+        results.append(result)
+        print(f"{identifier:<72} {result['min'] * 1000:>9.3f}ms {result['median'] * 1000:>9.3f}ms "
+              f"{result['stdev'] / result['median'] * 100:>8.1f}%")
+
+    report = {
+        'version': FORMAT_VERSION,
+        'metadata': metadata(),
+        'settings': {
+            'key_sizes': key_sizes, 'payloads': payloads, 'modes': modes, 'seed': args.seed,
+            'repeat': args.repeat, 'min_sample': args.min_sample,
+        },
+        'results': results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as out:
+        json.dump(report, out, indent=2)
+    print(f"Wrote {len(results)} results to {args.out}")
+    return 0
+
+
+def compare_reports(baseline, current, threshold, stat='min'):
+    """
+    Match results by case id and classify the change in time per call
+
+    Args:
+        baseline (dict): Report written by run
+        current (dict): Report written by run
+        threshold (float): Relative slowdown (0.10 = 10%) that counts as a regression
+        stat (str): Statistic compared: 'min', 'median' or 'mean'
+
+    Returns:
+        list: (id, baseline time, current time, ratio, status) with status
+            'regression', 'improvement', 'unchanged', 'new' or 'missing'
+    """
+    before = {result['id']: result for result in baseline['results']}
+    after = {result['id']: result for result in current['results']}
+
+    rows = []
+    for identifier in list(before) + [i for i in after if i not in before]:
+        if identifier not in after:
+            rows.append((identifier, before[identifier][stat], None, None, 'missing'))
+            continue
+        if identifier not in before:
+            rows.append((identifier, None, after[identifier][stat], None, 'new'))
+            continue
+        ratio = after[identifier][stat] / before[identifier][stat]
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        rows.append((identifier, before[identifier][stat], after[identifier][stat], ratio, status))
+    return rows
+
+
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    for field in ('python', 'cryptography', 'machine', 'cpu_count'):
+        if baseline['metadata'].get(field) != current['metadata'].get(field):
+            print(f"warning: {field} differs ({baseline['metadata'].get(field)} -> {current['metadata'].get(field)})")
+
+    def ms(value):
+        return f'{value * 1000:.3f}ms' if value is not None else '-'
+
+    rows = compare_reports(baseline, current, args.threshold, args.stat)
+    print(f"{'case':<72} {'baseline':>11} {'current':>11} {'change':>8}  status ({args.stat} per call)")
+    for identifier, before, after, ratio, status in rows:
+        change = f'{(ratio - 1) * 100:+.1f}%' if ratio is not None else '-'
+        print(f"{identifier:<72} {ms(before):>11} {ms(after):>11} {change:>8}  {status}")
+
+    regressions = [row for row in rows if row[4] == 'regression']
+    print(f"{len(regressions)} regressions beyond {args.threshold * 100:.0f}% out of {len(rows)} cases")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks and write a JSON report')
+    run_parser.add_argument('--out', default='bench-results.json')
+    run_parser.add_argument('--key-sizes', default='1024,2048,4096')
+    run_parser.add_argument('--payloads', default='32,1024,16384', help='Plaintext characters')
+    run_parser.add_argument('--modes', default='chunked,envelope')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--min-sample', type=float, default=0.05, help='Seconds per timed sample')
+    run_parser.add_argument('--seed', type=int, default=455, help='Seed for the plaintexts')
+    run_parser.add_argument('--filter', help='Only run cases whose id contains this text')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help='Compare two reports; exits 1 on regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown that fails')
+    compare_parser.add_argument('--stat', choices=('min', 'median', 'mean'), default='min')
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
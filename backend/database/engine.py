@@ -0,0 +1,88 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def _env_int(environ, name, default):
+    return int(environ.get(name, default))
+
+
+def is_sqlite(url):
+    """
+    Whether a database URL points at SQLite
+    """
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def engine_options(url, environ=os.environ):
+    """
+    SQLAlchemy engine options for the configured database
+
+    Server databases get a sized connection pool that checks connections before
+    use and recycles them before idle timeouts on the server side can drop them.
+    SQLite gets its busy timeout here; its pragmas are set per connection by
+    install_sqlite_pragmas().
+
+    Args:
+        url (str): Database URL
+        environ (dict): Source of the DB_* and SQLITE_* settings
+
+    Returns:
+        dict: Keyword arguments for create_engine (SQLALCHEMY_ENGINE_OPTIONS)
+    """
+    if is_sqlite(url):
+        # pysqlite's timeout is SQLite's busy timeout, in seconds
+        return {
+            'connect_args': {'timeout': _env_int(environ, 'SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}
+        }
+
+    return {
+        'pool_size': _env_int(environ, 'DB_POOL_SIZE', 5),
+        'max_overflow': _env_int(environ, 'DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int(environ, 'DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int(environ, 'DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': environ.get('DB_POOL_PRE_PING', '1') != '0',
+    }
+
+
+def sqlite_pragmas(environ=os.environ):
+    """
+    Pragmas applied to every new SQLite connection
+
+    WAL lets readers carry on while one writer commits, and with WAL,
+    synchronous=NORMAL only syncs at checkpoints instead of on every commit.
+
+    Returns:
+        list: (pragma, value) pairs in the order they are applied
+    """
+    pragmas = []
+    if environ.get('SQLITE_WAL', '1') != '0':
+        pragmas.append(('journal_mode', 'WAL'))
+    pragmas += [
+        ('synchronous', environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', _env_int(environ, 'SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('mmap_size', _env_int(environ, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    ]
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, pragmas=None):
+    """
+    Apply pragmas to each connection the engine opens; does nothing for other databases
+
+    Args:
+        engine (Engine): Engine to configure, before its first connection
+        pragmas (list, optional): (pragma, value) pairs, defaults to sqlite_pragmas()
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,240 @@
+from sqlalchemy import func, inspect, text
+from sqlalchemy.orm import undefer
+from database.database import db
+from services import ciphertext_storage
+from models.savedCiphertext import SavedCiphertext
+from models.storedKey import StoredKey
+from models.savedCiphertextRevision import SavedCiphertextRevision, DeletedCiphertext
+
+
+def _add_column(conn, table, column):
+    quote = conn.dialect.identifier_preparer.quote
+    ddl = f'ALTER TABLE {quote(table.name)} ADD {quote(column.name)} {column.type.compile(dialect=conn.dialect)}'
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        ddl += f' REFERENCES {quote(target.table.name)} ({quote(target.name)})'
+    conn.execute(text(ddl))
+
+
+def _relax_not_null(conn, table, column):
+    dialect = conn.dialect
+    quoted_table = dialect.identifier_preparer.quote(table.name)
+    quoted_column = dialect.identifier_preparer.quote(column.name)
+    column_type = column.type.compile(dialect=dialect)
+
+    if dialect.name == 'postgresql':
+        conn.execute(text(f'ALTER TABLE {quoted_table} ALTER COLUMN {quoted_column} DROP NOT NULL'))
+    elif dialect.name == 'mssql':
+        conn.execute(text(f'ALTER TABLE {quoted_table} ALTER COLUMN {quoted_column} {column_type} NULL'))
+    else:
+        conn.execute(text(f'ALTER TABLE {quoted_table} MODIFY {quoted_column} {column_type} NULL'))
+
+
+def _rebuild_sqlite_table(conn, table, old_columns):
+    # SQLite cannot change a column's constraints in place: copy into a fresh table
+    old_name = table.name + '_old'
+    for index in inspect(conn).get_indexes(table.name):
+        conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"'))
+    table.create(conn)
+
+    columns = ', '.join(f'"{name}"' for name in old_columns if name in table.c)
+    conn.execute(text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old_name}"'))
+    conn.execute(text(f'DROP TABLE "{old_name}"'))
+
+
+def _rebuild_sqlite_tables(engine, rebuilds):
+    """
+    Rebuild tables in one explicit transaction, so a failure leaves every table as it was
+
+    pysqlite only opens a transaction before INSERT/UPDATE/DELETE, so on its own the
+    DROP INDEX, RENAME and CREATE TABLE steps would each commit immediately. With the
+    driver's isolation_level set to None it issues no BEGIN or COMMIT of its own, and
+    the BEGIN below covers the DDL too.
+    """
+    with engine.connect() as conn:
+        driver_connection = conn.connection.driver_connection
+        isolation_level = driver_connection.isolation_level
+        driver_connection.isolation_level = None
+        try:
+            conn.exec_driver_sql('BEGIN')
+            for table, old_columns in rebuilds:
+                _rebuild_sqlite_table(conn, table, old_columns)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            driver_connection.isolation_level = isolation_level
+
+
+def upgrade_schema(engine):
+    """
+    Bring an existing database up to the current models. Safe to rerun; run it once per
+    deploy with `flask upgrade-schema` rather than from every worker process.
+
+    create_all() only adds missing tables, so columns that were added or made
+    nullable since a table was created, and new indexes, are handled here.
+
+    Args:
+        engine (Engine): Engine bound to the application database
+
+    Returns:
+        list: Descriptions of the changes that were applied
+    """
+    applied = []
+    db.metadata.create_all(engine)
+
+    for model in (StoredKey, SavedCiphertext, SavedCiphertextRevision, DeletedCiphertext):
+        table = model.__table__
+        existing = {column['name']: column for column in inspect(engine).get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        relaxed = [
+            column for column in table.columns
+            if column.name in existing and column.nullable and not existing[column.name]['nullable']
+        ]
+        if not missing and not relaxed:
+            continue
+
+        if engine.dialect.name == 'sqlite':
+            _rebuild_sqlite_tables(engine, [(table, list(existing))])
+        else:
+            with engine.begin() as conn:
+                for column in missing:
+                    _add_column(conn, table, column)
+                for column in relaxed:
+                    _relax_not_null(conn, table, column)
+        applied += [f'{table.name}: add {column.name}' for column in missing]
+        applied += [f'{table.name}: make {column.name} nullable' for column in relaxed]
+
+    for model in (StoredKey, SavedCiphertext, SavedCiphertextRevision, DeletedCiphertext):
+        for index in model.__table__.indexes:
+            if index.name not in {i['name'] for i in inspect(engine).get_indexes(model.__tablename__)}:
+                index.create(engine)
+                applied.append(f'index {index.name}')
+
+    return applied
+
+
+def dedupe_private_keys(session, rsa_engine, batch_size=200):
+    """
+    Move private keys stored on saved ciphertext rows into the key registry
+
+    Rows sharing a key end up pointing at one StoredKey row per user, and their
+    own private_key copy is cleared, and the owners' list revisions advance.
+    Rows whose key does not parse are left as they are. Commits once per
+    batch, so it can be interrupted and rerun.
+
+    Args:
+        session (Session): Database session
+        rsa_engine (RSAEngine): Engine used to parse and fingerprint the keys
+        batch_size (int): Rows per transaction
+
+    Returns:
+        dict: Rows migrated, keys created and rows skipped
+    """
+    result = {'rows': 0, 'keys': 0, 'skipped': 0}
+    keys_before = session.query(StoredKey).count()
+    last_id = 0
+
+    while True:
+        rows = (
+            session.query(SavedCiphertext)
+            .options(undefer(SavedCiphertext.private_key))
+            .filter(SavedCiphertext.id > last_id)
+            .filter(SavedCiphertext.key_id.is_(None), SavedCiphertext.private_key.isnot(None))
+            .order_by(SavedCiphertext.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            result['keys'] = session.query(StoredKey).count() - keys_before
+            return result
+
+        changed_users = set()
+        for row in rows:
+            last_id = row.id
+            try:
+                handle = rsa_engine.private_handle(row.private_key)
+            except Exception:
+                result['skipped'] += 1
+                continue
+
+            key = StoredKey.find_or_add(
+                session,
+                user_id=row.user_id,
+                fingerprint=handle.public_fingerprint.hex(),
+                key_size=handle.key_size,
+                public_key=rsa_engine.export_public_key(handle),
+                private_key=row.private_key
+            )
+
+            row.key_id = key.id
+            row.private_key = None
+            changed_users.add(row.user_id)
+            result['rows'] += 1
+
+        # Listings now show a key_id, so cached copies must not validate
+        for user_id in changed_users:
+            SavedCiphertextRevision.bump(session, user_id)
+        session.commit()
+
+
+def pack_saved_ciphertexts(session, batch_size=200, compress=None):
+    """
+    Move ciphertexts stored as text into the packed binary column
+
+    Commits once per batch, so it can be interrupted and rerun.
+
+    Args:
+        session (Session): Database session
+        batch_size (int): Rows per transaction
+        compress (bool, optional): Try zlib, defaults to the storage setting
+
+    Returns:
+        dict: Rows migrated and their size as text and as stored
+    """
+    result = {'rows': 0, 'text_bytes': 0, 'stored_bytes': 0}
+
+    while True:
+        rows = (
+            session.query(SavedCiphertext)
+            .options(undefer(SavedCiphertext.ciphertext_text))
+            .filter(SavedCiphertext.ciphertext_data.is_(None), SavedCiphertext.ciphertext_text.isnot(None))
+            .order_by(SavedCiphertext.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return result
+
+        for row in rows:
+            text_value = row.ciphertext_text
+            row.ciphertext_data = ciphertext_storage.encode(text_value, compress=compress)
+            row.ciphertext_text = None
+            result['rows'] += 1
+            result['text_bytes'] += len(text_value.encode('utf-8'))
+            result['stored_bytes'] += len(row.ciphertext_data)
+
+        session.commit()
+
+
+def ciphertext_storage_report(session):
+    """
+    Rows and bytes held in each ciphertext column
+
+    Returns:
+        dict: Row count and total size for text and binary storage
+    """
+    text_rows, text_bytes = session.query(
+        func.count(SavedCiphertext.ciphertext_text), func.sum(func.length(SavedCiphertext.ciphertext_text))
+    ).one()
+    binary_rows, binary_bytes = session.query(
+        func.count(SavedCiphertext.ciphertext_data), func.sum(func.length(SavedCiphertext.ciphertext_data))
+    ).one()
+    return {
+        'text_rows': text_rows,
+        'text_bytes': text_bytes or 0,
+        'binary_rows': binary_rows,
+        'binary_bytes': binary_bytes or 0,
+    }
@@ -0,0 +1,50 @@
+import base64
+import datetime
+import json
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at, row_id):
+    """
+    Opaque cursor pointing just after a row in (created_at, id) order
+
+    Args:
+        created_at (datetime): Creation time of the last row on the page
+        row_id (int): Id of the last row on the page
+
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor()
+
+    Returns:
+        tuple: (created_at, row_id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        if not isinstance(row_id, int):
+            raise ValueError
+        return datetime.datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def after_keyset(created_at_column, id_column, cursor):
+    """
+    Filter for rows that come after a cursor in (created_at, id) order
+
+    Spelled out with OR/AND rather than a row-value comparison so every backend
+    can use the (user_id, created_at, id) index for it.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_at_column > created_at,
+        and_(created_at_column == created_at, id_column > row_id)
+    )
@@ -1,25 +1,59 @@
 from database.database import db
+from services import ciphertext_storage
+from sqlalchemy.orm import deferred
 import datetime
 
 class SavedCiphertext(db.Model):
     __tablename__ = 'SavedCiphertext'
+    __table_args__ = (
+        # Serves the per-user listing ordered by (created_at, id) and its keyset cursor
+        db.Index('ix_SavedCiphertext_user_created_id', 'user_id', 'created_at', 'id'),
+        # Serves ?since= sync: rows added after a revision
+        db.Index('ix_SavedCiphertext_user_revision', 'user_id', 'revision'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.String(255), nullable=False, index=True)
     user_email = db.Column(db.String(255), nullable=False)
     name = db.Column(db.String(255), nullable=False)
-    ciphertext = db.Column(db.Text, nullable=False)
-    private_key = db.Column(db.Text, nullable=False)
+    # The large columns are only loaded when accessed or explicitly undeferred.
+    # Ciphertexts are packed by services.ciphertext_storage; rows saved before
+    # that keep their text in the original "ciphertext" column until migrated.
+    ciphertext_data = deferred(db.Column(db.LargeBinary, nullable=True))
+    ciphertext_text = deferred(db.Column('ciphertext', db.Text, nullable=True))
+    # Rows reference a shared StoredKey; private_key is only set on rows saved before the key registry
+    key_id = db.Column(db.Integer, db.ForeignKey('StoredKey.id'), nullable=True, index=True)
+    private_key = deferred(db.Column(db.Text, nullable=True))
     created_at = db.Column(db.DateTime, default=datetime.datetime.now)
+    # User's SavedCiphertextRevision when the row was added (NULL for rows older than revisions)
+    revision = db.Column(db.Integer, nullable=True)
 
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
+    key = db.relationship('StoredKey')
+
+    @property
+    def ciphertext(self):
+        """Ciphertext in the text form clients send and receive"""
+        if self.ciphertext_data is not None:
+            return ciphertext_storage.decode(self.ciphertext_data)
+        return self.ciphertext_text
+
+    @ciphertext.setter
+    def ciphertext(self, value):
+        self.ciphertext_data = ciphertext_storage.encode(value)
+        self.ciphertext_text = None
+
+    def to_dict(self, include_ciphertext=True, include_private_key=True):
+        """Convert model to dictionary, leaving out the large columns that were not asked for"""
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'user_email': self.user_email,
             'name': self.name,
-            'ciphertext': self.ciphertext,
-            'private_key': self.private_key,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
\ No newline at end of file
+        }
+        if include_ciphertext:
+            data['ciphertext'] = self.ciphertext
+        if include_private_key:
+            data['private_key'] = self.key.private_key if self.key_id is not None else self.private_key
+        data['key_id'] = self.key.fingerprint if self.key_id is not None else None
+        return data
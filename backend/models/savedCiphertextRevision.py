@@ -0,0 +1,48 @@
+from database.database import db
+from sqlalchemy.exc import IntegrityError
+import datetime
+
+class SavedCiphertextRevision(db.Model):
+    __tablename__ = 'SavedCiphertextRevision'
+
+    # One counter per user, advanced by every change to their saved ciphertexts
+    user_id = db.Column(db.String(255), primary_key=True)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def current(cls, session, user_id):
+        """Latest revision of the user's saved ciphertexts (0 before the first change)"""
+        return session.query(cls.revision).filter_by(user_id=user_id).scalar() or 0
+
+    @classmethod
+    def bump(cls, session, user_id):
+        """Advance the user's revision inside the caller's transaction and return the new value"""
+        if not cls._increment(session, user_id):
+            try:
+                # A savepoint, so losing the race below does not roll back the caller's work
+                with session.begin_nested():
+                    session.add(cls(user_id=user_id, revision=1))
+            except IntegrityError:
+                # Another request created the user's row after our update found none; advance that one
+                cls._increment(session, user_id)
+        return cls.current(session, user_id)
+
+    @classmethod
+    def _increment(cls, session, user_id):
+        return session.query(cls).filter_by(user_id=user_id).update(
+            {cls.revision: cls.revision + 1}, synchronize_session=False
+        )
+
+
+class DeletedCiphertext(db.Model):
+    __tablename__ = 'DeletedCiphertext'
+    __table_args__ = (
+        db.Index('ix_DeletedCiphertext_user_revision', 'user_id', 'revision'),
+    )
+
+    # Tombstone so clients syncing with ?since= learn which rows disappeared
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.String(255), nullable=False)
+    ciphertext_id = db.Column(db.Integer, nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.datetime.now)
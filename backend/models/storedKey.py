@@ -0,0 +1,45 @@
+from database.database import db
+from sqlalchemy.orm import deferred
+import datetime
+
+class StoredKey(db.Model):
+    __tablename__ = 'StoredKey'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'fingerprint', name='uq_StoredKey_user_fingerprint'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Hex SHA-256 of the DER public key; this is the keyId clients send
+    fingerprint = db.Column(db.String(64), nullable=False, index=True)
+    user_id = db.Column(db.String(255), nullable=False)
+    key_size = db.Column(db.Integer, nullable=False)
+    public_key = db.Column(db.Text, nullable=False)
+    private_key = deferred(db.Column(db.Text, nullable=True))
+    created_at = db.Column(db.DateTime, default=datetime.datetime.now)
+
+    @classmethod
+    def find_or_add(cls, session, user_id, fingerprint, key_size, public_key, private_key=None):
+        """Return the user's key with this fingerprint, adding it (or its private half) if missing"""
+        key = session.query(cls).filter_by(user_id=user_id, fingerprint=fingerprint).first()
+        if key is None:
+            key = cls(
+                user_id=user_id,
+                fingerprint=fingerprint,
+                key_size=key_size,
+                public_key=public_key,
+                private_key=private_key
+            )
+            session.add(key)
+            session.flush()
+        elif private_key and key.private_key is None:
+            key.private_key = private_key
+        return key
+
+    def to_dict(self):
+        """Convert model to dictionary, without the private key"""
+        return {
+            'key_id': self.fingerprint,
+            'key_size': self.key_size,
+            'public_key': self.public_key,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
@@ -0,0 +1,325 @@
+import asyncio
+import io
+import json
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.exceptions import HTTPException
+
+
+# Request bodies up to this size are buffered in memory; larger ones go to a temp file
+BODY_SPOOL_BYTES = 256 * 1024
+# Response chunks a streaming view may run ahead of the client
+RESPONSE_QUEUE_CHUNKS = 8
+
+
+class BadRequest(Exception):
+    """Raised when a request's framing cannot be read, answered with a 400"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client goes away before its request body has fully arrived"""
+
+
+class PoolBusy(Exception):
+    """Raised when a pool already has as many requests running and queued as it accepts"""
+
+
+class ExecutorPool:
+    """
+    Thread pool with a cap on the requests waiting for it
+
+    The worker count bounds how much of one kind of work runs at once; the
+    queue bound turns a backlog into fast 503s instead of ever-growing latency.
+    The counters are only touched from the event loop thread.
+    """
+
+    def __init__(self, name, workers, max_queue):
+        """
+        Args:
+            name (str): Pool name, used for thread names and stats
+            workers (int): Requests run at the same time
+            max_queue (int): Requests allowed to wait for a free worker
+        """
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'asgi-{name}')
+        self._pending = 0
+        self._stats = {'completed': 0, 'rejected': 0}
+
+    def submit(self, fn, *args):
+        """
+        Schedule fn(*args) on the pool; call from the event loop
+
+        Returns:
+            Future: asyncio future for the result
+
+        Raises:
+            PoolBusy: If the pool is full
+        """
+        if self._pending >= self.workers + self.max_queue:
+            self._stats['rejected'] += 1
+            raise PoolBusy(self.name)
+        self._pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        self._pending -= 1
+        self._stats['completed'] += 1
+
+    def stats(self):
+        return {'workers': self.workers, 'max_queue': self.max_queue, 'pending': self._pending, **self._stats}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _json_response(status, reason, error):
+    body = json.dumps({'success': False, 'error': error}).encode('utf-8')
+    return f'{status} {reason}', [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))], body
+
+
+class AsyncApp:
+    """
+    ASGI application that serves a WSGI (Flask) app from per-route executor pools
+
+    Socket I/O (reading request bodies, sending responses) happens on the event
+    loop. Each request then runs on the pool its endpoint is assigned to, so a
+    saturated pool of RSA or extraction work cannot hold up requests served by
+    another pool. Flask views and SQLAlchemy calls are synchronous, so even the
+    quick routes run on a thread pool of their own rather than on the loop.
+    Streaming responses are produced on the worker thread and handed to the
+    loop chunk by chunk, so they stay streamed.
+    """
+
+    def __init__(self, wsgi_app, pools, routes, default_pool, max_body_bytes=None):
+        """
+        Args:
+            wsgi_app (Flask): Application to serve; its url_map assigns requests to endpoints
+            pools (dict): Pool name -> ExecutorPool
+            routes (dict): Endpoint name -> pool name
+            default_pool (str): Pool for endpoints not listed in routes (and unmatched URLs)
+            max_body_bytes (int, optional): Largest request body accepted, answered with 413 beyond it
+        """
+        self.wsgi_app = wsgi_app
+        self.pools = pools
+        self.routes = routes
+        self.default_pool = default_pool
+        self.max_body_bytes = max_body_bytes
+
+    def pool_for(self, method, path):
+        """
+        Returns:
+            ExecutorPool: Pool that serves a request for this method and path
+        """
+        try:
+            endpoint, _ = self.wsgi_app.url_map.bind('localhost').match(path, method=method)
+        except HTTPException:
+            endpoint = None
+        return self.pools[self.routes.get(endpoint, self.default_pool)]
+
+    def stats(self):
+        """
+        Returns:
+            dict: Running, queued, completed and rejected requests per pool
+        """
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for pool in self.pools.values():
+                    pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        try:
+            body = await self._read_body(scope, receive)
+        except BadRequest as e:
+            await self._send_simple(send, *_json_response(400, 'Bad Request', str(e)))
+            return
+        except ClientDisconnected:
+            # Never run a view on a partial body; there is nobody left to answer
+            return
+        if body is None:
+            await self._send_simple(send, *_json_response(413, 'Request Entity Too Large', 'Request body too large'))
+            return
+
+        try:
+            environ = self._environ(scope, body)
+            pool = self.pool_for(scope['method'], scope['path'])
+        except BaseException:
+            body.close()
+            raise
+
+        # Once submitted, the worker owns the body and closes it when it finishes
+        try:
+            await self._run(pool, environ, send)
+        except PoolBusy:
+            body.close()
+            await self._send_simple(send, *_json_response(503, 'Service Unavailable', 'Server busy, try again'),
+                                    extra_headers=[('Retry-After', '1')])
+
+    async def _read_body(self, scope, receive):
+        """
+        Buffer the request body, or return None once it exceeds max_body_bytes
+
+        Raises:
+            BadRequest: If the Content-Length header is not a non-negative integer
+            ClientDisconnected: If the client disconnects before the body is complete
+        """
+        limit = self.max_body_bytes
+        for name, value in scope.get('headers', ()):
+            if name == b'content-length':
+                # int() would also take '+5', ' 5' or '1_000'; HTTP only allows digits
+                if not value.isdigit():
+                    raise BadRequest('Invalid Content-Length header')
+                if limit is not None and int(value) > limit:
+                    return None
+
+        body = tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_BYTES, mode='w+b')
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                raise ClientDisconnected()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if limit is not None and size > limit:
+                body.close()
+                return None
+            body.write(chunk)
+            more_body = message.get('more_body', False)
+        body.seek(0)
+        return body
+
+    @staticmethod
+    def _environ(scope, body):
+        """
+        PEP 3333 environ for an ASGI HTTP scope whose body has been buffered
+        """
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        client = scope.get('client')
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            # WSGI carries paths as the raw bytes decoded as latin-1
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0] if client else '',
+            'CONTENT_LENGTH': str(body.seek(0, io.SEEK_END)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        body.seek(0)
+
+        for name, value in scope.get('headers', ()):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            # The body is buffered, so the length above replaces any chunked framing
+            if name in ('CONTENT_LENGTH', 'TRANSFER_ENCODING'):
+                continue
+            key = name if name == 'CONTENT_TYPE' else f'HTTP_{name}'
+            value = value.decode('latin-1')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    async def _run(self, pool, environ, send):
+        """
+        Call the WSGI app on the pool and relay its status, headers and body chunks
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=RESPONSE_QUEUE_CHUNKS)
+        abandoned = False
+
+        def emit(item):
+            if abandoned:
+                raise ConnectionAbortedError("Client went away")
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def call_app():
+            response = []
+
+            def start_response(status, headers, exc_info=None):
+                if exc_info and response:
+                    raise exc_info[1].with_traceback(exc_info[2])
+                response[:] = [status, headers]
+
+            try:
+                result = self.wsgi_app(environ, start_response)
+                try:
+                    emit(('start', response[0], response[1]))
+                    for chunk in result:
+                        if chunk:
+                            emit(('body', chunk))
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+            except BaseException as e:
+                item = ('error', e)
+            else:
+                item = ('end', None)
+            if not abandoned:
+                emit(item)
+
+        worker = pool.submit(call_app)
+        # The worker can outlive this coroutine (client gone, task cancelled) and may still be
+        # reading wsgi.input, so the body is only closed once the worker has finished
+        worker.add_done_callback(lambda _: environ['wsgi.input'].close())
+        try:
+            while True:
+                kind, *payload = await queue.get()
+                if kind == 'start':
+                    status, headers = payload
+                    await send({
+                        'type': 'http.response.start',
+                        'status': int(status.split(' ', 1)[0]),
+                        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                    for name, value in headers],
+                    })
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': bytes(payload[0]), 'more_body': True})
+                elif kind == 'error':
+                    raise payload[0]
+                else:
+                    break
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            abandoned = True
+            # Unblock a worker waiting to hand over another chunk
+            while not queue.empty():
+                queue.get_nowait()
+
+    @staticmethod
+    async def _send_simple(send, status, headers, body, extra_headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in list(headers) + list(extra_headers)],
+        })
+        await send({'type': 'http.response.body', 'body': body, 'more_body': False})
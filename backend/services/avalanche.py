@@ -0,0 +1,153 @@
+import random
+import statistics
+import time
+from itertools import islice
+
+
+def count_bit_differences(original, modified):
+    """
+    Count differing bits between two byte strings, comparing up to the shorter length
+
+    XORs the two buffers as big integers and uses int.bit_count, so the work
+    happens in C rather than one Python step per byte.
+
+    Args:
+        original (bytes): First buffer
+        modified (bytes): Second buffer
+
+    Returns:
+        int: Number of differing bits
+    """
+    length = min(len(original), len(modified))
+    if not length:
+        return 0
+    return (
+        int.from_bytes(original[:length], 'big') ^ int.from_bytes(modified[:length], 'big')
+    ).bit_count()
+
+
+def chunk_bit_differences(original_blocks, modified_blocks):
+    """
+    Per-block bit differences between two ciphertexts
+
+    Args:
+        original_blocks (list[bytes]): Raw RSA blocks of the first ciphertext
+        modified_blocks (list[bytes]): Raw RSA blocks of the second ciphertext
+
+    Returns:
+        list[dict]: diff_bits, total_bits and percent for each pair of blocks
+    """
+    result = []
+    for original, modified in zip(original_blocks, modified_blocks):
+        diff_bits = count_bit_differences(original, modified)
+        total_bits = len(original) * 8
+        result.append({
+            'diff_bits': diff_bits,
+            'total_bits': total_bits,
+            'percent': round(diff_bits / total_bits * 100, 2),
+        })
+    return result
+
+
+def _segment_percents(xor, block_bits, columns):
+    # Fraction of changed bits in each of `columns` equal slices of the block, most significant first
+    width = block_bits // columns
+    mask = (1 << width) - 1
+    return [
+        ((xor >> (block_bits - (column + 1) * width)) & mask).bit_count() / width * 100
+        for column in range(columns)
+    ]
+
+
+def strict_avalanche_sweep(plaintext_bytes, chunk_size, encrypt_block, samples=None,
+                           max_flips=4096, max_seconds=5.0, histogram_bins=10, matrix_columns=16,
+                           batch_size=64, seed=None):
+    """
+    Flip input bits one at a time and measure how much of the ciphertext changes
+
+    Each flip only re-encrypts the chunk containing the flipped bit and compares
+    it with that chunk's baseline block. Baselines are encrypted on first use,
+    inside the budgeted loop, so chunks no selected flip touches cost nothing.
+    The run stops at max_flips or once max_seconds have elapsed, whichever
+    comes first.
+
+    Args:
+        plaintext_bytes (bytes): Message to perturb
+        chunk_size (int): Plaintext bytes per RSA block
+        encrypt_block (callable): Encrypts one chunk and returns the raw block
+        samples (int, optional): Flip a random sample of this many bits instead of every bit
+        max_flips (int): Work budget in flips
+        max_seconds (float): Time budget
+        histogram_bins (int): Number of equal-width bins over 0-100%
+        matrix_columns (int): Number of ciphertext slices in the position matrix
+        batch_size (int): Flips between time budget checks
+        seed (int, optional): Seed for the random sample
+
+    Returns:
+        dict: Summary statistics, histogram and an 8 x matrix_columns matrix giving, for
+            each bit position within a byte (0 = most significant), the mean percentage
+            of changed bits in each slice of the ciphertext block
+    """
+    input_bits = len(plaintext_bytes) * 8
+    if not input_bits:
+        raise ValueError("Plaintext is required")
+
+    started = time.monotonic()
+    deadline = started + max_seconds
+    chunks = [plaintext_bytes[i:i + chunk_size] for i in range(0, len(plaintext_bytes), chunk_size)]
+    baseline = {}
+
+    if samples is not None and samples < input_bits:
+        positions = sorted(random.Random(seed).sample(range(input_bits), max(0, samples)))
+    else:
+        positions = range(input_bits)
+    requested = min(len(positions), max(0, max_flips))
+    positions = iter(positions[:requested])
+
+    def flip(position):
+        byte_index, bit = divmod(position, 8)
+        chunk_index, offset = divmod(byte_index, chunk_size)
+        if chunk_index not in baseline:
+            baseline[chunk_index] = int.from_bytes(encrypt_block(chunks[chunk_index]), 'big')
+        chunk = bytearray(chunks[chunk_index])
+        chunk[offset] ^= 0x80 >> bit
+        block = encrypt_block(bytes(chunk))
+        return bit, len(block) * 8, baseline[chunk_index] ^ int.from_bytes(block, 'big')
+
+    percents = []
+    matrix_sums = [[0.0] * matrix_columns for _ in range(8)]
+    matrix_counts = [0] * 8
+
+    while time.monotonic() < deadline:
+        batch = list(islice(positions, batch_size))
+        if not batch:
+            break
+        for bit, block_bits, xor in map(flip, batch):
+            percents.append(xor.bit_count() / block_bits * 100)
+            matrix_counts[bit] += 1
+            for column, value in enumerate(_segment_percents(xor, block_bits, matrix_columns)):
+                matrix_sums[bit][column] += value
+
+    counts = [0] * histogram_bins
+    for percent in percents:
+        counts[min(int(percent / 100 * histogram_bins), histogram_bins - 1)] += 1
+
+    return {
+        'input_bits': input_bits,
+        'requested_flips': requested,
+        'completed_flips': len(percents),
+        'truncated': len(percents) < requested,
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+        'mean_percent': round(statistics.fmean(percents), 2) if percents else None,
+        'stddev_percent': round(statistics.pstdev(percents), 2) if percents else None,
+        'min_percent': round(min(percents), 2) if percents else None,
+        'max_percent': round(max(percents), 2) if percents else None,
+        'histogram': {
+            'bin_edges': [round(i * 100 / histogram_bins, 2) for i in range(histogram_bins + 1)],
+            'counts': counts,
+        },
+        'position_matrix': [
+            [round(total / matrix_counts[bit], 2) if matrix_counts[bit] else None for total in row]
+            for bit, row in enumerate(matrix_sums)
+        ],
+    }
@@ -0,0 +1,115 @@
+import base64
+import struct
+
+
+# Header: magic, format version, flags, key fingerprint, modulus size in bytes, chunk count
+MAGIC = b'RC'
+VERSION = 1
+HEADER = struct.Struct('>2sBB8sHI')
+FINGERPRINT_SIZE = 8
+
+# Flags
+FLAG_ENVELOPE = 0x01
+
+# Text form for JSON transport. ':' never appears in base64 or base64url, so the
+# prefix cannot collide with a legacy '|'-joined ciphertext.
+CONTAINER_PREFIX = 'bin1:'
+
+_NONCE_SIZE = 12
+_TAG_SIZE = 16
+
+
+class CiphertextFormatError(ValueError):
+    """
+    Raised when a container is malformed or does not match the key
+    """
+
+
+def pack(blocks, modulus_bytes, key_fingerprint, envelope_body=None):
+    """
+    Build a binary container from raw RSA blocks
+
+    Args:
+        blocks (list[bytes]): RSA ciphertext blocks, each exactly modulus_bytes long
+        modulus_bytes (int): Size of the RSA modulus in bytes
+        key_fingerprint (bytes): Public key fingerprint, truncated to FINGERPRINT_SIZE
+        envelope_body (bytes, optional): AES-GCM nonce and ciphertext following a single wrapped key
+
+    Returns:
+        bytes: Header followed by the blocks (and the envelope body, if any)
+    """
+    flags = FLAG_ENVELOPE if envelope_body is not None else 0
+    header = HEADER.pack(
+        MAGIC, VERSION, flags, key_fingerprint[:FINGERPRINT_SIZE], modulus_bytes, len(blocks)
+    )
+    return header + b''.join(blocks) + (envelope_body or b'')
+
+
+def unpack(data, modulus_bytes=None, key_fingerprint=None):
+    """
+    Validate a binary container and split it into blocks, without any RSA work
+
+    Args:
+        data (bytes): Container produced by pack()
+        modulus_bytes (int, optional): Expected modulus size of the decrypting key
+        key_fingerprint (bytes, optional): Expected fingerprint of the decrypting key
+
+    Returns:
+        tuple: (blocks, envelope_body) where envelope_body is None for chunked containers
+    """
+    if len(data) < HEADER.size:
+        raise CiphertextFormatError("Container too short")
+
+    magic, version, flags, fingerprint, size, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise CiphertextFormatError("Not a ciphertext container")
+    if version != VERSION:
+        raise CiphertextFormatError(f"Unsupported container version {version}")
+    if modulus_bytes is not None and size != modulus_bytes:
+        raise CiphertextFormatError("Container was made for a different key size")
+    if key_fingerprint is not None and fingerprint != key_fingerprint[:FINGERPRINT_SIZE]:
+        raise CiphertextFormatError("Container was made for a different key")
+    if count < 1 or size < 1:
+        raise CiphertextFormatError("Container has no blocks")
+
+    payload = memoryview(data)[HEADER.size:]
+    blocks_length = size * count
+
+    if flags & FLAG_ENVELOPE:
+        if count != 1 or len(payload) < blocks_length + _NONCE_SIZE + _TAG_SIZE:
+            raise CiphertextFormatError("Bad envelope length")
+        envelope_body = bytes(payload[blocks_length:])
+    else:
+        if len(payload) != blocks_length:
+            raise CiphertextFormatError("Bad container length")
+        envelope_body = None
+
+    blocks = [bytes(payload[i:i + size]) for i in range(0, blocks_length, size)]
+    return blocks, envelope_body
+
+
+def to_text(data):
+    """
+    Encode a container as a single unpadded base64url string for JSON transport
+    """
+    return CONTAINER_PREFIX + base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def from_text(text):
+    """
+    Decode the text form produced by to_text()
+    """
+    encoded = text[len(CONTAINER_PREFIX):]
+    try:
+        return base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+    except Exception:
+        raise CiphertextFormatError("Bad container encoding")
+
+
+def is_container(value):
+    """
+    Whether a ciphertext is a container, either raw bytes or its text form
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value[:len(MAGIC)]) == MAGIC
+    return value.startswith(CONTAINER_PREFIX)
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import os
+import struct
+import zlib
+from services import ciphertext_format
+from services.crypto_engine import ENVELOPE_PREFIX
+
+
+# First byte of a stored value: how the ciphertext text was packed
+TAG_TEXT = 0x00       # UTF-8 text, kept as is
+TAG_CHUNKED = 0x01    # Legacy '|'-joined base64 blocks: block size, then the raw blocks
+TAG_ENVELOPE = 0x02   # 'env1:' envelope: the decoded bytes
+TAG_CONTAINER = 0x03  # 'bin1:' container: the decoded bytes
+FLAG_ZLIB = 0x80      # The rest of the value is zlib-compressed
+
+_BLOCK_SIZE = struct.Struct('>H')
+
+# Compress stored values when it makes them smaller (SAVED_CIPHERTEXT_COMPRESSION=0 disables)
+COMPRESSION_ENABLED = os.environ.get('SAVED_CIPHERTEXT_COMPRESSION', '1') != '0'
+
+
+def _pack_chunked(text):
+    blocks = [base64.b64decode(part, validate=True) for part in text.split('|')]
+    size = len(blocks[0])
+    if not 0 < size <= 0xFFFF or any(len(block) != size for block in blocks):
+        raise ValueError("Blocks differ in size")
+    return _BLOCK_SIZE.pack(size) + b''.join(blocks)
+
+
+def _unpack_chunked(payload):
+    (size,) = _BLOCK_SIZE.unpack_from(payload)
+    blocks = payload[_BLOCK_SIZE.size:]
+    return '|'.join(
+        base64.b64encode(blocks[i:i + size]).decode('ascii') for i in range(0, len(blocks), size)
+    )
+
+
+def _pack(text):
+    if ciphertext_format.is_container(text):
+        return TAG_CONTAINER, ciphertext_format.from_text(text)
+    if text.startswith(ENVELOPE_PREFIX):
+        return TAG_ENVELOPE, base64.b64decode(text[len(ENVELOPE_PREFIX):], validate=True)
+    return TAG_CHUNKED, _pack_chunked(text)
+
+
+def encode(text, compress=None):
+    """
+    Pack a ciphertext string into the bytes stored in the database
+
+    Base64 framing is removed wherever decode() gives back exactly the same
+    string; anything else (including text that only looks like a ciphertext)
+    is stored as UTF-8.
+
+    Args:
+        text (str): Ciphertext as clients send it
+        compress (bool, optional): Try zlib, defaults to COMPRESSION_ENABLED
+
+    Returns:
+        bytes: Stored value
+    """
+    try:
+        tag, payload = _pack(text)
+        if decode(bytes([tag]) + payload) != text:
+            raise ValueError("Not canonical")
+    except (ValueError, binascii.Error, struct.error):
+        tag, payload = TAG_TEXT, text.encode('utf-8')
+
+    if compress if compress is not None else COMPRESSION_ENABLED:
+        compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            tag, payload = tag | FLAG_ZLIB, compressed
+
+    return bytes([tag]) + payload
+
+
+def decode(value):
+    """
+    Rebuild the ciphertext string from a stored value
+
+    Args:
+        value (bytes): Value produced by encode()
+
+    Returns:
+        str: Ciphertext exactly as it was saved
+    """
+    tag, payload = value[0], bytes(value[1:])
+    if tag & FLAG_ZLIB:
+        tag, payload = tag & ~FLAG_ZLIB, zlib.decompress(payload)
+
+    if tag == TAG_TEXT:
+        return payload.decode('utf-8')
+    if tag == TAG_CHUNKED:
+        return _unpack_chunked(payload)
+    if tag == TAG_ENVELOPE:
+        return ENVELOPE_PREFIX + base64.b64encode(payload).decode('ascii')
+    if tag == TAG_CONTAINER:
+        return ciphertext_format.to_text(payload)
+    raise ValueError(f"Unknown stored ciphertext tag {tag}")
@@ -0,0 +1,681 @@
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import repeat
+from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from services.key_cache import KeyCache
+from services import ciphertext_format
+from services.avalanche import chunk_bit_differences, strict_avalanche_sweep
+from services.metrics import rsa_phase_seconds
+
+
+SUPPORTED_KEY_SIZES = (1024, 2048)
+
+# 'chunked': one RSA-OAEP block per chunk, joined with '|' (the original format)
+# 'envelope': a random AES-256-GCM key wrapped once with RSA-OAEP, body encrypted with AES-GCM
+ENCRYPTION_MODES = ('chunked', 'envelope')
+
+# ':' never appears in base64, so the prefix cannot collide with a chunked ciphertext
+ENVELOPE_PREFIX = 'env1:'
+_ENVELOPE_AAD = b'rsa-455 envelope v1'
+_NONCE_SIZE = 12
+
+# 'legacy': the '|'-joined base64 (or 'env1:') strings
+# 'container': binary container as one base64url string, 'bytes': the raw container
+CIPHERTEXT_OUTPUTS = ('legacy', 'container', 'bytes')
+
+# Opt-in: chunked messages with at least RSA_PARALLEL_THRESHOLD chunks are split across worker
+# processes (RSA holds the GIL, so threads would not help)
+RSA_PARALLEL_CHUNKS = os.environ.get('RSA_PARALLEL_CHUNKS') == '1'
+RSA_PARALLEL_THRESHOLD = int(os.environ.get('RSA_PARALLEL_THRESHOLD', 64))
+RSA_PARALLEL_WORKERS = int(os.environ.get('RSA_PARALLEL_WORKERS', os.cpu_count() or 1))
+# Parsed keys each worker process keeps, by public key fingerprint
+WORKER_KEY_CACHE_SIZE = 16
+
+_chunk_pool = None
+_chunk_pool_lock = threading.Lock()
+_worker_keys = OrderedDict()
+
+# Parsed keys shared by every engine in the process
+key_cache = KeyCache(
+    max_size=int(os.environ.get('RSA_KEY_CACHE_SIZE', 128)),
+    ttl_seconds=float(os.environ.get('RSA_KEY_CACHE_TTL', 3600))
+)
+
+
+def _parse_public_key(pem):
+    return serialization.load_pem_public_key(pem.encode('utf-8'))
+
+
+def _parse_private_key(pem):
+    return serialization.load_pem_private_key(pem.encode('utf-8'), password=None)
+
+
+def _oaep():
+    return padding.OAEP(
+        mgf=padding.MGF1(algorithm=hashes.SHA256()),
+        algorithm=hashes.SHA256(),
+        label=None
+    )
+
+
+def _worker_key(kind, fingerprint, der):
+    """
+    Parsed key for a chunk task, parsed once per worker process and then reused
+    """
+    cache_key = (kind, fingerprint)
+    key = _worker_keys.get(cache_key)
+    if key is not None:
+        _worker_keys.move_to_end(cache_key)
+        return key
+
+    if kind == 'private':
+        key = serialization.load_der_private_key(der, password=None)
+    else:
+        key = serialization.load_der_public_key(der)
+    _worker_keys[cache_key] = key
+    while len(_worker_keys) > WORKER_KEY_CACHE_SIZE:
+        _worker_keys.popitem(last=False)
+    return key
+
+
+def _rsa_chunk_task(kind, fingerprint, der, blocks):
+    """
+    Runs in a worker process: encrypt ('public') or decrypt ('private') a run of blocks in order
+    """
+    key = _worker_key(kind, fingerprint, der)
+    operation = key.decrypt if kind == 'private' else key.encrypt
+    return [operation(block, _oaep()) for block in blocks]
+
+
+def _get_chunk_pool():
+    global _chunk_pool
+    if _chunk_pool is None:
+        with _chunk_pool_lock:
+            if _chunk_pool is None:
+                # Same reasoning as the PDF pool: never fork a threaded server
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                _chunk_pool = ProcessPoolExecutor(max_workers=RSA_PARALLEL_WORKERS,
+                                                  mp_context=multiprocessing.get_context(method))
+    return _chunk_pool
+
+
+def shutdown_chunk_pool():
+    """
+    Stop the parallel chunk process pool, if one was started
+    """
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is not None:
+            _chunk_pool.shutdown(wait=True, cancel_futures=True)
+            _chunk_pool = None
+
+
+def max_chunk_size(key_size):
+    """
+    Largest plaintext chunk RSA-OAEP with SHA-256 can encrypt for a key size
+
+    Args:
+        key_size (int): Size of the modulus in bits
+
+    Returns:
+        int: Chunk size in bytes (190 for 2048-bit keys, 62 for 1024-bit keys)
+    """
+    return key_size // 8 - 2 * hashes.SHA256.digest_size - 2
+
+
+@dataclass(frozen=True)
+class KeyHandle:
+    """
+    Immutable reference to a parsed RSA key that can be shared between threads
+    """
+    fingerprint: str
+    key_size: int
+    public_key: object
+    private_key: object = None
+
+    @property
+    def can_decrypt(self):
+        return self.private_key is not None
+
+    @cached_property
+    def public_der(self):
+        return self.public_key.public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+    @cached_property
+    def private_der(self):
+        """
+        PKCS#8 DER of the private key, handed to chunk worker processes
+        """
+        return self.private_key.private_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+
+    @cached_property
+    def public_fingerprint(self):
+        """
+        SHA-256 of the DER encoded public key, independent of how the PEM was formatted
+        """
+        return hashlib.sha256(self.public_der).digest()
+
+
+class RSAEngine:
+    """
+    Stateless RSA operations. Keys are passed to every call, either as PEM
+    strings or as KeyHandle objects, so one engine can serve many threads.
+    """
+
+    def __init__(self, cache=None, parallel=None, parallel_threshold=None):
+        """
+        Args:
+            cache (KeyCache, optional): Parsed key cache, defaults to the process-wide one
+            parallel (bool, optional): Spread chunks of large chunked messages across worker
+                processes; defaults to RSA_PARALLEL_CHUNKS
+            parallel_threshold (int, optional): Fewest chunks worth sending to the workers
+        """
+        self.key_cache = cache if cache is not None else key_cache
+        self.parallel = RSA_PARALLEL_CHUNKS if parallel is None else parallel
+        self.parallel_threshold = parallel_threshold or RSA_PARALLEL_THRESHOLD
+
+    def _rsa_map(self, kind, handle, blocks, parallel=None):
+        """
+        Encrypt ('public') or decrypt ('private') blocks in order, on the worker processes
+        when parallel mode is on and the message has enough chunks to pay for the hand-off
+        """
+        use_pool = self.parallel if parallel is None else parallel
+        if not use_pool or len(blocks) < self.parallel_threshold:
+            key = handle.private_key if kind == 'private' else handle.public_key
+            operation = key.decrypt if kind == 'private' else key.encrypt
+            return [operation(block, _oaep()) for block in blocks]
+
+        # One contiguous run of blocks per worker; map() returns the runs in submission order
+        per_task = -(-len(blocks) // RSA_PARALLEL_WORKERS)
+        runs = [blocks[i:i + per_task] for i in range(0, len(blocks), per_task)]
+        der = handle.private_der if kind == 'private' else handle.public_der
+        results = _get_chunk_pool().map(
+            _rsa_chunk_task, repeat(kind), repeat(handle.public_fingerprint), repeat(der), runs
+        )
+        return [block for run in results for block in run]
+
+    def public_handle(self, public_key_pem):
+        """
+        Parse (or fetch from the cache) a public key
+
+        Args:
+            public_key_pem (str): Public key in PEM format
+
+        Returns:
+            KeyHandle: Handle without a private key
+        """
+        try:
+            with rsa_phase_seconds.time('parse'):
+                public_key = self.key_cache.get_or_load(public_key_pem, _parse_public_key, kind='public')
+        except Exception:
+            raise Exception("Bad Public Key")
+
+        return KeyHandle(
+            fingerprint=KeyCache.fingerprint(public_key_pem, 'public'),
+            key_size=public_key.key_size,
+            public_key=public_key
+        )
+
+    def private_handle(self, private_key_pem):
+        """
+        Parse (or fetch from the cache) a private key
+
+        Args:
+            private_key_pem (str): Private key in PEM format
+
+        Returns:
+            KeyHandle: Handle able to both encrypt and decrypt
+        """
+        try:
+            with rsa_phase_seconds.time('parse'):
+                private_key = self.key_cache.get_or_load(private_key_pem, _parse_private_key, kind='private')
+        except Exception:
+            raise Exception("Bad Private Key")
+
+        return KeyHandle(
+            fingerprint=KeyCache.fingerprint(private_key_pem, 'private'),
+            key_size=private_key.key_size,
+            public_key=private_key.public_key(),
+            private_key=private_key
+        )
+
+    def generate_handle(self, key_size=2048):
+        """
+        Generate a new RSA key pair
+
+        Args:
+            key_size (int): Size of the key in bits (1024 or 2048)
+
+        Returns:
+            KeyHandle: Handle holding the new private key
+        """
+        if key_size not in SUPPORTED_KEY_SIZES:
+            raise ValueError("Key size must be either 1024 or 2048 bits")
+
+        private_key = rsa.generate_private_key(
+            public_exponent=65537,
+            key_size=key_size
+        )
+        return KeyHandle(
+            fingerprint=None,
+            key_size=key_size,
+            public_key=private_key.public_key(),
+            private_key=private_key
+        )
+
+    @staticmethod
+    def export_key_pair(handle):
+        """
+        Serialize a private key handle to PEM
+
+        Args:
+            handle (KeyHandle): Handle holding a private key
+
+        Returns:
+            dict: Dictionary containing the encoded public and private keys
+        """
+        private_pem = handle.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        ).decode('utf-8')
+
+        return {
+            'private_key': private_pem,
+            'public_key': RSAEngine.export_public_key(handle),
+            'key_size': handle.key_size
+        }
+
+    @staticmethod
+    def export_public_key(handle):
+        """
+        Serialize the public half of a key handle to PEM
+
+        Args:
+            handle (KeyHandle): Any key handle
+
+        Returns:
+            str: Public key in PEM format
+        """
+        return handle.public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode('utf-8')
+
+    def generate_key_pair(self, key_size=2048):
+        """
+        Generate a new RSA key pair with the specified key size
+
+        Args:
+            key_size (int): Size of the key in bits (1024 or 2048)
+
+        Returns:
+            dict: Dictionary containing the encoded public and private keys
+        """
+        return self.export_key_pair(self.generate_handle(key_size))
+
+    def _public(self, key):
+        if isinstance(key, KeyHandle):
+            return key
+        if not key:
+            raise ValueError("Public key is not available")
+        return self.public_handle(key)
+
+    def _private(self, key):
+        if isinstance(key, KeyHandle):
+            if not key.can_decrypt:
+                raise ValueError("Private key is not available")
+            return key
+        if not key:
+            raise ValueError("Private key is not available")
+        return self.private_handle(key)
+
+    def encrypt(self, plaintext, public_key, mode='chunked', output='legacy', parallel=None):
+        """
+        Encrypt a message using RSA public key
+
+        Args:
+            plaintext (str): The message to encrypt
+            public_key (str | KeyHandle): Public key in PEM format or a key handle
+            mode (str): 'chunked' or 'envelope'
+            output (str): 'legacy', 'container' (base64url text) or 'bytes' (raw container)
+            parallel (bool, optional): Override the engine's parallel chunk setting
+
+        Returns:
+            str | bytes: For 'legacy', base64 encoded chunks separated by '|' or an
+                envelope string starting with ENVELOPE_PREFIX; otherwise a binary container
+        """
+        if mode not in ENCRYPTION_MODES:
+            raise ValueError("Mode must be either 'chunked' or 'envelope'")
+        if output not in CIPHERTEXT_OUTPUTS:
+            raise ValueError("Output must be one of 'legacy', 'container' or 'bytes'")
+
+        handle = self._public(public_key)
+        plaintext_bytes = plaintext.encode('utf-8')
+
+        if mode == 'envelope':
+            wrapped_key, body = self._encrypt_envelope(plaintext_bytes, handle)
+            with rsa_phase_seconds.time('base64_encode'):
+                if output == 'legacy':
+                    # The wrapped key is always one modulus long, so no separator is needed
+                    return ENVELOPE_PREFIX + base64.b64encode(wrapped_key + body).decode('utf-8')
+                container = ciphertext_format.pack(
+                    [wrapped_key], handle.key_size // 8, handle.public_fingerprint, envelope_body=body
+                )
+        else:
+            blocks = self._encrypt_blocks(plaintext_bytes, handle, parallel)
+            with rsa_phase_seconds.time('base64_encode'):
+                if output == 'legacy':
+                    # Join encrypted chunks with '|' delimiter
+                    return '|'.join(base64.b64encode(block).decode('utf-8') for block in blocks)
+                container = ciphertext_format.pack(blocks, handle.key_size // 8, handle.public_fingerprint)
+
+        if output == 'bytes':
+            return container
+        with rsa_phase_seconds.time('base64_encode'):
+            return ciphertext_format.to_text(container)
+
+    def _encrypt_blocks(self, plaintext_bytes, handle, parallel=None):
+        """
+        Encrypt plaintext bytes chunk by chunk into raw RSA blocks
+        """
+        chunk_size = max_chunk_size(handle.key_size)
+        with rsa_phase_seconds.time('chunk'):
+            chunks = [
+                plaintext_bytes[i:i + chunk_size]
+                for i in range(0, len(plaintext_bytes), chunk_size)
+            ]
+
+        with rsa_phase_seconds.time('rsa_encrypt'):
+            return self._rsa_map('public', handle, chunks, parallel)
+
+    def decrypt(self, ciphertext, private_key, parallel=None):
+        """
+        Decrypt a message using RSA private key
+
+        Args:
+            ciphertext (str | bytes): Base64 encoded chunks separated by '|', an envelope
+                string, or a binary container (raw bytes or its base64url text form)
+            private_key (str | KeyHandle): Private key in PEM format or a key handle
+            parallel (bool, optional): Override the engine's parallel chunk setting
+
+        Returns:
+            str: Decrypted message
+        """
+        handle = self._private(private_key)
+        modulus_bytes = handle.key_size // 8
+
+        # Every format is split and length-checked before any RSA operation
+        try:
+            with rsa_phase_seconds.time('base64_decode'):
+                if ciphertext_format.is_container(ciphertext):
+                    raw = ciphertext_format.from_text(ciphertext) if isinstance(ciphertext, str) else bytes(ciphertext)
+                    blocks, envelope_body = ciphertext_format.unpack(
+                        raw, modulus_bytes=modulus_bytes, key_fingerprint=handle.public_fingerprint
+                    )
+                elif ciphertext.startswith(ENVELOPE_PREFIX):
+                    raw = base64.b64decode(ciphertext[len(ENVELOPE_PREFIX):], validate=True)
+                    if len(raw) < modulus_bytes + _NONCE_SIZE + 16:
+                        raise ValueError("Envelope too short")
+                    blocks, envelope_body = [raw[:modulus_bytes]], raw[modulus_bytes:]
+                else:
+                    blocks = [base64.b64decode(chunk) for chunk in ciphertext.split('|')]
+                    if any(len(block) != modulus_bytes for block in blocks):
+                        raise ValueError("Bad chunk length")
+                    envelope_body = None
+        except Exception:
+            raise Exception("Invalid Ciphertext")
+
+        try:
+            if envelope_body is not None:
+                plaintext_bytes = self._decrypt_envelope(blocks[0], envelope_body, handle)
+            else:
+                with rsa_phase_seconds.time('rsa_decrypt'):
+                    plaintext_bytes = b''.join(self._rsa_map('private', handle, blocks, parallel))
+        except Exception:
+            raise Exception("Invalid Ciphertext")
+
+        return plaintext_bytes.decode('utf-8')
+
+    @staticmethod
+    def _encrypt_envelope(plaintext_bytes, handle):
+        data_key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(_NONCE_SIZE)
+        with rsa_phase_seconds.time('rsa_encrypt'):
+            wrapped_key = handle.public_key.encrypt(data_key, _oaep())
+        with rsa_phase_seconds.time('aes'):
+            body = AESGCM(data_key).encrypt(nonce, plaintext_bytes, _ENVELOPE_AAD)
+        return wrapped_key, nonce + body
+
+    @staticmethod
+    def _decrypt_envelope(wrapped_key, envelope_body, handle):
+        with rsa_phase_seconds.time('rsa_decrypt'):
+            data_key = handle.private_key.decrypt(wrapped_key, _oaep())
+        nonce, body = envelope_body[:_NONCE_SIZE], envelope_body[_NONCE_SIZE:]
+        with rsa_phase_seconds.time('aes'):
+            return AESGCM(data_key).decrypt(nonce, body, _ENVELOPE_AAD)
+
+    def encrypt_stream(self, pieces, public_key, mode='chunked'):
+        """
+        Encrypt text arriving piece by piece, yielding the legacy string format incrementally
+
+        The key is resolved before the first piece is read, so a bad key fails
+        before any output is produced. Memory use is bounded by one piece plus
+        one RSA chunk, whatever the total size.
+
+        Args:
+            pieces (iterable[str]): Text pieces whose concatenation is the plaintext
+            public_key (str | KeyHandle): Public key in PEM format or a key handle
+            mode (str): 'chunked' or 'envelope'
+
+        Returns:
+            generator: String fragments whose concatenation equals encrypt(''.join(pieces))
+                in the same mode (up to randomness)
+        """
+        if mode not in ENCRYPTION_MODES:
+            raise ValueError("Mode must be either 'chunked' or 'envelope'")
+
+        handle = self._public(public_key)
+        if mode == 'envelope':
+            return self._stream_envelope(pieces, handle)
+        return self._stream_chunked(pieces, handle)
+
+    @staticmethod
+    def _stream_chunked(pieces, handle):
+        chunk_size = max_chunk_size(handle.key_size)
+        buffer = bytearray()
+        separator = ''
+
+        for piece in pieces:
+            buffer += piece.encode('utf-8')
+            while len(buffer) >= chunk_size:
+                block = handle.public_key.encrypt(bytes(buffer[:chunk_size]), _oaep())
+                del buffer[:chunk_size]
+                yield separator + base64.b64encode(block).decode('utf-8')
+                separator = '|'
+
+        if buffer:
+            block = handle.public_key.encrypt(bytes(buffer), _oaep())
+            yield separator + base64.b64encode(block).decode('utf-8')
+
+    @staticmethod
+    def _stream_envelope(pieces, handle):
+        data_key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(_NONCE_SIZE)
+        encryptor = Cipher(algorithms.AES(data_key), modes.GCM(nonce)).encryptor()
+        encryptor.authenticate_additional_data(_ENVELOPE_AAD)
+
+        # base64 works on 3-byte groups; hold back the remainder between pieces
+        pending = bytearray(handle.public_key.encrypt(data_key, _oaep()) + nonce)
+
+        def flush(final=False):
+            cut = len(pending) if final else len(pending) - len(pending) % 3
+            text = base64.b64encode(bytes(pending[:cut])).decode('utf-8')
+            del pending[:cut]
+            return text
+
+        yield ENVELOPE_PREFIX + flush()
+        for piece in pieces:
+            pending.extend(encryptor.update(piece.encode('utf-8')))
+            text = flush()
+            if text:
+                yield text
+
+        pending.extend(encryptor.finalize() + encryptor.tag)
+        yield flush(final=True)
+
+    def encrypt_batch(self, plaintexts, public_key, mode='chunked', output='legacy'):
+        """
+        Encrypt many messages under one public key, parsing the key once
+
+        Args:
+            plaintexts (list[str]): Messages to encrypt
+            public_key (str | KeyHandle): Public key in PEM format or a key handle
+            mode (str): 'chunked' or 'envelope'
+            output (str): 'legacy', 'container' or 'bytes'
+
+        Returns:
+            list[dict]: One {'success', 'ciphertext' | 'error'} result per message, in order
+        """
+        handle = self._public(public_key)
+
+        def encrypt_item(plaintext):
+            try:
+                if not isinstance(plaintext, str):
+                    raise ValueError("Plaintext must be a string")
+                ciphertext = self.encrypt(plaintext, handle, mode=mode, output=output)
+                return {'success': True, 'ciphertext': ciphertext}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+        return [encrypt_item(plaintext) for plaintext in plaintexts]
+
+    def decrypt_batch(self, ciphertexts, private_key):
+        """
+        Decrypt many messages under one private key, parsing the key once
+
+        Args:
+            ciphertexts (list[str | bytes]): Ciphertexts in any supported format
+            private_key (str | KeyHandle): Private key in PEM format or a key handle
+
+        Returns:
+            list[dict]: One {'success', 'plaintext' | 'error'} result per ciphertext, in order
+        """
+        handle = self._private(private_key)
+        return self.decrypt_many([(ciphertext, handle) for ciphertext in ciphertexts])
+
+    def decrypt_many(self, items):
+        """
+        Decrypt many messages that each carry their own private key
+
+        Args:
+            items (list[tuple]): (ciphertext, private key in PEM format or KeyHandle) pairs
+
+        Returns:
+            list[dict]: One {'success', 'plaintext' | 'error'} result per item, in order
+        """
+        def decrypt_item(item):
+            ciphertext, private_key = item
+            try:
+                if not isinstance(ciphertext, (str, bytes)):
+                    raise ValueError("Ciphertext must be a string")
+                handle = self._private(private_key)
+                return {'success': True, 'plaintext': self.decrypt(ciphertext, handle)}
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+
+        return [decrypt_item(item) for item in items]
+
+    def compute_avalanche_effect(self, public_key, plaintext, include_hex=True):
+        """
+        Compare the ciphertexts of a plaintext and the same plaintext with one extra character
+
+        Args:
+            public_key (str | KeyHandle): Public key in PEM format or a key handle
+            plaintext (str): The message to perturb
+            include_hex (bool): Also render both ciphertexts as hex strings
+
+        Returns:
+            dict: Both ciphertexts in base64 (and hex), the percentage of differing
+                bits and a per-chunk breakdown
+        """
+        handle = self._public(public_key)
+        modified_plaintext = 's' + plaintext
+
+        # Work on raw blocks; base64 is only produced for the response
+        original_blocks = self._encrypt_blocks(plaintext.encode('utf-8'), handle)
+        modified_blocks = self._encrypt_blocks(modified_plaintext.encode('utf-8'), handle)
+
+        with rsa_phase_seconds.time('bit_count'):
+            chunks = chunk_bit_differences(original_blocks, modified_blocks)
+        diff_bits = sum(chunk['diff_bits'] for chunk in chunks)
+        total_bits = sum(len(block) for block in original_blocks) * 8
+        avalanche_percent = (diff_bits / total_bits) * 100
+
+        with rsa_phase_seconds.time('base64_encode'):
+            original_ciphertext = '|'.join(base64.b64encode(block).decode('utf-8') for block in original_blocks)
+            modified_ciphertext = '|'.join(base64.b64encode(block).decode('utf-8') for block in modified_blocks)
+
+        result = {
+            "modified_plaintext": modified_plaintext,
+            "original_ciphertext": original_ciphertext,
+            "modified_ciphertext": modified_ciphertext,
+            "avalanche_percent": round(avalanche_percent, 2),
+            "diff_bits": diff_bits,
+            "total_bits": total_bits,
+            "chunks": chunks,
+        }
+
+        if include_hex:
+            result["original_hex"] = b''.join(original_blocks).hex()
+            result["modified_hex"] = b''.join(modified_blocks).hex()
+
+        return result
+
+    def strict_avalanche(self, public_key, plaintext, samples=None, max_flips=4096, max_seconds=5.0, seed=None):
+        """
+        Strict avalanche criterion sweep: flip every input bit (or a random sample)
+        and report how much of the corresponding ciphertext block changes
+
+        Args:
+            public_key (str | KeyHandle): Public key in PEM format or a key handle
+            plaintext (str): The message to perturb
+            samples (int, optional): Number of randomly chosen bits to flip
+            max_flips (int): Work budget in flips
+            max_seconds (float): Time budget
+            seed (int, optional): Seed for the random sample
+
+        Returns:
+            dict: See services.avalanche.strict_avalanche_sweep
+        """
+        handle = self._public(public_key)
+
+        def encrypt_block(chunk):
+            return handle.public_key.encrypt(chunk, _oaep())
+
+        return strict_avalanche_sweep(
+            plaintext.encode('utf-8'),
+            max_chunk_size(handle.key_size),
+            encrypt_block,
+            samples=samples,
+            max_flips=max_flips,
+            max_seconds=max_seconds,
+            seed=seed
+        )
@@ -0,0 +1,222 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+# Read size used while hashing uploads
+HASH_READ_SIZE = 64 * 1024
+
+# Extensions that share one extractor share cache entries
+_KINDS = {'.doc': 'docx', '.docx': 'docx', '.pdf': 'pdf', '.txt': 'txt'}
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of extracted document text.
+
+    Entries are keyed by a SHA-256 of the file type, the extractor settings and
+    the uploaded bytes. A
+    memory tier keeps the most recently used texts up to a byte budget; an
+    optional disk tier keeps more under a directory with its own size cap.
+    """
+
+    def __init__(self, max_memory_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_bytes=512 * 1024 * 1024,
+                 settings=''):
+        """
+        Args:
+            max_memory_bytes (int): Budget for cached text held in memory
+            disk_dir (str, optional): Directory for the disk tier; None disables it
+            max_disk_bytes (int): Budget for the disk tier
+            settings (str): Extractor options that change the text, so entries made under other options miss
+        """
+        self.settings = settings
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.txt'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    @staticmethod
+    def content_key(file, file_ext, settings=''):
+        """
+        Hash an upload without loading it into memory at once, then rewind it
+
+        Args:
+            file: Binary file object positioned at the start of the upload
+            file_ext (str): Lower-case extension including the dot
+            settings (str): Extractor options mixed into the key
+
+        Returns:
+            tuple: (hex digest, upload size in bytes)
+        """
+        digest = hashlib.sha256(f'{_KINDS.get(file_ext, file_ext)}\0{settings}\0'.encode('utf-8'))
+        size = 0
+        while True:
+            block = file.read(HASH_READ_SIZE)
+            if not block:
+                break
+            digest.update(block)
+            size += len(block)
+        file.seek(0)
+        return digest.hexdigest(), size
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.txt')
+
+    def _remember(self, key, text, size):
+        # Caller holds the lock
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = (text, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+            os.utime(self._disk_path(key))
+            return text
+        except OSError:
+            return None
+
+    def _write_disk(self, key, encoded):
+        if len(encoded) > self.max_disk_bytes:
+            return
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encoded)
+            os.replace(tmp, self._disk_path(key))
+        except OSError as e:
+            # A full or read-only disk only loses the disk copy; the text is still returned and kept in memory
+            logger.warning('Could not write extraction cache entry %s: %s', key, e)
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            self._disk_bytes += len(encoded) - self._disk.pop(key, 0)
+            self._disk[key] = len(encoded)
+            evict = []
+            while self._disk_bytes > self.max_disk_bytes:
+                old_key, old_size = self._disk.popitem(last=False)
+                self._disk_bytes -= old_size
+                evict.append(old_key)
+
+        for old_key in evict:
+            try:
+                os.remove(self._disk_path(old_key))
+            except OSError:
+                pass
+
+    def get_or_extract(self, file, file_ext, extract):
+        """
+        Return the cached text for an upload, or extract and cache it
+
+        Args:
+            file: Binary file object positioned at the start of the upload
+            file_ext (str): Lower-case extension including the dot
+            extract (callable): extract(file, file_ext) returning the document text
+
+        Returns:
+            str: Document text
+        """
+        key, upload_size = self.content_key(file, file_ext, self.settings)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.bytes_saved += upload_size
+                return entry[0]
+            on_disk = key in self._disk
+
+        if on_disk:
+            text = self._read_disk(key)
+            if text is not None:
+                with self._lock:
+                    self._disk.move_to_end(key)
+                    self.disk_hits += 1
+                    self.bytes_saved += upload_size
+                    self._remember(key, text, len(text.encode('utf-8')))
+                return text
+
+        # Errors (unsupported type, limits, bad documents) propagate and are never cached
+        text = extract(file, file_ext)
+
+        with self._lock:
+            self.misses += 1
+
+        try:
+            encoded = text.encode('utf-8')
+        except UnicodeError:
+            # Not valid UTF-8; the caller rejects it, so there is nothing worth keeping
+            return text
+
+        with self._lock:
+            self._remember(key, text, len(encoded))
+
+        if self.disk_dir:
+            self._write_disk(key, encoded)
+
+        return text
+
+    def stats(self):
+        """
+        Snapshot of the cache counters
+
+        Returns:
+            dict: Hits per tier, misses, hit ratio, upload bytes not re-parsed and tier sizes
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'disk_enabled': bool(self.disk_dir),
+            }
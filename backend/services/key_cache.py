@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class KeyCache:
+    """
+    Bounded, thread-safe LRU cache of parsed RSA key objects keyed by a digest of the PEM
+    """
+
+    def __init__(self, max_size=128, ttl_seconds=3600):
+        """
+        Args:
+            max_size (int): Maximum number of parsed keys to keep
+            ttl_seconds (float): Seconds an entry stays valid after it was parsed (0 disables expiry)
+        """
+        if max_size < 1:
+            raise ValueError("Key cache size must be at least 1")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(pem, kind='public'):
+        """
+        Compute the cache key for a PEM string
+
+        Args:
+            pem (str): Key in PEM format
+            kind (str): 'public' or 'private', so the same text never maps to both slots
+
+        Returns:
+            str: Hex encoded SHA-256 digest
+        """
+        digest = hashlib.sha256(kind.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(pem.strip().encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_or_load(self, pem, loader, kind='public'):
+        """
+        Return the parsed key for a PEM string, parsing it with loader on a miss
+
+        Args:
+            pem (str): Key in PEM format
+            loader (callable): Function taking the PEM string and returning the parsed key
+            kind (str): 'public' or 'private'
+
+        Returns:
+            The parsed key object
+        """
+        fingerprint = self.fingerprint(pem, kind)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                key, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(fingerprint)
+                    self.hits += 1
+                    return key
+                del self._entries[fingerprint]
+            self.misses += 1
+
+        # Parse outside the lock so a slow miss does not block hits on other keys.
+        # Failures propagate and are never cached.
+        key = loader(pem)
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+
+        with self._lock:
+            self._entries[fingerprint] = (key, expires_at)
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return key
+
+    def clear(self):
+        """
+        Drop every cached key and reset the counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Snapshot of the cache counters
+
+        Returns:
+            dict: Size, capacity, TTL, hit/miss/eviction counts and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import deque
+from services.crypto_engine import SUPPORTED_KEY_SIZES
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds the refill thread waits after a failed key generation before trying again
+REFILL_RETRY_SECONDS = 1.0
+
+
+class KeyPairPool:
+    """
+    Keeps freshly generated key pairs ready so requests do not wait on key generation.
+    A background thread tops each size back up to the configured depth. It starts
+    with the first get() rather than at import, so a server that forks workers
+    after loading the app gets a refill thread in each worker.
+    """
+
+    def __init__(self, engine, depth=4, key_sizes=SUPPORTED_KEY_SIZES):
+        """
+        Args:
+            engine (RSAEngine): Engine used to generate key pairs
+            depth (int): Number of ready key pairs to keep per key size
+            key_sizes (tuple): Key sizes to pre-generate
+        """
+        self.engine = engine
+        self.depth = depth
+        self._pools = {key_size: deque() for key_size in key_sizes}
+        self._stats = {
+            key_size: {'hits': 0, 'misses': 0, 'generated': 0, 'failures': 0, 'generate_seconds': 0.0}
+            for key_size in key_sizes
+        }
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        """
+        Start the background refill thread
+        """
+        with self._cond:
+            self._stopped = False
+            self._start_locked()
+
+    def _start_locked(self):
+        if self._thread is not None or self._stopped or self.depth < 1:
+            return
+        self._thread = threading.Thread(target=self._refill_loop, name='key-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background refill thread
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def get(self, key_size):
+        """
+        Take a ready key pair, generating one inline only if the pool is empty
+
+        Args:
+            key_size (int): Size of the key in bits
+
+        Returns:
+            KeyHandle: Handle holding a private key that no other caller has received
+        """
+        with self._cond:
+            self._start_locked()
+            pool = self._pools.get(key_size)
+            if pool:
+                self._stats[key_size]['hits'] += 1
+                self._cond.notify_all()
+                return pool.popleft()
+            if pool is not None:
+                self._stats[key_size]['misses'] += 1
+                self._cond.notify_all()
+
+        return self.engine.generate_handle(key_size)
+
+    def _next_size(self):
+        # Refill the emptiest pool first so one size cannot starve the other
+        candidates = [
+            (len(pool), key_size) for key_size, pool in self._pools.items()
+            if len(pool) < self.depth
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def _refill_loop(self):
+        while True:
+            with self._cond:
+                key_size = self._next_size()
+                while key_size is None and not self._stopped:
+                    self._cond.wait()
+                    key_size = self._next_size()
+                if self._stopped:
+                    return
+
+            # Generate outside the lock so get() is never blocked behind it
+            start = time.perf_counter()
+            try:
+                handle = self.engine.generate_handle(key_size)
+            except Exception:
+                # get() still generates inline, so a failure only costs latency; keep the thread alive
+                logger.exception('Key pool could not generate a %d-bit key pair', key_size)
+                with self._cond:
+                    self._stats[key_size]['failures'] += 1
+                    self._cond.wait_for(lambda: self._stopped, timeout=REFILL_RETRY_SECONDS)
+                continue
+            elapsed = time.perf_counter() - start
+
+            with self._cond:
+                self._pools[key_size].append(handle)
+                self._stats[key_size]['generated'] += 1
+                self._stats[key_size]['generate_seconds'] += elapsed
+
+    def stats(self):
+        """
+        Snapshot of pool depth and refill rate per key size
+
+        Returns:
+            dict: Per key size depth, target, hits, misses, failures and refill rate
+        """
+        with self._cond:
+            result = {}
+            for key_size, pool in self._pools.items():
+                counters = self._stats[key_size]
+                seconds = counters['generate_seconds']
+                result[str(key_size)] = {
+                    'depth': len(pool),
+                    'target_depth': self.depth,
+                    'hits': counters['hits'],
+                    'misses': counters['misses'],
+                    'generated': counters['generated'],
+                    'failures': counters['failures'],
+                    'refill_keys_per_second': round(counters['generated'] / seconds, 2) if seconds else 0.0,
+                }
+            return {
+                'running': self._thread is not None,
+                'sizes': result
+            }
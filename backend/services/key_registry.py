@@ -0,0 +1,87 @@
+import os
+from services.key_cache import KeyCache
+
+
+class UnknownKey(LookupError):
+    """
+    Raised when a key ID is not registered (or not visible to the caller)
+    """
+
+
+class KeyRegistry:
+    """
+    Resolves key IDs to parsed KeyHandles held in memory.
+
+    A key ID is the hex SHA-256 fingerprint of the DER public key, so it names one
+    key no matter how its PEM was formatted. Misses are loaded through a callback
+    (normally a database lookup) and parsed once; registered keys never change, so
+    entries only leave the cache through LRU eviction or expiry.
+    """
+
+    def __init__(self, engine, max_size=None, ttl_seconds=None):
+        """
+        Args:
+            engine (RSAEngine): Engine used to parse loaded PEMs
+            max_size (int, optional): Number of handles to keep, defaults to KEY_REGISTRY_SIZE or 256
+            ttl_seconds (float, optional): Lifetime of a handle, defaults to KEY_REGISTRY_TTL or 3600
+        """
+        self.engine = engine
+        self._handles = KeyCache(
+            max_size=max_size or int(os.environ.get('KEY_REGISTRY_SIZE', 256)),
+            ttl_seconds=ttl_seconds if ttl_seconds is not None else float(os.environ.get('KEY_REGISTRY_TTL', 3600))
+        )
+
+    @staticmethod
+    def key_id(handle):
+        """
+        Key ID of a handle
+
+        Args:
+            handle (KeyHandle): Any key handle
+
+        Returns:
+            str: Hex encoded SHA-256 of the DER public key
+        """
+        return handle.public_fingerprint.hex()
+
+    def _resolve(self, slot, kind, load_pem, to_handle):
+        def load(_):
+            pem = load_pem()
+            if not pem:
+                raise UnknownKey("Key not found")
+            return to_handle(pem)
+
+        return self._handles.get_or_load(slot, load, kind=kind)
+
+    def public(self, key_id, load_pem):
+        """
+        Public key handle for a key ID
+
+        Args:
+            key_id (str): Key ID
+            load_pem (callable): Returns the public key PEM, or None if the ID is unknown
+
+        Returns:
+            KeyHandle: Handle without a private key
+        """
+        return self._resolve(key_id, 'public', load_pem, self.engine.public_handle)
+
+    def private(self, key_id, owner, load_pem):
+        """
+        Private key handle for a key ID, cached per owner so one user never gets another's entry
+
+        Args:
+            key_id (str): Key ID
+            owner (str): User the key belongs to
+            load_pem (callable): Returns the owner's private key PEM, or None if there is none
+
+        Returns:
+            KeyHandle: Handle able to both encrypt and decrypt
+        """
+        return self._resolve(f'{owner}\0{key_id}', 'private', load_pem, self.engine.private_handle)
+
+    def stats(self):
+        """
+        Snapshot of the handle cache counters
+        """
+        return self._handles.stats()
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# METRICS_ENABLED=0 turns every observation into a no-op
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+# Request latencies, in seconds
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Crypto phases are much shorter: from a few microseconds (cached key lookups) up
+PHASE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with labels
+    """
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.label_names, label_values)} {_number(value)}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'label_values', 'start')
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets and labels, rendered cumulatively like Prometheus expects
+    """
+
+    def __init__(self, name, documentation, label_names=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values):
+        """
+        Context manager that observes the time spent inside it
+        """
+        return _Timer(self, label_values)
+
+    def snapshot(self, *label_values):
+        """
+        (count, sum) observed for one label combination
+        """
+        with self._lock:
+            series = self._series.get(label_values)
+            return (series[2], series[1]) if series else (0, 0.0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for label_values, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.label_names, label_values, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            inf = _labels(self.label_names, label_values, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{inf} {count}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, label_values)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, label_values)} {count}')
+        return lines
+
+
+class Registry:
+    """
+    Collection of metrics rendered together in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, label_names=()):
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, label_names=(), buckets=REQUEST_BUCKETS):
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Returns:
+            str: Every metric in the Prometheus text exposition format (version 0.0.4)
+        """
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests_total = registry.counter(
+    'http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status')
+)
+http_request_duration_seconds = registry.histogram(
+    'http_request_duration_seconds', 'Time until the view returned a response', ('route', 'method')
+)
+rsa_phase_seconds = registry.histogram(
+    'rsa_phase_seconds', 'Time spent in each phase of RSA operations', ('phase',), buckets=PHASE_BUCKETS
+)
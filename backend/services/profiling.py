@@ -0,0 +1,151 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import threading
+import time
+
+
+# Fraction of requests profiled at random; 0 disables sampling
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+# Requests carrying PROFILE_HEADER with this value are always profiled; unset disables the header
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN') or None
+PROFILE_HEADER = 'X-Profile-Token'
+# Profiles kept on disk; older ones are deleted as new ones are written
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 100))
+# Functions listed in each summary
+PROFILE_TOP = int(os.environ.get('PROFILE_TOP', 30))
+
+
+def summarize(stats, limit=PROFILE_TOP):
+    """
+    Render the functions with the highest cumulative time
+
+    Args:
+        stats (Profile | str | list): A finished profile, or one or more .prof paths to merge
+        limit (int): Number of functions to list
+
+    Returns:
+        str: pstats table sorted by cumulative time
+    """
+    out = io.StringIO()
+    sources = [stats] if isinstance(stats, (str, cProfile.Profile)) else list(stats)
+    pstats.Stats(*sources, stream=out).strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+class RequestProfiler:
+    """
+    Profiles a sample of requests, or those sent with the admin token, with cProfile
+
+    Each profile is written as <id>.prof (load it with pstats or snakeviz) next
+    to <id>.txt, the top functions by cumulative time. Only one request is
+    profiled at a time: cProfile slows the profiled request several times over,
+    and concurrent profiles would each pay for it. Requests that are not
+    selected cost a header lookup and, when sampling is on, one random number.
+    """
+
+    def __init__(self, directory, sample_rate=PROFILE_SAMPLE_RATE, token=PROFILE_TOKEN,
+                 keep=PROFILE_KEEP, top=PROFILE_TOP):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.keep = keep
+        self.top = top
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.token is not None
+
+    def wanted(self, header_value=None):
+        """
+        Whether a request should be profiled
+
+        Args:
+            header_value (str, optional): Value of PROFILE_HEADER on the request
+
+        Returns:
+            bool: True when the header carries the token or the request is sampled
+        """
+        if header_value is not None and self.token is not None:
+            return hmac.compare_digest(header_value.encode('utf-8'), self.token.encode('utf-8'))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """
+        Start profiling the current thread
+
+        Returns:
+            Profile | None: The running profile, or None if another request is being profiled
+        """
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) already owns this thread
+            self._busy.release()
+            return None
+        return profile
+
+    @staticmethod
+    def profile_id(label):
+        """
+        File name (without extension) for a new profile
+
+        Args:
+            label (str): Describes the request, e.g. 'POST /api/decrypt'
+
+        Returns:
+            str: Zero-padded nanosecond timestamp, so names sort by age, then the label
+        """
+        return f'{time.time_ns():020d}-' + ''.join(c if c.isalnum() else '-' for c in label[:100]).strip('-')
+
+    def finish(self, profile, profile_id, title=''):
+        """
+        Stop a profile, write it and its summary, and drop the oldest profiles
+
+        Args:
+            profile (Profile): Profile returned by start()
+            profile_id (str): Name from profile_id()
+            title (str): First line of the summary
+        """
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, profile_id)
+        profile.dump_stats(path + '.prof')
+        with open(path + '.txt', 'w', encoding='utf-8') as summary:
+            summary.write(f'{title}\n\n')
+            summary.write(summarize(profile, self.top))
+
+        self.rotate()
+
+    def profiles(self):
+        """
+        Returns:
+            list: Paths of the kept .prof files, oldest first
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.prof'))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def rotate(self):
+        """
+        Delete the oldest profiles beyond the configured number to keep
+        """
+        paths = self.profiles()
+        for path in paths[:max(len(paths) - self.keep, 0)]:
+            for extension in ('.prof', '.txt'):
+                try:
+                    os.remove(path[:-len('.prof')] + extension)
+                except FileNotFoundError:
+                    pass
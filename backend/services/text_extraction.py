@@ -0,0 +1,276 @@
+import codecs
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from xml.etree import ElementTree
+import PyPDF2
+
+
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.doc', '.docx')
+
+# Bytes read from a text upload at a time
+TEXT_READ_SIZE = 64 * 1024
+
+# Limits that cut pathological documents off early
+PDF_MAX_PAGES = int(os.environ.get('PDF_MAX_PAGES', 2000))
+EXTRACT_MAX_BYTES = int(os.environ.get('EXTRACT_MAX_BYTES', 32 * 1024 * 1024))
+
+# PDFs with at least this many pages are extracted on the process pool
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 16))
+PDF_PAGES_PER_TASK = int(os.environ.get('PDF_PAGES_PER_TASK', 8))
+PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', os.cpu_count() or 1))
+
+# Also extract paragraphs inside table cells (python-docx's doc.paragraphs skips them)
+DOCX_INCLUDE_TABLES = os.environ.get('DOCX_INCLUDE_TABLES') == '1'
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY = _W + 'body'
+_W_P = _W + 'p'
+_W_R = _W + 'r'
+_W_T = _W + 't'
+_W_TC = _W + 'tc'
+_RUN_BREAKS = {_W + 'tab': '\t', _W + 'br': '\n', _W + 'cr': '\n'}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class UnsupportedFileType(ValueError):
+    """
+    Raised for uploads whose extension has no extractor
+    """
+
+
+class ExtractionLimitExceeded(ValueError):
+    """
+    Raised when a document has too many pages or too much text
+    """
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Forking a threaded server would copy locks held by other threads (SQLAlchemy's
+                # pool, the key caches) into the workers; start them from a clean process instead
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS,
+                                            mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+def shutdown_pool():
+    """
+    Stop the PDF extraction process pool, if one was started
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def _iter_txt(file):
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        block = file.read(TEXT_READ_SIZE)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _join_lines(lines):
+    # Same text as '\n'.join(lines) without building the list
+    for i, line in enumerate(lines):
+        if i:
+            yield '\n'
+        if line:
+            yield line
+
+
+# Per worker process: the last PDF opened, so consecutive tasks for one document parse it once
+_worker_reader = (None, None)
+
+
+def _extract_page_range(path, token, start, stop):
+    """
+    Process pool task: extract the text of pages [start, stop) from a PDF on disk
+
+    token is unique per extraction, so a reused temp file name never hits a stale reader.
+    """
+    global _worker_reader
+    cached_token, reader = _worker_reader
+    if cached_token != token:
+        reader = PyPDF2.PdfReader(path)
+        _worker_reader = (token, reader)
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _spill_to_disk(file):
+    """
+    Return a path workers can open, copying the upload to a temp file if it is only in memory
+    """
+    name = getattr(file, 'name', None)
+    if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name):
+        return name, False
+
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+        shutil.copyfileobj(file, tmp)
+    return tmp.name, True
+
+
+def _iter_pages_parallel(file, page_count):
+    path, is_temp = _spill_to_disk(file)
+    token = uuid.uuid4().hex
+    pool = _get_pool()
+    ranges = iter([
+        (start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ])
+
+    # Keep a bounded window of tasks in flight and hand pages back in document order
+    pending = deque(
+        pool.submit(_extract_page_range, path, token, start, stop)
+        for start, stop in islice(ranges, PDF_EXTRACT_WORKERS * 2)
+    )
+    try:
+        while pending:
+            texts = pending.popleft().result()
+            for start, stop in islice(ranges, 1):
+                pending.append(pool.submit(_extract_page_range, path, token, start, stop))
+            yield from texts
+    finally:
+        for future in pending:
+            future.cancel()
+        if is_temp:
+            os.unlink(path)
+
+
+def _iter_pdf(file, max_pages):
+    reader = PyPDF2.PdfReader(file)
+    page_count = len(reader.pages)
+    if page_count > max_pages:
+        raise ExtractionLimitExceeded(f'PDF has {page_count} pages; the limit is {max_pages}')
+
+    if PDF_EXTRACT_WORKERS > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        pages = _iter_pages_parallel(file, page_count)
+    else:
+        pages = (page.extract_text() for page in reader.pages)
+    yield from _join_lines(pages)
+
+
+def _iter_docx_paragraphs(xml, include_tables):
+    """
+    Stream paragraph texts out of word/document.xml without building the document tree
+
+    Mirrors python-docx's Paragraph.text: only runs that are direct children of
+    the paragraph count, and <w:tab/>, <w:br/> and <w:cr/> map to tab and newline.
+    """
+    parents = (_W_BODY, _W_TC) if include_tables else (_W_BODY,)
+    stack = []
+    body = None
+    parts = None
+    para_depth = None
+
+    for event, elem in ElementTree.iterparse(xml, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == _W_BODY:
+                body = elem
+            elif elem.tag == _W_P and parts is None and stack and stack[-1] in parents:
+                parts = []
+                para_depth = len(stack)
+            stack.append(elem.tag)
+            continue
+
+        stack.pop()
+        depth = len(stack)
+
+        if parts is not None:
+            if depth == para_depth + 2 and stack[-1] == _W_R:
+                if elem.tag == _W_T:
+                    parts.append(elem.text or '')
+                elif elem.tag in _RUN_BREAKS:
+                    parts.append(_RUN_BREAKS[elem.tag])
+            elif depth == para_depth:
+                yield ''.join(parts)
+                parts = None
+
+        # Drop finished subtrees so memory stays proportional to one paragraph or table cell
+        if elem.tag in (_W_P, _W_TC) and parts is None:
+            elem.clear()
+        if body is not None and depth == 2 and stack[-1] == _W_BODY:
+            body.clear()
+
+
+def _iter_docx(file):
+    with zipfile.ZipFile(file) as archive:
+        with archive.open('word/document.xml') as xml:
+            yield from _join_lines(_iter_docx_paragraphs(xml, DOCX_INCLUDE_TABLES))
+
+
+def _limit_bytes(pieces, max_bytes):
+    total = 0
+    for piece in pieces:
+        total += len(piece.encode('utf-8'))
+        if total > max_bytes:
+            pieces.close()
+            raise ExtractionLimitExceeded(f'Extracted text exceeds the limit of {max_bytes} bytes')
+        yield piece
+
+
+def iter_text(file, file_ext, max_pages=None, max_bytes=None):
+    """
+    Yield the text of an uploaded document piece by piece
+
+    Args:
+        file: Binary file object positioned at the start of the upload
+        file_ext (str): Lower-case extension including the dot
+        max_pages (int, optional): Reject PDFs with more pages, defaults to PDF_MAX_PAGES
+        max_bytes (int, optional): Stop once the text exceeds this many UTF-8 bytes,
+            defaults to EXTRACT_MAX_BYTES
+
+    Returns:
+        generator: Text pieces whose concatenation is the document text
+    """
+    max_pages = max_pages or PDF_MAX_PAGES
+    max_bytes = max_bytes or EXTRACT_MAX_BYTES
+
+    if file_ext == '.txt':
+        pieces = _iter_txt(file)
+    elif file_ext == '.pdf':
+        pieces = _iter_pdf(file, max_pages)
+    elif file_ext in ('.doc', '.docx'):
+        pieces = _iter_docx(file)
+    else:
+        raise UnsupportedFileType('Unsupported file type')
+    return _limit_bytes(pieces, max_bytes)
+
+
+def extract_text(file, file_ext, max_pages=None, max_bytes=None):
+    """
+    Extract the full text of an uploaded document
+
+    Args:
+        file: Binary file object positioned at the start of the upload
+        file_ext (str): Lower-case extension including the dot
+        max_pages (int, optional): Reject PDFs with more pages
+        max_bytes (int, optional): Reject documents with more text
+
+    Returns:
+        str: Document text
+    """
+    return ''.join(iter_text(file, file_ext, max_pages=max_pages, max_bytes=max_bytes))
@@ -0,0 +1,27 @@
+import os
+import tempfile
+from flask import Request
+
+
+# Uploads up to this size stay in memory; anything larger is written to a temp file
+UPLOAD_SPOOL_BYTES = int(os.environ.get('UPLOAD_SPOOL_BYTES', 256 * 1024))
+
+
+class SpooledUploadRequest(Request):
+    """
+    Request whose file uploads cost at most UPLOAD_SPOOL_BYTES of memory each.
+
+    Werkzeug's default keeps up to 500 KB of every upload in memory regardless of
+    the request size. Here a request already known to be larger than the threshold
+    goes straight to a named temp file, which the PDF workers can also open by path
+    without another copy; smaller or unsized uploads start in memory and roll over
+    to disk once they cross the threshold. Werkzeug closes (and so deletes) the
+    files when the request ends.
+    """
+
+    spool_bytes = UPLOAD_SPOOL_BYTES
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length > self.spool_bytes:
+            return tempfile.NamedTemporaryFile(mode='rb+', prefix='upload-')
+        return tempfile.SpooledTemporaryFile(max_size=self.spool_bytes, mode='rb+')
@@ -0,0 +1,26 @@
+"""
+In-process ASGI client, shared by the tests and the benchmarks
+"""
+
+
+async def call(asgi_app, method, path, body=b'', headers=(), query_string=b''):
+    """Drive one HTTP request through an ASGI app; returns (status, headers, body, number of body messages)"""
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi_app({
+        'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+        'root_path': '', 'query_string': query_string, 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000),
+        # Servers pass header names lower-cased
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    }, receive, send)
+
+    start = sent[0]
+    chunks = [message['body'] for message in sent[1:]]
+    return start['status'], dict(start['headers']), b''.join(chunks), len(chunks)
@@ -0,0 +1,95 @@
+"""
+Builders for synthetic upload fixtures, shared by the tests and the benchmarks
+"""
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(pages, lines_per_page=40, line='Page {page} line {line} lorem ipsum dolor sit amet'):
+    """
+    Build a minimal text PDF
+
+    Args:
+        pages (int): Number of pages
+        lines_per_page (int): Text lines on each page
+        line (str): Line template, formatted with page and line numbers
+
+    Returns:
+        bytes: PDF document
+    """
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # Pages, filled in once the kids are known
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    kids = []
+    for page in range(pages):
+        commands = ['BT /F1 10 Tf 12 TL 40 780 Td']
+        for number in range(lines_per_page):
+            commands.append(f'({_escape(line.format(page=page + 1, line=number + 1))}) Tj T*')
+        commands.append('ET')
+        stream = '\n'.join(commands).encode('latin-1')
+
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_id = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id
+        )
+        kids.append(len(objects))
+
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % kid for kid in kids), pages
+    )
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_docx(paragraphs, table_rows=0, table_cols=3):
+    """
+    Build a DOCX with python-docx containing paragraphs, runs with tabs and breaks, and a table
+
+    Args:
+        paragraphs (int): Number of body paragraphs
+        table_rows (int): Rows of a table appended after the paragraphs (0 for none)
+        table_cols (int): Columns of that table
+
+    Returns:
+        bytes: DOCX document
+    """
+    import io
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading('Synthetic document', level=1)
+    for number in range(paragraphs):
+        para = doc.add_paragraph(f'Paragraph {number} with unicode åéîøü 你好 👋')
+        run = para.add_run(' bold part')
+        run.bold = True
+        if number % 5 == 0:
+            para.add_run('\tafter tab\nafter break')
+        if number % 7 == 0:
+            doc.add_paragraph('')
+    if table_rows:
+        table = doc.add_table(rows=table_rows, cols=table_cols)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = f'cell {r},{c}'
+        doc.add_paragraph('After the table')
+
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
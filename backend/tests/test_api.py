@@ -0,0 +1,722 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('KEY_POOL_DEPTH', '0')
+import asyncio
+import io
+import json
+import tempfile
+import pytest
+from werkzeug.test import EnvironBuilder
+from app import app, asgi_app, UPLOAD_LIMITS
+from services.uploads import SpooledUploadRequest
+from asgi_client import call
+
+
+@pytest.fixture(scope='module')
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(scope='module')
+def keys(client):
+    response = client.post('/api/generate', json={'keySize': 1024})
+    return response.get_json()['data']
+
+
+def auth_headers(user_id, **extra):
+    return {'X-MS-CLIENT-PRINCIPAL-ID': user_id, 'X-MS-CLIENT-PRINCIPAL-NAME': f'{user_id}@example.com', **extra}
+
+
+def save(client, keys, user_id, name, ciphertext='abc'):
+    """Save one ciphertext for the user through the API and return its id"""
+    response = client.post('/api/saved-ciphertexts', headers=auth_headers(user_id), json={
+        'name': name, 'ciphertext': ciphertext, 'privateKey': keys['private_key']
+    })
+    assert response.status_code == 201
+    assert 'private_key' not in response.get_json()['data']
+    return response.get_json()['data']['id']
+
+
+def save_many(client, keys, user_id, count):
+    return [save(client, keys, user_id, f'item {i}', f'ciphertext {i}') for i in range(count)]
+
+
+class TestBatchEndpoints:
+    """Test suite for /api/encrypt/batch and /api/decrypt/batch"""
+
+    def test_round_trip(self, client, keys):
+        """Test that a batch encrypts and decrypts every message in order"""
+        messages = [f"message {i}" * (i + 1) for i in range(10)]
+
+        response = client.post('/api/encrypt/batch', json={
+            'publicKey': keys['public_key'],
+            'messages': messages
+        })
+        assert response.status_code == 200
+        results = response.get_json()['data']['results']
+        assert all(item['success'] for item in results)
+
+        response = client.post('/api/decrypt/batch', json={
+            'privateKey': keys['private_key'],
+            'ciphertexts': [item['ciphertext'] for item in results]
+        })
+        plaintexts = [item['plaintext'] for item in response.get_json()['data']['results']]
+        assert plaintexts == messages
+
+    def test_per_item_errors(self, client, keys):
+        """Test that one bad item does not fail the whole batch"""
+        good = client.post('/api/encrypt', json={
+            'publicKey': keys['public_key'],
+            'plaintext': 'hello'
+        }).get_json()['data']['ciphertext']
+
+        response = client.post('/api/decrypt/batch', json={
+            'privateKey': keys['private_key'],
+            'ciphertexts': [good, 'garbage', 42]
+        })
+        results = response.get_json()['data']['results']
+
+        assert results[0] == {'success': True, 'plaintext': 'hello'}
+        assert results[1] == {'success': False, 'error': 'Invalid Ciphertext'}
+        assert results[2]['success'] is False
+
+    def test_empty_batch_rejected(self, client, keys):
+        """Test that an empty or missing message list is rejected"""
+        response = client.post('/api/encrypt/batch', json={
+            'publicKey': keys['public_key'],
+            'messages': []
+        })
+        assert response.status_code == 400
+
+    def test_oversized_batch_rejected(self, client, keys, monkeypatch):
+        """Test that batches above the limit are rejected"""
+        monkeypatch.setattr('app.MAX_BATCH_SIZE', 2)
+
+        response = client.post('/api/encrypt/batch', json={
+            'publicKey': keys['public_key'],
+            'messages': ['a', 'b', 'c']
+        })
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("key", [42, ['pem'], {'pem': 1}])
+    def test_key_must_be_string(self, client, key):
+        """Test that a key that is not a string is a 400 on both batch endpoints"""
+        for path, field, items in (('/api/encrypt/batch', 'publicKey', 'messages'),
+                                   ('/api/decrypt/batch', 'privateKey', 'ciphertexts')):
+            response = client.post(path, json={field: key, items: ['a']})
+
+            assert response.status_code == 400, path
+            assert response.get_json() == {'success': False, 'error': f'Field "{field}" must be a string'}
+
+
+class TestEncryptFile:
+    """Test suite for /api/encrypt-file"""
+
+    def upload(self, client, keys, content, filename='doc.txt', mode='chunked'):
+        return client.post('/api/encrypt-file', data={
+            'publicKey': keys['public_key'],
+            'mode': mode,
+            'file': (io.BytesIO(content), filename)
+        }, content_type='multipart/form-data')
+
+    @pytest.mark.parametrize("mode", ['chunked', 'envelope'])
+    def test_round_trip(self, client, keys, mode):
+        """Test that the streamed ciphertext decrypts through /api/decrypt"""
+        text = "Line with unicode åéîøü 你好 👋\n" * 50
+
+        response = self.upload(client, keys, text.encode('utf-8'), mode=mode)
+        assert response.status_code == 200
+        assert response.headers['X-Ciphertext-Mode'] == mode
+
+        response = client.post('/api/decrypt', json={
+            'privateKey': keys['private_key'],
+            'ciphertext': response.get_data(as_text=True)
+        })
+        assert response.get_json()['data']['plaintext'] == text
+
+    def test_unsupported_type(self, client, keys):
+        """Test that unsupported uploads are rejected before streaming"""
+        response = self.upload(client, keys, b'data', filename='image.png')
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Unsupported file type'
+
+    def test_bad_key(self, client):
+        """Test that a bad key returns a JSON error instead of a broken stream"""
+        response = self.upload(client, {'public_key': 'not a key'}, b'hello')
+
+        assert response.status_code == 500
+        assert response.get_json()['error'] == 'Bad Public Key'
+
+    @pytest.mark.parametrize("chunked", [False, True])
+    def test_large_upload_spooled_to_disk(self, client, keys, monkeypatch, chunked):
+        """Test that an upload over the spool size is held on disk, whether or not its length is declared"""
+        streams = []
+        get_file_stream = SpooledUploadRequest._get_file_stream
+
+        def recording_get_file_stream(request, *args, **kwargs):
+            streams.append(get_file_stream(request, *args, **kwargs))
+            return streams[-1]
+        monkeypatch.setattr(SpooledUploadRequest, 'spool_bytes', 4096)
+        monkeypatch.setattr(SpooledUploadRequest, '_get_file_stream', recording_get_file_stream)
+
+        text = '0123456789abcdef' * 4096
+        environ = EnvironBuilder(method='POST', data={
+            'publicKey': keys['public_key'],
+            'mode': 'envelope',
+            'file': (io.BytesIO(text.encode('utf-8')), 'big.txt')
+        }).get_environ()
+        body = environ['wsgi.input'].read()
+        if chunked:
+            # No Content-Length, so the upload starts in memory and has to roll over
+            response = client.post('/api/encrypt-file', input_stream=io.BytesIO(body),
+                                   content_type=environ['CONTENT_TYPE'], headers={'Transfer-Encoding': 'chunked'},
+                                   environ_overrides={'wsgi.input_terminated': True})
+        else:
+            response = client.post('/api/encrypt-file', data=body, content_type=environ['CONTENT_TYPE'])
+
+        assert response.status_code == 200
+        assert len(streams) == 1
+        if chunked:
+            assert isinstance(streams[0], tempfile.SpooledTemporaryFile) and streams[0]._rolled
+        else:
+            assert os.path.isabs(streams[0].name)
+
+        response = client.post('/api/decrypt', json={
+            'privateKey': keys['private_key'],
+            'ciphertext': response.get_data(as_text=True)
+        })
+        assert response.get_json()['data']['plaintext'] == text
+
+
+class TestUploadLimits:
+    """Test suite for per-endpoint upload limits"""
+
+    def test_extract_text_over_limit(self, client, monkeypatch):
+        """Test that an upload above the endpoint limit gets a JSON 413"""
+        monkeypatch.setitem(UPLOAD_LIMITS, 'extract_text', 1024)
+
+        response = client.post('/api/extract-text', data={
+            'file': (io.BytesIO(b'x' * 4096), 'doc.txt')
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 413
+        assert response.get_json() == {
+            'success': False,
+            'error': 'Upload exceeds the limit of 1024 bytes'
+        }
+
+    def test_limit_is_per_endpoint(self, client, keys, monkeypatch):
+        """Test that one endpoint's limit does not apply to another"""
+        monkeypatch.setitem(UPLOAD_LIMITS, 'extract_text', 1024)
+
+        response = client.post('/api/encrypt-file', data={
+            'publicKey': keys['public_key'],
+            'file': (io.BytesIO(b'x' * 4096), 'doc.txt')
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 200
+
+    def test_under_limit(self, client):
+        """Test that uploads within the limit are extracted as before"""
+        response = client.post('/api/extract-text', data={
+            'file': (io.BytesIO('héllo\n'.encode('utf-8') * 1000), 'doc.txt')
+        }, content_type='multipart/form-data')
+
+        assert response.status_code == 200
+        assert response.get_json()['data']['text'] == 'héllo\n' * 1000
+
+
+class TestSavedCiphertextListing:
+    """Test suite for the paginated GET /api/saved-ciphertexts"""
+
+    def test_pages_cover_every_row_once(self, client, keys):
+        """Test that following next_cursor returns every row in creation order"""
+        save_many(client, keys, 'pager', 7)
+
+        names, cursor, pages = [], None, 0
+        while True:
+            query = {'limit': 3, 'cursor': cursor} if cursor else {'limit': 3}
+            body = client.get('/api/saved-ciphertexts', headers=auth_headers('pager'), query_string=query).get_json()
+            names += [item['name'] for item in body['data']]
+            pages += 1
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+
+        assert names == [f'item {i}' for i in range(7)]
+        assert pages == 3
+
+    def test_projection(self, client, keys):
+        """Test that the private key is never returned and the ciphertext only on request"""
+        save_many(client, keys, 'projection', 2)
+
+        body = client.get('/api/saved-ciphertexts', headers=auth_headers('projection')).get_json()
+        assert body['next_cursor'] is None
+        assert all('ciphertext' not in item and 'private_key' not in item for item in body['data'])
+
+        body = client.get('/api/saved-ciphertexts', headers=auth_headers('projection'),
+                          query_string={'includeCiphertext': '1'}).get_json()
+        assert [item['ciphertext'] for item in body['data']] == ['ciphertext 0', 'ciphertext 1']
+        assert all('private_key' not in item for item in body['data'])
+
+    def test_listing_query_skips_private_key(self, client, keys):
+        """Test that the listing SQL never selects the private key column"""
+        from sqlalchemy import event
+        from database.database import db
+        save_many(client, keys, 'sql', 1)
+
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            client.get('/api/saved-ciphertexts', headers=auth_headers('sql'),
+                       query_string={'includeCiphertext': '1'})
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+
+        selects = [s for s in statements if 'FROM "SavedCiphertext"' in s]
+        assert len(selects) == 1
+        assert 'private_key' not in selects[0]
+
+    @pytest.mark.parametrize("query", [{'limit': 0}, {'limit': 100000}, {'cursor': 'not-a-cursor'}])
+    def test_bad_parameters(self, client, query):
+        """Test that invalid limits and cursors are rejected"""
+        response = client.get('/api/saved-ciphertexts', headers=auth_headers('bad'), query_string=query)
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+class TestKeyIds:
+    """Test suite for registering keys and using them by keyId"""
+
+    def register(self, client, keys, user_id='owner'):
+        response = client.post('/api/keys', headers=auth_headers(user_id), json={'privateKey': keys['private_key']})
+        assert response.status_code == 201
+        return response.get_json()['data']['key_id']
+
+    def test_register_is_idempotent(self, client, keys):
+        """Test that registering the same key twice returns the same keyId"""
+        assert self.register(client, keys) == self.register(client, keys)
+
+    @pytest.mark.parametrize("body,error", [
+        ({'privateKey': 'not a key'}, 'Bad Private Key'),
+        ({'publicKey': 'not a key'}, 'Bad Public Key'),
+    ])
+    def test_register_bad_pem(self, client, body, error):
+        """Test that a PEM that does not parse is a 400, not a server error"""
+        response = client.post('/api/keys', headers=auth_headers('owner'), json=body)
+
+        assert response.status_code == 400
+        assert response.get_json() == {'success': False, 'error': error}
+
+    def test_encrypt_decrypt_by_key_id(self, client, keys):
+        """Test a round trip that sends only the keyId"""
+        key_id = self.register(client, keys)
+
+        response = client.post('/api/encrypt', json={'keyId': key_id, 'plaintext': 'hello'})
+        assert response.status_code == 200
+        ciphertext = response.get_json()['data']['ciphertext']
+
+        response = client.post('/api/decrypt', headers=auth_headers('owner'), json={
+            'keyId': key_id,
+            'ciphertext': ciphertext
+        })
+        assert response.get_json()['data']['plaintext'] == 'hello'
+
+    def test_private_key_id_needs_owner(self, client, keys):
+        """Test that decrypting by keyId requires authentication as the key's owner"""
+        key_id = self.register(client, keys)
+        payload = {'keyId': key_id, 'ciphertext': 'abc'}
+
+        assert client.post('/api/decrypt', json=payload).status_code == 401
+        assert client.post('/api/decrypt', headers=auth_headers('stranger'), json=payload).status_code == 404
+
+    def test_unknown_key_id(self, client):
+        """Test that an unregistered keyId is a 404"""
+        response = client.post('/api/encrypt', json={'keyId': '0' * 64, 'plaintext': 'hello'})
+
+        assert response.status_code == 404
+        assert response.get_json() == {'success': False, 'error': 'Key not found'}
+
+    @pytest.mark.parametrize("key_id", [['a'], {'a': 1}, 42])
+    def test_key_id_must_be_string(self, client, key_id):
+        """Test that a keyId that is not a string is a 400 on every route that accepts one"""
+        requests = [
+            ('/api/encrypt', {'keyId': key_id, 'plaintext': 'hello'}, 'Field'),
+            ('/api/decrypt', {'keyId': key_id, 'ciphertext': 'abc'}, 'Field'),
+            ('/api/saved-ciphertexts', {'name': 'n', 'ciphertext': 'abc', 'keyId': key_id}, 'Field'),
+            ('/api/saved-ciphertexts/batch', {'items': [{'name': 'n', 'ciphertext': 'abc', 'keyId': key_id}]},
+             'Item 0: field'),
+        ]
+        for path, body, label in requests:
+            response = client.post(path, headers=auth_headers('typed'), json=body)
+
+            assert response.status_code == 400, path
+            assert response.get_json() == {'success': False, 'error': f'{label} "keyId" must be a string'}
+
+    def test_saved_ciphertexts_share_one_key(self, client, keys):
+        """Test that saved ciphertexts reference one stored key and still decrypt"""
+        from database.database import db
+        from models.storedKey import StoredKey
+
+        ciphertext = client.post('/api/encrypt', json={
+            'publicKey': keys['public_key'],
+            'plaintext': 'saved'
+        }).get_json()['data']['ciphertext']
+
+        ids = []
+        for body in ({'privateKey': keys['private_key']}, {'keyId': self.register(client, keys, 'saver')}):
+            response = client.post('/api/saved-ciphertexts', headers=auth_headers('saver'), json={
+                'name': 'saved', 'ciphertext': ciphertext, **body
+            })
+            assert response.status_code == 201
+            ids.append(response.get_json()['data']['id'])
+
+        with app.app_context():
+            assert StoredKey.query.filter_by(user_id='saver').count() == 1
+            assert db.session.execute(db.text(
+                'SELECT COUNT(*) FROM "SavedCiphertext" WHERE user_id = :u AND private_key IS NOT NULL'
+            ), {'u': 'saver'}).scalar() == 0
+
+        for saved_id in ids:
+            response = client.post(f'/api/saved-ciphertexts/{saved_id}/decrypt', headers=auth_headers('saver'))
+            assert response.get_json()['data']['plaintext'] == 'saved'
+
+
+class TestSavedCiphertextBatch:
+    """Test suite for bulk create, bulk delete and batch decrypt of saved ciphertexts"""
+
+    def encrypt(self, client, keys, plaintexts):
+        response = client.post('/api/encrypt/batch', json={'publicKey': keys['public_key'], 'messages': plaintexts})
+        return [item['ciphertext'] for item in response.get_json()['data']['results']]
+
+    def create(self, client, keys, user_id, plaintexts):
+        ciphertexts = self.encrypt(client, keys, plaintexts)
+        response = client.post('/api/saved-ciphertexts/batch', headers=auth_headers(user_id), json={
+            'items': [
+                {'name': plaintext, 'ciphertext': ciphertext, 'privateKey': keys['private_key']}
+                for plaintext, ciphertext in zip(plaintexts, ciphertexts)
+            ]
+        })
+        assert response.status_code == 201
+        return [item['id'] for item in response.get_json()['data']]
+
+    def test_create_and_decrypt(self, client, keys):
+        """Test that bulk-created rows decrypt in request order with per-item results"""
+        plaintexts = [f'archived {i}' for i in range(6)]
+        ids = self.create(client, keys, 'bulk', plaintexts)
+
+        response = client.post('/api/saved-ciphertexts/decrypt/batch', headers=auth_headers('bulk'), json={
+            'ids': list(reversed(ids)) + [999999]
+        })
+        results = response.get_json()['data']['results']
+
+        assert [item['plaintext'] for item in results[:-1]] == list(reversed(plaintexts))
+        assert all(item['success'] for item in results[:-1])
+        assert results[-1] == {
+            'id': 999999, 'success': False, 'error': 'Saved ciphertext not found or not owned by you'
+        }
+
+    def test_key_failure_is_per_item(self, client, keys, monkeypatch):
+        """Test that a key that cannot be loaded fails only the items that use it"""
+        import app as app_module
+        ids = self.create(client, keys, 'broken-key', ['a', 'b'])
+        private = app_module.key_registry.private
+
+        def flaky_private(fingerprint, user_id, load):
+            if flaky_private.calls == 0:
+                flaky_private.calls += 1
+                raise ValueError('Bad Private Key')
+            return private(fingerprint, user_id, load)
+        flaky_private.calls = 0
+        monkeypatch.setattr(app_module.key_registry, 'private', flaky_private)
+
+        response = client.post('/api/saved-ciphertexts/decrypt/batch', headers=auth_headers('broken-key'), json={
+            'ids': ids
+        })
+        assert response.status_code == 200
+        assert response.get_json()['data']['results'] == [
+            {'id': ids[0], 'success': False, 'error': 'Bad Private Key'},
+            {'id': ids[1], 'success': True, 'plaintext': 'b'},
+        ]
+
+    def test_create_is_all_or_nothing(self, client, keys):
+        """Test that one invalid item rejects the whole batch"""
+        response = client.post('/api/saved-ciphertexts/batch', headers=auth_headers('atomic'), json={
+            'items': [
+                {'name': 'good', 'ciphertext': 'abc', 'privateKey': keys['private_key']},
+                {'name': 'bad', 'ciphertext': 'abc', 'privateKey': 'not a key'}
+            ]
+        })
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Item 1: Bad Private Key'
+
+        listing = client.get('/api/saved-ciphertexts', headers=auth_headers('atomic')).get_json()
+        assert listing['data'] == []
+
+    def test_delete(self, client, keys):
+        """Test that bulk delete removes only the caller's rows"""
+        mine = self.create(client, keys, 'deleter', ['a', 'b', 'c'])
+        theirs = self.create(client, keys, 'bystander', ['d'])
+
+        response = client.delete('/api/saved-ciphertexts/batch', headers=auth_headers('deleter'), json={
+            'ids': mine[:2] + theirs
+        })
+        assert response.get_json()['data'] == {'deleted': mine[:2], 'not_found': theirs}
+
+        remaining = client.get('/api/saved-ciphertexts', headers=auth_headers('deleter')).get_json()['data']
+        assert [item['id'] for item in remaining] == mine[2:]
+        assert len(client.get('/api/saved-ciphertexts', headers=auth_headers('bystander')).get_json()['data']) == 1
+
+    @pytest.mark.parametrize("ids", [[], ['1'], [True], 'nope'])
+    def test_bad_ids(self, client, ids):
+        """Test that malformed id lists are rejected"""
+        response = client.post('/api/saved-ciphertexts/decrypt/batch', headers=auth_headers('bulk'), json={'ids': ids})
+
+        assert response.status_code == 400
+
+
+class TestSavedCiphertextSync:
+    """Test suite for ETag validation and ?since= sync of the saved ciphertext list"""
+
+    def test_not_modified(self, client, keys):
+        """Test that an unchanged list answers If-None-Match with 304 and a change invalidates it"""
+        save(client, keys, 'etag', 'first')
+
+        first = client.get('/api/saved-ciphertexts', headers=auth_headers('etag'))
+        etag = first.headers['ETag']
+        assert first.headers['Cache-Control'] == 'private, no-cache'
+
+        again = client.get('/api/saved-ciphertexts', headers=auth_headers('etag', **{'If-None-Match': etag}))
+        assert again.status_code == 304
+        assert again.headers['ETag'] == etag
+
+        # Different query parameters are a different representation
+        other = client.get('/api/saved-ciphertexts?includeCiphertext=1',
+                           headers=auth_headers('etag', **{'If-None-Match': etag}))
+        assert other.status_code == 200
+
+        save(client, keys, 'etag', 'second')
+        changed = client.get('/api/saved-ciphertexts', headers=auth_headers('etag', **{'If-None-Match': etag}))
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etag
+        assert len(changed.get_json()['data']) == 2
+
+    def test_not_modified_is_one_query(self, client, keys):
+        """Test that an unchanged reload runs a single SQL statement"""
+        from sqlalchemy import event
+        from database.database import db
+        save(client, keys, 'cheap', 'item')
+        etag = client.get('/api/saved-ciphertexts', headers=auth_headers('cheap')).headers['ETag']
+
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            response = client.get('/api/saved-ciphertexts', headers=auth_headers('cheap', **{'If-None-Match': etag}))
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+
+        assert response.status_code == 304
+        assert len(statements) == 1
+        assert 'SavedCiphertextRevision' in statements[0]
+
+    def test_first_change_race(self, client, keys):
+        """Test that a revision row created by another request between update and insert is advanced"""
+        from sqlalchemy import event
+        from database.database import db
+        raced = []
+
+        def insert_concurrently(conn, cursor, statement, parameters, context, executemany):
+            if not raced and statement.startswith('UPDATE "SavedCiphertextRevision"') and cursor.rowcount == 0:
+                raced.append(True)
+                conn.exec_driver_sql('INSERT INTO "SavedCiphertextRevision" (user_id, revision) VALUES (?, 1)',
+                                     ('racer',))
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'after_cursor_execute', insert_concurrently)
+        try:
+            save(client, keys, 'racer', 'first')
+        finally:
+            event.remove(engine, 'after_cursor_execute', insert_concurrently)
+
+        assert raced
+        body = client.get('/api/saved-ciphertexts', headers=auth_headers('racer')).get_json()
+        assert [item['name'] for item in body['data']] == ['first']
+        assert body['revision'] == 2
+
+    def test_since(self, client, keys):
+        """Test that since returns rows added and ids removed after a revision"""
+        kept = save(client, keys, 'syncer', 'kept')
+        removed = save(client, keys, 'syncer', 'removed')
+        revision = client.get('/api/saved-ciphertexts', headers=auth_headers('syncer')).get_json()['revision']
+
+        added = save(client, keys, 'syncer', 'added')
+        client.delete(f'/api/saved-ciphertexts/{removed}', headers=auth_headers('syncer'))
+
+        body = client.get('/api/saved-ciphertexts', headers=auth_headers('syncer'),
+                          query_string={'since': revision}).get_json()
+        assert [item['id'] for item in body['data']] == [added]
+        assert body['removed'] == [removed]
+        assert body['revision'] == revision + 2
+
+        body = client.get('/api/saved-ciphertexts', headers=auth_headers('syncer'),
+                          query_string={'since': body['revision']}).get_json()
+        assert body['data'] == [] and body['removed'] == []
+        assert kept not in body['removed']
+
+    @pytest.mark.parametrize("since", ['-1', 'abc'])
+    def test_bad_since(self, client, since):
+        """Test that invalid revisions are rejected"""
+        response = client.get('/api/saved-ciphertexts', headers=auth_headers('syncer'), query_string={'since': since})
+
+        assert response.status_code == 400
+
+
+class TestAvalancheSweep:
+    """Test suite for /api/avalanche in sweep mode"""
+
+    def test_budgets_applied(self, client, keys):
+        """Test that numeric options given as JSON numbers or numeric strings bound the sweep"""
+        response = client.post('/api/avalanche', json={
+            'publicKey': keys['public_key'], 'plaintext': 'A' * 20, 'mode': 'sweep', 'maxFlips': '8', 'maxSeconds': 30
+        })
+
+        assert response.status_code == 200
+        assert response.get_json()['data']['requested_flips'] == 8
+
+    def test_plaintext_cap(self, client, keys, monkeypatch):
+        """Test that a sweep over a plaintext larger than the cap is rejected before any encryption"""
+        import app as app_module
+        monkeypatch.setattr(app_module, 'AVALANCHE_MAX_PLAINTEXT_BYTES', 16)
+
+        response = client.post('/api/avalanche', json={
+            'publicKey': keys['public_key'], 'plaintext': 'A' * 17, 'mode': 'sweep'
+        })
+
+        assert response.status_code == 400
+        assert response.get_json() == {
+            'success': False, 'error': 'Plaintext must not exceed 16 bytes for a sweep'
+        }
+
+    @pytest.mark.parametrize("field,value", [
+        ('maxFlips', -3), ('maxFlips', 'abc'), ('maxFlips', 2.5), ('maxFlips', True),
+        ('maxSeconds', -1), ('maxSeconds', 'nan'), ('maxSeconds', [5]),
+        ('samples', -1), ('samples', {}), ('seed', 'x'),
+    ])
+    def test_invalid_options(self, client, keys, field, value):
+        """Test that malformed or negative sweep options are rejected with a 400"""
+        response = client.post('/api/avalanche', json={
+            'publicKey': keys['public_key'], 'plaintext': 'A' * 20, 'mode': 'sweep', field: value
+        })
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+        assert field in response.get_json()['error']
+
+
+class TestAvalancheEffect:
+    """Test suite for /api/avalanche in its default mode"""
+
+    def test_hex_skipped(self, client, keys):
+        """Test that includeHex false leaves out the hex dumps"""
+        response = client.post('/api/avalanche', json={
+            'publicKey': keys['public_key'], 'plaintext': 'hello', 'includeHex': False
+        })
+
+        assert response.status_code == 200
+        assert 'original_hex' not in response.get_json()['data']
+
+    @pytest.mark.parametrize("value", ['false', 0, None, [False]])
+    def test_include_hex_must_be_boolean(self, client, keys, value):
+        """Test that an includeHex that is not a JSON boolean is rejected instead of read as truthy"""
+        response = client.post('/api/avalanche', json={
+            'publicKey': keys['public_key'], 'plaintext': 'hello', 'includeHex': value
+        })
+
+        assert response.status_code == 400
+        assert response.get_json() == {'success': False, 'error': 'Field "includeHex" must be true or false'}
+
+
+class TestMetricsEndpoint:
+    """Test suite for /metrics"""
+
+    def test_routes_and_phases(self, client, keys):
+        """Test that requests are counted per route pattern and RSA phases are timed"""
+        client.post('/api/encrypt', json={'publicKey': keys['public_key'], 'plaintext': 'hello'})
+        client.get('/api/no-such-route')
+
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+
+        assert 'http_requests_total{route="/api/encrypt",method="POST",status="200"}' in body
+        assert 'http_request_duration_seconds_count{route="/api/encrypt",method="POST"}' in body
+        for phase in ('parse', 'chunk', 'rsa_encrypt', 'base64_encode'):
+            assert f'rsa_phase_seconds_count{{phase="{phase}"}}' in body
+
+    def test_route_labels_use_patterns(self, client):
+        """Test that path parameters do not create a label value per id"""
+        client.delete('/api/saved-ciphertexts/12345')
+
+        body = client.get('/metrics').get_data(as_text=True)
+        assert 'route="/api/saved-ciphertexts/<ciphertext_id>"' in body
+        assert '12345' not in body
+
+
+class TestRequestProfiling:
+    """Test suite for profiling requests on demand"""
+
+    def test_token_header(self, client, keys, tmp_path, monkeypatch):
+        """Test that a request with the profiling token is profiled and others are not"""
+        import app as app_module
+        monkeypatch.setattr(app_module.profiler, 'directory', str(tmp_path))
+        monkeypatch.setattr(app_module.profiler, 'token', 'secret')
+
+        response = client.post('/api/encrypt', json={'publicKey': keys['public_key'], 'plaintext': 'hello'})
+        assert 'X-Profile-Id' not in response.headers
+        assert os.listdir(tmp_path) == []
+
+        response = client.post('/api/encrypt', json={'publicKey': keys['public_key'], 'plaintext': 'hello'},
+                               headers={'X-Profile-Token': 'secret'})
+        assert response.status_code == 200
+        profile_id = response.headers['X-Profile-Id']
+        assert sorted(os.listdir(tmp_path)) == [f'{profile_id}.prof', f'{profile_id}.txt']
+        assert 'encrypt' in (tmp_path / f'{profile_id}.txt').read_text()
+
+
+class TestAsgiApp:
+    """Test suite for serving the app through asgi_app"""
+
+    def test_routes_served(self, keys):
+        """Test that crypto and quick routes work through the ASGI entry point and their pools"""
+        async def scenario():
+            body = json.dumps({'publicKey': keys['public_key'], 'plaintext': 'hello'}).encode('utf-8')
+            encrypt = await call(asgi_app, 'POST', '/api/encrypt', body=body,
+                                 headers=[('Content-Type', 'application/json')])
+            health = await call(asgi_app, 'GET', '/health')
+            return encrypt, health
+
+        encrypt, health = asyncio.run(scenario())
+        assert encrypt[0] == 200 and json.loads(encrypt[2])['success'] is True
+        assert health[0] == 200 and json.loads(health[2])['status'] == 'healthy'
+        assert asgi_app.pool_for('POST', '/api/encrypt').name == 'crypto'
+        assert asgi_app.pool_for('POST', '/api/extract-text').name == 'extraction'
+        assert asgi_app.pool_for('GET', '/api/saved-ciphertexts').name == 'io'
@@ -0,0 +1,181 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import asyncio
+import json
+import threading
+import time
+import pytest
+from flask import Flask, Response, jsonify, request
+from services.asgi import AsyncApp, ExecutorPool
+from asgi_client import call
+
+
+@pytest.fixture
+def slow_app():
+    flask_app = Flask(__name__)
+    release = threading.Event()
+
+    @flask_app.route('/slow', methods=['POST'])
+    def slow():
+        release.wait(5)
+        return jsonify({'success': True})
+
+    @flask_app.route('/quick')
+    def quick():
+        return jsonify({'success': True, 'args': request.args.get('q'), 'header': request.headers.get('X-Test')})
+
+    @flask_app.route('/echo', methods=['POST'])
+    def echo():
+        return jsonify({'length': request.content_length, 'data': request.get_json()})
+
+    @flask_app.route('/stream')
+    def stream():
+        return Response((f'part {i}\n' for i in range(5)), mimetype='text/plain')
+
+    asgi_app = AsyncApp(
+        flask_app,
+        pools={'io': ExecutorPool('io', 2, 8), 'crypto': ExecutorPool('crypto', 1, 1)},
+        routes={'slow': 'crypto'},
+        default_pool='io',
+        max_body_bytes=1024
+    )
+    yield asgi_app, release
+    release.set()
+    for pool in asgi_app.pools.values():
+        pool.shutdown()
+
+
+class TestAsyncApp:
+    """Test suite for the ASGI adapter"""
+
+    def test_request_and_response(self, slow_app):
+        """Test that method, query string, headers and JSON bodies reach the Flask view"""
+        asgi_app, _ = slow_app
+
+        async def scenario():
+            quick = await call(asgi_app, 'GET', '/quick', headers=[('X-Test', 'yes')], query_string=b'q=1')
+            echo = await call(asgi_app, 'POST', '/echo', body=b'{"a": 1}', headers=[('Content-Type', 'application/json')])
+            return quick, echo
+
+        quick, echo = asyncio.run(scenario())
+        assert quick[0] == 200
+        assert quick[1][b'content-type'] == b'application/json'
+        assert json.loads(quick[2]) == {'success': True, 'args': '1', 'header': 'yes'}
+        assert json.loads(echo[2]) == {'length': 8, 'data': {'a': 1}}
+
+    def test_streaming_response(self, slow_app):
+        """Test that a streamed body is sent chunk by chunk"""
+        asgi_app, _ = slow_app
+
+        status, _, body, messages = asyncio.run(call(asgi_app, 'GET', '/stream'))
+
+        assert status == 200
+        assert body == b''.join(f'part {i}\n'.encode() for i in range(5))
+        assert messages > 5
+
+    def test_quick_routes_not_blocked(self, slow_app):
+        """Test that quick routes answer while the slow pool is fully busy"""
+        asgi_app, release = slow_app
+
+        async def scenario():
+            slow = asyncio.ensure_future(call(asgi_app, 'POST', '/slow'))
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            quick = await call(asgi_app, 'GET', '/quick')
+            elapsed = time.perf_counter() - started
+            release.set()
+            return quick, elapsed, await slow
+
+        quick, elapsed, slow = asyncio.run(scenario())
+        assert quick[0] == 200 and slow[0] == 200
+        assert elapsed < 1
+
+    def test_full_pool_rejected(self, slow_app):
+        """Test that requests beyond a pool's workers and queue get a 503"""
+        asgi_app, release = slow_app
+
+        async def scenario():
+            running = [asyncio.ensure_future(call(asgi_app, 'POST', '/slow')) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            rejected = await call(asgi_app, 'POST', '/slow')
+            release.set()
+            return rejected, await asyncio.gather(*running)
+
+        rejected, running = asyncio.run(scenario())
+        assert rejected[0] == 503
+        assert rejected[1][b'retry-after'] == b'1'
+        assert json.loads(rejected[2])['success'] is False
+        assert [result[0] for result in running] == [200, 200]
+        assert asgi_app.stats()['crypto']['rejected'] == 1
+
+    @pytest.mark.parametrize("headers", [[('Content-Length', '4096')], []])
+    def test_body_limit(self, slow_app, headers):
+        """Test that bodies over the limit are refused whether or not their length is declared"""
+        asgi_app, _ = slow_app
+
+        status, _, body, _ = asyncio.run(call(asgi_app, 'POST', '/echo', body=b'x' * 4096, headers=headers))
+
+        assert status == 413
+        assert json.loads(body)['success'] is False
+
+    @pytest.mark.parametrize("value", ['abc', '-1', '', '1.5'])
+    def test_malformed_content_length(self, slow_app, value):
+        """Test that a Content-Length that is not a number is answered with a 400"""
+        asgi_app, _ = slow_app
+
+        status, _, body, _ = asyncio.run(call(asgi_app, 'POST', '/echo', body=b'{}', headers=[('Content-Length', value)]))
+
+        assert status == 400
+        assert json.loads(body) == {'success': False, 'error': 'Invalid Content-Length header'}
+
+    def test_disconnect_before_body_complete(self, slow_app):
+        """Test that a request whose client leaves mid-body never reaches the view"""
+        asgi_app, _ = slow_app
+        messages = [{'type': 'http.request', 'body': b'{"a": ', 'more_body': True}, {'type': 'http.disconnect'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(asgi_app({
+            'type': 'http', 'method': 'POST', 'path': '/echo', 'headers': [(b'content-type', b'application/json')],
+        }, receive, send))
+
+        assert sent == []
+        assert asgi_app.stats()['io']['completed'] == 0
+
+
+    def test_body_open_until_worker_finishes(self):
+        """Test that a worker left running by a cancelled request can still read the whole body"""
+        flask_app = Flask(__name__)
+        release = threading.Event()
+        received = []
+
+        @flask_app.route('/late', methods=['POST'])
+        def late():
+            release.wait(5)
+            received.append(request.get_data())
+            return jsonify({'success': True})
+
+        pool = ExecutorPool('io', 1, 1)
+        asgi_app = AsyncApp(flask_app, pools={'io': pool}, routes={}, default_pool='io')
+
+        async def scenario():
+            request_task = asyncio.ensure_future(call(asgi_app, 'POST', '/late', body=b'x' * 100))
+            await asyncio.sleep(0.05)
+            request_task.cancel()
+            await asyncio.gather(request_task, return_exceptions=True)
+            release.set()
+            # Let the worker finish and its done callback run on this loop
+            while pool.stats()['pending']:
+                await asyncio.sleep(0.01)
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            release.set()
+            pool.shutdown()
+        assert received == [b'x' * 100]
@@ -0,0 +1,135 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import pytest
+from services.avalanche import count_bit_differences, chunk_bit_differences, strict_avalanche_sweep
+from services.crypto_engine import RSAEngine
+from services.key_cache import KeyCache
+
+
+def reference_bit_differences(original, modified):
+    return sum(bin(o ^ m).count('1') for o, m in zip(original, modified))
+
+
+class TestBitDifferences:
+    """Test suite for the bit-difference helpers"""
+
+    @pytest.mark.parametrize("original,modified", [
+        (b'', b''),
+        (b'\x00', b'\xff'),
+        (b'\x0f\xf0', b'\xff\xff'),
+        (os.urandom(256), os.urandom(256)),
+        (os.urandom(300), os.urandom(256)),
+    ])
+    def test_matches_reference(self, original, modified):
+        """Test that the big-int popcount matches the per-byte loop"""
+        assert count_bit_differences(original, modified) == reference_bit_differences(original, modified)
+
+    def test_chunk_breakdown(self):
+        """Test the per-block breakdown and truncation to the shorter ciphertext"""
+        chunks = chunk_bit_differences([b'\x00' * 4, b'\xff' * 4], [b'\x00' * 4, b'\x00' * 4, b'\x01' * 4])
+
+        assert chunks == [
+            {'diff_bits': 0, 'total_bits': 32, 'percent': 0.0},
+            {'diff_bits': 32, 'total_bits': 32, 'percent': 100.0},
+        ]
+
+
+class TestAvalancheEffect:
+    """Test suite for RSAEngine.compute_avalanche_effect"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache())
+        self.keys = self.engine.generate_key_pair(key_size=1024)
+
+    def test_totals_match_chunks(self):
+        """Test that the overall percentage agrees with the per-chunk breakdown"""
+        result = self.engine.compute_avalanche_effect(self.keys['public_key'], "A" * 200)
+
+        assert len(result['chunks']) == 4
+        assert result['diff_bits'] == sum(chunk['diff_bits'] for chunk in result['chunks'])
+        assert result['avalanche_percent'] == round(result['diff_bits'] / result['total_bits'] * 100, 2)
+        assert len(result['original_hex']) == result['total_bits'] // 4
+
+    def test_hex_optional(self):
+        """Test that hex rendering can be skipped"""
+        result = self.engine.compute_avalanche_effect(self.keys['public_key'], "hello", include_hex=False)
+
+        assert 'original_hex' not in result
+        assert 'modified_hex' not in result
+        assert self.engine.decrypt(result['modified_ciphertext'], self.keys['private_key']) == "shello"
+
+
+class TestStrictAvalancheSweep:
+    """Test suite for the strict avalanche criterion sweep"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache())
+        self.keys = self.engine.generate_key_pair(key_size=1024)
+
+    def test_full_sweep(self):
+        """Test that every input bit is flipped and statistics are consistent"""
+        result = self.engine.strict_avalanche(self.keys['public_key'], "Hi!" * 30, max_seconds=30)
+
+        assert result['input_bits'] == 720
+        assert result['completed_flips'] == 720
+        assert result['truncated'] is False
+        assert sum(result['histogram']['counts']) == 720
+        assert result['min_percent'] <= result['mean_percent'] <= result['max_percent']
+        assert 35 < result['mean_percent'] < 65
+        assert len(result['position_matrix']) == 8
+        assert all(len(row) == 16 for row in result['position_matrix'])
+
+    def test_random_sample(self):
+        """Test that a sample flips exactly the requested number of bits"""
+        result = self.engine.strict_avalanche(
+            self.keys['public_key'], "A" * 100, samples=50, seed=1
+        )
+
+        assert result['requested_flips'] == 50
+        assert result['completed_flips'] == 50
+
+    def test_work_budget(self):
+        """Test that max_flips bounds the sweep"""
+        result = self.engine.strict_avalanche(self.keys['public_key'], "A" * 100, max_flips=10)
+
+        assert result['requested_flips'] == 10
+        assert result['completed_flips'] == 10
+
+    def test_negative_budgets_clamped(self):
+        """Test that negative flip and sample counts flip nothing instead of raising"""
+        result = self.engine.strict_avalanche(self.keys['public_key'], "A" * 100, max_flips=-3)
+        assert result['requested_flips'] == 0
+
+        result = self.engine.strict_avalanche(self.keys['public_key'], "A" * 100, samples=-3, seed=1)
+        assert result['requested_flips'] == 0
+
+    def test_only_touched_chunks_encrypted(self):
+        """Test that baselines are only encrypted for chunks a selected flip falls in"""
+        calls = []
+
+        def encrypt_block(chunk):
+            calls.append(chunk)
+            return bytes(len(chunk))
+
+        result = strict_avalanche_sweep(b'A' * 6200, 62, encrypt_block, max_flips=8)
+        assert result['completed_flips'] == 8
+        assert len(calls) == 9
+
+        calls.clear()
+        strict_avalanche_sweep(b'A' * 6200, 62, encrypt_block, max_seconds=0)
+        assert calls == []
+
+    def test_time_budget(self):
+        """Test that an exhausted time budget stops the sweep early"""
+        result = self.engine.strict_avalanche(self.keys['public_key'], "A" * 100, max_seconds=0)
+
+        assert result['completed_flips'] == 0
+        assert result['truncated'] is True
+        assert result['mean_percent'] is None
+
+    def test_empty_plaintext(self):
+        """Test that an empty plaintext is rejected"""
+        with pytest.raises(ValueError, match="Plaintext is required"):
+            self.engine.strict_avalanche(self.keys['public_key'], "")
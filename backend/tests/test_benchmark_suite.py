@@ -0,0 +1,63 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from benchmarks import suite
+from benchmarks.suite import case_id, cases, compare_reports
+
+
+def report(*results):
+    return {'results': [
+        {'id': identifier, 'min': minimum, 'median': median, 'mean': median}
+        for identifier, minimum, median in results
+    ]}
+
+
+class TestCompareReports:
+    """Test suite for the regression gate in the benchmark suite"""
+
+    def test_within_threshold_unchanged(self):
+        """Test that changes inside the threshold in either direction pass"""
+        rows = compare_reports(report(('a', 1.0, 1.0), ('b', 1.0, 1.0)),
+                               report(('a', 1.05, 1.05), ('b', 0.95, 0.95)), 0.10)
+        assert [row[4] for row in rows] == ['unchanged', 'unchanged']
+        assert rows[0][:3] == ('a', 1.0, 1.05)
+
+    def test_regression_past_threshold(self):
+        """Test that a slowdown past the threshold is a regression and a matching speedup an improvement"""
+        rows = compare_reports(report(('slower', 1.0, 1.0), ('faster', 1.0, 1.0)),
+                               report(('slower', 1.2, 1.2), ('faster', 0.8, 0.8)), 0.10)
+        assert {row[0]: row[4] for row in rows} == {'slower': 'regression', 'faster': 'improvement'}
+        assert rows[0][3] == 1.2
+
+    def test_stat_selection(self):
+        """Test that the chosen statistic decides the status"""
+        baseline = report(('a', 1.0, 1.0))
+        current = report(('a', 1.0, 1.5))
+        assert compare_reports(baseline, current, 0.10)[0][4] == 'unchanged'
+        assert compare_reports(baseline, current, 0.10, stat='median')[0] == ('a', 1.0, 1.5, 1.5, 'regression')
+
+    def test_missing_and_new_cases(self):
+        """Test that cases present in only one report are reported without a ratio"""
+        rows = compare_reports(report(('kept', 1.0, 1.0), ('dropped', 2.0, 2.0)),
+                               report(('kept', 1.0, 1.0), ('added', 3.0, 3.0)), 0.10)
+        assert rows == [
+            ('kept', 1.0, 1.0, 1.0, 'unchanged'),
+            ('dropped', 2.0, None, None, 'missing'),
+            ('added', None, 3.0, None, 'new'),
+        ]
+
+
+class TestCases:
+    """Test suite for benchmark case generation"""
+
+    def test_filter_before_setup(self, monkeypatch):
+        """Test that keys are only generated for key sizes with a wanted case"""
+        made = []
+        real = suite.make_key_pair
+        monkeypatch.setattr(suite, 'make_key_pair', lambda key_size: made.append(key_size) or real(key_size))
+
+        selected = list(cases([1024, 2048], [32], ['chunked'], 455,
+                              lambda identifier: 'service.decrypt' in identifier and 'key_size=1024' in identifier))
+        assert [case_id(name, params) for name, params, _ in selected] == \
+            ['service.decrypt[key_size=1024,payload=32,mode=chunked]']
+        assert made == [1024]
+        selected[0][2]()
@@ -0,0 +1,99 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import pytest
+from unittest.mock import patch
+from services import ciphertext_format
+from services.ciphertext_format import CiphertextFormatError, CONTAINER_PREFIX
+from services.crypto_engine import RSAEngine
+from services.key_cache import KeyCache
+
+
+class TestCiphertextFormat:
+    """Test suite for the binary ciphertext container"""
+
+    def test_pack_unpack(self):
+        """Test that blocks survive a pack/unpack round trip"""
+        blocks = [b'a' * 128, b'b' * 128]
+        data = ciphertext_format.pack(blocks, 128, b'F' * 32)
+
+        assert len(data) == ciphertext_format.HEADER.size + 256
+        assert ciphertext_format.unpack(data, modulus_bytes=128, key_fingerprint=b'F' * 32) == (blocks, None)
+
+    def test_text_round_trip(self):
+        """Test the base64url text form"""
+        data = ciphertext_format.pack([b'\xff' * 128], 128, b'F' * 8)
+        text = ciphertext_format.to_text(data)
+
+        assert text.startswith(CONTAINER_PREFIX)
+        assert '=' not in text and '+' not in text and '/' not in text
+        assert ciphertext_format.from_text(text) == data
+
+    @pytest.mark.parametrize("data", [
+        b'RC',
+        ciphertext_format.pack([b'a' * 128], 128, b'F' * 8)[:-1],
+        ciphertext_format.pack([b'a' * 128], 128, b'F' * 8) + b'x',
+        b'XX' + ciphertext_format.pack([b'a' * 128], 128, b'F' * 8)[2:],
+    ])
+    def test_bad_containers_rejected(self, data):
+        """Test that truncated, padded or foreign data is rejected"""
+        with pytest.raises(CiphertextFormatError):
+            ciphertext_format.unpack(data)
+
+    def test_wrong_key_rejected(self):
+        """Test that a mismatching modulus size or fingerprint is rejected"""
+        data = ciphertext_format.pack([b'a' * 128], 128, b'F' * 8)
+
+        with pytest.raises(CiphertextFormatError, match="key size"):
+            ciphertext_format.unpack(data, modulus_bytes=256)
+        with pytest.raises(CiphertextFormatError, match="different key"):
+            ciphertext_format.unpack(data, key_fingerprint=b'G' * 8)
+
+
+class TestEngineContainer:
+    """Test suite for encrypting to and decrypting from containers"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache())
+        self.keys = self.engine.generate_key_pair(key_size=1024)
+
+    @pytest.mark.parametrize("mode", ['chunked', 'envelope'])
+    @pytest.mark.parametrize("output", ['container', 'bytes'])
+    def test_round_trip(self, mode, output):
+        """Test container round trips for both modes"""
+        plaintext = "åéîøü 你好 👋 " * 30
+
+        ciphertext = self.engine.encrypt(plaintext, self.keys['public_key'], mode=mode, output=output)
+
+        assert self.engine.decrypt(ciphertext, self.keys['private_key']) == plaintext
+
+    def test_smaller_than_legacy(self):
+        """Test that the container text is smaller than the '|'-joined format"""
+        plaintext = "A" * 2000
+        legacy = self.engine.encrypt(plaintext, self.keys['public_key'])
+        container = self.engine.encrypt(plaintext, self.keys['public_key'], output='container')
+
+        assert len(container) < len(legacy)
+
+    def test_bad_length_rejected_without_rsa(self):
+        """Test that a truncated container fails before any private-key operation"""
+        ciphertext = self.engine.encrypt("A" * 200, self.keys['public_key'], output='bytes')
+        handle = self.engine.private_handle(self.keys['private_key'])
+
+        with patch.object(type(handle.private_key), 'decrypt') as decrypt:
+            with pytest.raises(Exception, match="Invalid Ciphertext"):
+                self.engine.decrypt(ciphertext[:-5], handle)
+            decrypt.assert_not_called()
+
+    def test_other_key_rejected(self):
+        """Test that a container for another key is rejected by fingerprint"""
+        other = self.engine.generate_key_pair(key_size=1024)
+        ciphertext = self.engine.encrypt("hello", other['public_key'], output='container')
+
+        with pytest.raises(Exception, match="Invalid Ciphertext"):
+            self.engine.decrypt(ciphertext, self.keys['private_key'])
+
+    def test_legacy_chunk_length_checked(self):
+        """Test that a legacy chunk of the wrong length is rejected"""
+        with pytest.raises(Exception, match="Invalid Ciphertext"):
+            self.engine.decrypt("AAAA", self.keys['private_key'])
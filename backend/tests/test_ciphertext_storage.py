@@ -0,0 +1,54 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import pytest
+from services import ciphertext_storage
+from services.crypto_engine import RSAEngine
+from services.key_cache import KeyCache
+
+
+@pytest.fixture(scope='module')
+def public_key():
+    return RSAEngine(cache=KeyCache()).generate_key_pair(1024)['public_key']
+
+
+class TestCiphertextStorage:
+    """Test suite for packing ciphertext strings into stored bytes"""
+
+    def setup_method(self):
+        self.engine = RSAEngine(cache=KeyCache())
+
+    @pytest.mark.parametrize("mode,output", [
+        ('chunked', 'legacy'), ('envelope', 'legacy'), ('chunked', 'container'), ('envelope', 'container')
+    ])
+    def test_round_trip_without_framing(self, public_key, mode, output):
+        """Test that every ciphertext format comes back unchanged and smaller than its text"""
+        text = self.engine.encrypt('hello world ' * 40, public_key, mode=mode, output=output)
+
+        stored = ciphertext_storage.encode(text)
+
+        assert ciphertext_storage.decode(stored) == text
+        assert stored[0] & ~ciphertext_storage.FLAG_ZLIB != ciphertext_storage.TAG_TEXT
+        assert len(stored) < len(text) * 0.8
+
+    @pytest.mark.parametrize("text", [
+        'not a ciphertext', 'abc|def', 'YWJj|YWI=', 'YWJj\n', 'env1:???', 'bin1:!!', 'héllo 👋', 'x' * 5000
+    ])
+    def test_arbitrary_text_is_lossless(self, text):
+        """Test that text which is not a canonical ciphertext is stored verbatim"""
+        assert ciphertext_storage.decode(ciphertext_storage.encode(text)) == text
+
+    def test_compression(self):
+        """Test that compressible values are compressed only when enabled"""
+        text = 'repetitive ' * 500
+
+        compressed = ciphertext_storage.encode(text, compress=True)
+        plain = ciphertext_storage.encode(text, compress=False)
+
+        assert compressed[0] & ciphertext_storage.FLAG_ZLIB
+        assert len(compressed) < len(plain) // 10
+        assert ciphertext_storage.decode(compressed) == ciphertext_storage.decode(plain) == text
+
+    def test_unknown_tag(self):
+        """Test that a corrupt value is rejected"""
+        with pytest.raises(ValueError):
+            ciphertext_storage.decode(b'\x7fdata')
@@ -0,0 +1,220 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import base64
+import dataclasses
+import pytest
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from services import crypto_engine
+from services.crypto_engine import RSAEngine, ENVELOPE_PREFIX, max_chunk_size
+from services.key_cache import KeyCache
+
+
+class TestRSAEngine:
+    """Test suite for the stateless RSAEngine"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache())
+
+    def test_max_chunk_size(self):
+        """Test OAEP chunk sizes for the supported key sizes"""
+        assert max_chunk_size(2048) == 190
+        assert max_chunk_size(1024) == 62
+
+    def test_encrypt_decrypt_with_pem(self):
+        """Test a round trip with keys passed as PEM strings"""
+        keys = self.engine.generate_key_pair(key_size=1024)
+        plaintext = "B" * 200
+
+        ciphertext = self.engine.encrypt(plaintext, keys['public_key'])
+        assert ciphertext.count('|') == 3
+        assert self.engine.decrypt(ciphertext, keys['private_key']) == plaintext
+
+    def test_handles_are_immutable(self):
+        """Test that a key handle cannot be modified after creation"""
+        handle = self.engine.generate_handle(1024)
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            handle.key_size = 2048
+
+    def test_public_handle_cannot_decrypt(self):
+        """Test that decrypting with a public-only handle is rejected"""
+        keys = self.engine.generate_key_pair(key_size=1024)
+        public = self.engine.public_handle(keys['public_key'])
+        ciphertext = self.engine.encrypt("hello", public)
+
+        with pytest.raises(ValueError, match="Private key is not available"):
+            self.engine.decrypt(ciphertext, public)
+
+    def test_invalid_key_size(self):
+        """Test generating a handle with an unsupported size"""
+        with pytest.raises(ValueError, match="Key size must be either 1024 or 2048 bits"):
+            self.engine.generate_handle(512)
+
+    def test_concurrent_mixed_keys(self):
+        """Stress test: many threads using different keys on one engine get their own results"""
+        key_pairs = [self.engine.generate_key_pair(key_size=1024) for _ in range(4)]
+
+        def job(i):
+            keys = key_pairs[i % len(key_pairs)]
+            plaintext = f"message {i} " * (i % 7 + 1)
+            ciphertext = self.engine.encrypt(plaintext, keys['public_key'])
+            return plaintext, self.engine.decrypt(ciphertext, keys['private_key'])
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(job, range(400)))
+
+        for plaintext, decrypted in results:
+            assert decrypted == plaintext
+
+    def test_wrong_key_fails_under_concurrency(self):
+        """Stress test: a key from one thread never leaks into another thread's decrypt"""
+        first = self.engine.generate_key_pair(key_size=1024)
+        second = self.engine.generate_key_pair(key_size=1024)
+        ciphertext = self.engine.encrypt("secret", first['public_key'])
+
+        def job(i):
+            keys = first if i % 2 == 0 else second
+            try:
+                return i, self.engine.decrypt(ciphertext, keys['private_key'])
+            except Exception as e:
+                return i, str(e)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for i, result in pool.map(job, range(200)):
+                assert result == ("secret" if i % 2 == 0 else "Invalid Ciphertext")
+
+
+class TestEnvelopeMode:
+    """Test suite for the hybrid RSA-OAEP + AES-GCM envelope mode"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache())
+        self.keys = self.engine.generate_key_pair(key_size=2048)
+
+    def test_round_trip_large_payload(self):
+        """Test that a large message round trips with a single wrapped key"""
+        plaintext = "Special chars: åéîøü 你好 👋 " * 5000
+
+        ciphertext = self.engine.encrypt(plaintext, self.keys['public_key'], mode='envelope')
+
+        assert ciphertext.startswith(ENVELOPE_PREFIX)
+        assert '|' not in ciphertext
+        assert self.engine.decrypt(ciphertext, self.keys['private_key']) == plaintext
+
+    def test_legacy_chunked_still_decrypts(self):
+        """Test that decrypt auto-detects the chunked format"""
+        ciphertext = self.engine.encrypt("A" * 500, self.keys['public_key'])
+
+        assert self.engine.decrypt(ciphertext, self.keys['private_key']) == "A" * 500
+
+    def test_tampered_envelope_rejected(self):
+        """Test that flipping a body byte fails GCM authentication"""
+        ciphertext = self.engine.encrypt("hello", self.keys['public_key'], mode='envelope')
+        raw = bytearray(base64.b64decode(ciphertext[len(ENVELOPE_PREFIX):]))
+        raw[-1] ^= 1
+        tampered = ENVELOPE_PREFIX + base64.b64encode(bytes(raw)).decode('utf-8')
+
+        with pytest.raises(Exception, match="Invalid Ciphertext"):
+            self.engine.decrypt(tampered, self.keys['private_key'])
+
+    def test_truncated_envelope_rejected(self):
+        """Test that an envelope shorter than the wrapped key is rejected"""
+        with pytest.raises(Exception, match="Invalid Ciphertext"):
+            self.engine.decrypt(ENVELOPE_PREFIX + "AAAA", self.keys['private_key'])
+
+    def test_unknown_mode(self):
+        """Test that an unsupported mode is rejected"""
+        with pytest.raises(ValueError, match="Mode must be either"):
+            self.engine.encrypt("hello", self.keys['public_key'], mode='ecb')
+
+
+class TestParallelChunks:
+    """Test suite for spreading chunks across worker processes"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache(), parallel=True, parallel_threshold=4)
+        self.keys = self.engine.generate_key_pair(key_size=1024)
+
+    def teardown_method(self):
+        """Stop the worker processes after each test"""
+        crypto_engine.shutdown_chunk_pool()
+
+    def test_chunk_order_preserved(self, monkeypatch):
+        """Test that parallel results keep the original chunk order"""
+        monkeypatch.setattr(crypto_engine, 'RSA_PARALLEL_WORKERS', 2)
+        plaintext = ''.join(chr(ord('a') + i % 26) * 62 for i in range(40))
+
+        ciphertext = self.engine.encrypt(plaintext, self.keys['public_key'])
+        serial = self.engine.decrypt(ciphertext, self.keys['private_key'], parallel=False)
+        parallel = self.engine.decrypt(ciphertext, self.keys['private_key'])
+
+        assert ciphertext.count('|') == 39
+        assert serial == parallel == plaintext
+        assert crypto_engine._chunk_pool is not None
+
+    def test_below_threshold_stays_serial(self):
+        """Test that small messages never start the worker processes"""
+        ciphertext = self.engine.encrypt("A" * 100, self.keys['public_key'])
+
+        assert self.engine.decrypt(ciphertext, self.keys['private_key']) == "A" * 100
+        assert crypto_engine._chunk_pool is None
+
+    def test_bad_chunk_reports_invalid_ciphertext(self):
+        """Test that a failure in a worker surfaces as the usual error"""
+        ciphertext = self.engine.encrypt("A" * 620, self.keys['public_key']).split('|')
+        ciphertext[5] = base64.b64encode(b'\0' * 128).decode('utf-8')
+
+        with pytest.raises(Exception, match="Invalid Ciphertext"):
+            self.engine.decrypt('|'.join(ciphertext), self.keys['private_key'])
+
+    def test_worker_parses_key_once(self, monkeypatch):
+        """Test that a worker reuses the parsed key for every task with the same fingerprint"""
+        monkeypatch.setattr(crypto_engine, '_worker_keys', OrderedDict())
+        handle = self.engine.private_handle(self.keys['private_key'])
+        blocks = [handle.public_key.encrypt(b'chunk', crypto_engine._oaep())]
+
+        first = crypto_engine._worker_key('private', handle.public_fingerprint, handle.private_der)
+        plaintexts = crypto_engine._rsa_chunk_task('private', handle.public_fingerprint, handle.private_der, blocks)
+
+        assert plaintexts == [b'chunk']
+        assert crypto_engine._worker_key('private', handle.public_fingerprint, b'not parsed again') is first
+
+
+class TestEncryptStream:
+    """Test suite for incremental encryption"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache())
+        self.keys = self.engine.generate_key_pair(key_size=1024)
+
+    @pytest.mark.parametrize("mode", ['chunked', 'envelope'])
+    def test_stream_decrypts(self, mode):
+        """Test that streamed output decrypts to the joined pieces"""
+        pieces = ["åéîøü ", "你好 👋" * 7, "", "x" * 500, "\n", "tail"]
+
+        ciphertext = ''.join(self.engine.encrypt_stream(iter(pieces), self.keys['public_key'], mode=mode))
+
+        assert self.engine.decrypt(ciphertext, self.keys['private_key']) == ''.join(pieces)
+
+    def test_chunk_layout_matches_encrypt(self):
+        """Test that streaming produces the same chunk boundaries as encrypt()"""
+        pieces = ["a" * 30, "b" * 100, "c" * 3]
+
+        streamed = ''.join(self.engine.encrypt_stream(pieces, self.keys['public_key']))
+        direct = self.engine.encrypt(''.join(pieces), self.keys['public_key'])
+
+        assert streamed.count('|') == direct.count('|')
+
+    def test_bad_key_fails_before_reading(self):
+        """Test that a bad key is reported before any piece is consumed"""
+        def pieces():
+            raise AssertionError("Pieces should not be read")
+            yield
+
+        with pytest.raises(Exception, match="Bad Public Key"):
+            self.engine.encrypt_stream(pieces(), "not a key")
@@ -0,0 +1,42 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from sqlalchemy import create_engine, text
+from database.engine import engine_options, sqlite_pragmas, install_sqlite_pragmas
+
+
+class TestEngineOptions:
+    """Test suite for database engine configuration"""
+
+    def test_server_pool_options(self):
+        """Test that server databases get a sized, pre-pinged, recycled pool"""
+        options = engine_options('postgresql://user@db/app', {'DB_POOL_SIZE': '20', 'DB_POOL_PRE_PING': '0'})
+
+        assert options == {
+            'pool_size': 20,
+            'max_overflow': 10,
+            'pool_timeout': 30,
+            'pool_recycle': 1800,
+            'pool_pre_ping': False,
+        }
+
+    def test_sqlite_options(self):
+        """Test that SQLite only gets its busy timeout as a connect argument"""
+        options = engine_options('sqlite:///app.db', {'SQLITE_BUSY_TIMEOUT_MS': '2500'})
+
+        assert options == {'connect_args': {'timeout': 2.5}}
+
+    def test_wal_can_be_disabled(self):
+        """Test that SQLITE_WAL=0 leaves the journal mode alone"""
+        assert 'journal_mode' not in dict(sqlite_pragmas({'SQLITE_WAL': '0'}))
+
+    def test_pragmas_applied_to_connections(self, tmp_path):
+        """Test that every new SQLite connection gets WAL, NORMAL sync, busy timeout and mmap"""
+        engine = create_engine(f'sqlite:///{tmp_path / "app.db"}', **engine_options('sqlite://', {}))
+        install_sqlite_pragmas(engine)
+
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+            assert conn.execute(text('PRAGMA mmap_size')).scalar() == 256 * 1024 * 1024
+        engine.dispose()
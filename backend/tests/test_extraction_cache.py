@@ -0,0 +1,109 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import io
+import pytest
+from services.extraction_cache import ExtractionCache
+from services.text_extraction import extract_text, ExtractionLimitExceeded
+
+
+class TestExtractionCache:
+    """Test suite for the ExtractionCache class"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.calls = 0
+
+    def extract(self, file, file_ext):
+        self.calls += 1
+        return extract_text(file, file_ext)
+
+    def test_memory_hit_skips_parsing(self):
+        """Test that the same bytes are only parsed once"""
+        cache = ExtractionCache()
+
+        first = cache.get_or_extract(io.BytesIO(b'hello world'), '.txt', self.extract)
+        second = cache.get_or_extract(io.BytesIO(b'hello world'), '.txt', self.extract)
+
+        assert first == second == 'hello world'
+        assert self.calls == 1
+        stats = cache.stats()
+        assert stats['memory_hits'] == 1
+        assert stats['hit_ratio'] == 0.5
+        assert stats['bytes_saved'] == 11
+
+    def test_file_type_is_part_of_key(self):
+        """Test that identical bytes with a different extractor are separate entries"""
+        cache = ExtractionCache()
+
+        cache.get_or_extract(io.BytesIO(b'hello'), '.txt', lambda f, e: 'as text')
+        result = cache.get_or_extract(io.BytesIO(b'hello'), '.pdf', lambda f, e: 'as pdf')
+
+        assert result == 'as pdf'
+
+    def test_memory_lru_eviction(self):
+        """Test that the memory tier stays within its byte budget"""
+        cache = ExtractionCache(max_memory_bytes=10)
+
+        cache.get_or_extract(io.BytesIO(b'aaaaaa'), '.txt', self.extract)
+        cache.get_or_extract(io.BytesIO(b'bbbbbb'), '.txt', self.extract)
+        cache.get_or_extract(io.BytesIO(b'aaaaaa'), '.txt', self.extract)
+
+        assert self.calls == 3
+        assert cache.stats()['memory_bytes'] <= 10
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that a new cache instance finds entries written to disk"""
+        ExtractionCache(disk_dir=str(tmp_path)).get_or_extract(io.BytesIO('å 你好'.encode('utf-8')), '.txt', self.extract)
+
+        cache = ExtractionCache(disk_dir=str(tmp_path))
+        text = cache.get_or_extract(io.BytesIO('å 你好'.encode('utf-8')), '.txt', self.extract)
+
+        assert text == 'å 你好'
+        assert self.calls == 1
+        assert cache.stats()['disk_hits'] == 1
+
+    def test_disk_size_cap(self, tmp_path):
+        """Test that the disk tier evicts the oldest entries past its cap"""
+        cache = ExtractionCache(max_memory_bytes=1, disk_dir=str(tmp_path), max_disk_bytes=20)
+
+        for letter in b'abc':
+            cache.get_or_extract(io.BytesIO(bytes([letter]) * 8), '.txt', self.extract)
+
+        assert cache.stats()['disk_bytes'] <= 20
+        assert len(os.listdir(tmp_path)) == 2
+
+    def test_errors_not_cached(self):
+        """Test that a failed extraction is retried on the next upload"""
+        cache = ExtractionCache()
+
+        def failing(file, file_ext):
+            raise ExtractionLimitExceeded('too big')
+
+        with pytest.raises(ExtractionLimitExceeded):
+            cache.get_or_extract(io.BytesIO(b'data'), '.txt', failing)
+        assert cache.get_or_extract(io.BytesIO(b'data'), '.txt', self.extract) == 'data'
+
+    def test_settings_are_part_of_key(self, tmp_path):
+        """Test that text extracted under other extractor settings is not served from the disk tier"""
+        ExtractionCache(disk_dir=str(tmp_path), settings='docx_include_tables=0').get_or_extract(
+            io.BytesIO(b'hello'), '.docx', lambda f, e: 'without tables'
+        )
+
+        cache = ExtractionCache(disk_dir=str(tmp_path), settings='docx_include_tables=1')
+        result = cache.get_or_extract(io.BytesIO(b'hello'), '.docx', lambda f, e: 'with tables')
+
+        assert result == 'with tables'
+
+    def test_disk_write_failure(self, tmp_path, monkeypatch):
+        """Test that a failed disk write still returns the text and leaves no temp file behind"""
+        cache = ExtractionCache(disk_dir=str(tmp_path))
+
+        def failing_replace(src, dst):
+            raise OSError(28, 'No space left on device')
+        monkeypatch.setattr(os, 'replace', failing_replace)
+
+        assert cache.get_or_extract(io.BytesIO(b'hello'), '.txt', self.extract) == 'hello'
+        assert os.listdir(tmp_path) == []
+        assert cache.stats()['disk_entries'] == 0
+        assert cache.get_or_extract(io.BytesIO(b'hello'), '.txt', self.extract) == 'hello'
+        assert self.calls == 1
@@ -0,0 +1,108 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import threading
+import pytest
+from unittest.mock import patch
+from services.key_cache import KeyCache
+from services.rsa_service import RSAService
+
+
+class TestKeyCache:
+    """Test suite for the KeyCache class"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.cache = KeyCache(max_size=2, ttl_seconds=60)
+        self.calls = []
+
+    def loader(self, pem):
+        self.calls.append(pem)
+        return object()
+
+    def test_hit_returns_same_object(self):
+        """Test that a second lookup of the same PEM skips the loader"""
+        first = self.cache.get_or_load("pem-a", self.loader)
+        second = self.cache.get_or_load("pem-a\n", self.loader)
+
+        assert first is second
+        assert len(self.calls) == 1
+        stats = self.cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_ratio'] == 0.5
+
+    def test_public_and_private_slots_are_separate(self):
+        """Test that the same text cached as public and private does not collide"""
+        self.cache.get_or_load("pem-a", self.loader, kind='public')
+        self.cache.get_or_load("pem-a", self.loader, kind='private')
+
+        assert len(self.calls) == 2
+
+    def test_lru_eviction(self):
+        """Test that the least recently used key is evicted first"""
+        self.cache.get_or_load("pem-a", self.loader)
+        self.cache.get_or_load("pem-b", self.loader)
+        self.cache.get_or_load("pem-a", self.loader)
+        self.cache.get_or_load("pem-c", self.loader)
+
+        # pem-b was the least recently used and must be parsed again
+        self.cache.get_or_load("pem-b", self.loader)
+        assert self.calls == ["pem-a", "pem-b", "pem-c", "pem-b"]
+        assert self.cache.stats()['evictions'] == 2
+        assert self.cache.stats()['size'] == 2
+
+    def test_ttl_expiry(self):
+        """Test that entries past their TTL are parsed again"""
+        with patch('services.key_cache.time.monotonic', return_value=100.0):
+            self.cache.get_or_load("pem-a", self.loader)
+        with patch('services.key_cache.time.monotonic', return_value=161.0):
+            self.cache.get_or_load("pem-a", self.loader)
+
+        assert len(self.calls) == 2
+
+    def test_failures_are_not_cached(self):
+        """Test that a loader error propagates and leaves no entry behind"""
+        def failing_loader(pem):
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            self.cache.get_or_load("pem-a", failing_loader)
+        assert self.cache.stats()['size'] == 0
+
+    def test_concurrent_lookups(self):
+        """Test that concurrent lookups keep consistent counters"""
+        cache = KeyCache(max_size=8)
+
+        def worker():
+            for i in range(200):
+                cache.get_or_load(f"pem-{i % 4}", lambda pem: pem.upper())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert stats['hits'] + stats['misses'] == 1600
+        assert stats['size'] == 4
+
+    def test_rsa_service_uses_cache(self):
+        """Test that RSAService.load_keys parses a PEM only once"""
+        cache = KeyCache()
+        keys = RSAService().generate_key_pair(key_size=1024)
+
+        first = RSAService(cache=cache)
+        first.load_keys(public_key_pem=keys['public_key'], private_key_pem=keys['private_key'])
+        second = RSAService(cache=cache)
+        second.load_keys(public_key_pem=keys['public_key'], private_key_pem=keys['private_key'])
+
+        assert first.public_key is second.public_key
+        assert first.private_key is second.private_key
+        assert second.key_size == 1024
+        assert cache.stats()['hits'] == 2
+
+    def test_bad_key_still_rejected(self):
+        """Test that an invalid PEM keeps raising the existing error"""
+        with pytest.raises(Exception, match="Bad Public Key"):
+            RSAService(cache=KeyCache()).load_keys(public_key_pem="not a key")
@@ -0,0 +1,92 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import time
+import pytest
+from services import key_pool
+from services.crypto_engine import RSAEngine
+from services.key_cache import KeyCache
+from services.key_pool import KeyPairPool
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the key pool")
+        time.sleep(0.01)
+
+
+class TestKeyPairPool:
+    """Test suite for the KeyPairPool class"""
+
+    def setup_method(self):
+        """Setup before each test"""
+        self.engine = RSAEngine(cache=KeyCache())
+        self.pool = KeyPairPool(self.engine, depth=2, key_sizes=(1024,))
+
+    def teardown_method(self):
+        """Stop the refill thread after each test"""
+        self.pool.stop()
+
+    def test_fallback_when_empty(self):
+        """Test that an empty pool still returns a freshly generated key"""
+        handle = self.pool.get(1024)
+
+        assert handle.key_size == 1024
+        assert handle.can_decrypt
+        assert self.pool.stats()['sizes']['1024']['misses'] == 1
+
+    def test_starts_on_first_get(self):
+        """Test that the refill thread is not running until the pool is first used"""
+        assert self.pool.stats()['running'] is False
+
+        self.pool.get(1024)
+
+        assert self.pool.stats()['running'] is True
+        wait_for(lambda: self.pool.stats()['sizes']['1024']['depth'] == 2)
+
+    def test_survives_generation_failure(self, monkeypatch):
+        """Test that a failed key generation is counted and the refill thread carries on"""
+        monkeypatch.setattr(key_pool, 'REFILL_RETRY_SECONDS', 0.01)
+        generate_handle = self.engine.generate_handle
+        failures = iter([True])
+
+        def flaky_generate_handle(key_size):
+            if next(failures, False):
+                raise RuntimeError("entropy source unavailable")
+            return generate_handle(key_size)
+        monkeypatch.setattr(self.engine, 'generate_handle', flaky_generate_handle)
+
+        self.pool.start()
+        wait_for(lambda: self.pool.stats()['sizes']['1024']['depth'] == 2)
+
+        assert self.pool.stats()['sizes']['1024']['failures'] == 1
+        assert self.pool.stats()['running'] is True
+
+    def test_fills_and_refills(self):
+        """Test that the background thread fills the pool and refills after a take"""
+        self.pool.start()
+        wait_for(lambda: self.pool.stats()['sizes']['1024']['depth'] == 2)
+
+        first = self.pool.get(1024)
+        second = self.pool.get(1024)
+        assert first.private_key is not second.private_key
+
+        wait_for(lambda: self.pool.stats()['sizes']['1024']['depth'] == 2)
+        stats = self.pool.stats()['sizes']['1024']
+        assert stats['hits'] == 2
+        assert stats['generated'] == 4
+        assert stats['refill_keys_per_second'] > 0
+
+    def test_unsupported_size(self):
+        """Test that sizes the pool does not hold are still validated"""
+        with pytest.raises(ValueError, match="Key size must be either 1024 or 2048 bits"):
+            self.pool.get(512)
+
+    def test_disabled_pool_never_starts(self):
+        """Test that a depth of zero never starts the refill thread"""
+        pool = KeyPairPool(self.engine, depth=0)
+        pool.start()
+
+        assert pool.stats()['running'] is False
+        assert pool.get(1024).key_size == 1024
@@ -0,0 +1,58 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import pytest
+from services.crypto_engine import RSAEngine
+from services.key_cache import KeyCache
+from services.key_registry import KeyRegistry, UnknownKey
+
+
+@pytest.fixture(scope='module')
+def key_pair():
+    engine = RSAEngine(cache=KeyCache())
+    return engine.generate_key_pair(1024)
+
+
+class TestKeyRegistry:
+    """Test suite for resolving key IDs to parsed keys"""
+
+    def setup_method(self):
+        self.engine = RSAEngine(cache=KeyCache())
+        self.registry = KeyRegistry(self.engine, max_size=8, ttl_seconds=0)
+
+    def test_key_id_ignores_pem_formatting(self, key_pair):
+        """Test that a key and its private half share one key ID"""
+        public = self.engine.public_handle(key_pair['public_key'])
+        private = self.engine.private_handle(key_pair['private_key'])
+
+        assert KeyRegistry.key_id(public) == KeyRegistry.key_id(private)
+        assert len(KeyRegistry.key_id(public)) == 64
+
+    def test_loads_once(self, key_pair):
+        """Test that the loader runs only on the first lookup"""
+        calls = []
+
+        def load_pem():
+            calls.append(1)
+            return key_pair['public_key']
+
+        first = self.registry.public('abc', load_pem)
+        second = self.registry.public('abc', load_pem)
+
+        assert first is second
+        assert len(calls) == 1
+        assert not first.can_decrypt
+
+    def test_unknown_key_not_cached(self, key_pair):
+        """Test that unknown IDs raise and are retried on the next lookup"""
+        with pytest.raises(UnknownKey):
+            self.registry.public('abc', lambda: None)
+
+        assert self.registry.public('abc', lambda: key_pair['public_key']).key_size == 1024
+
+    def test_private_keys_scoped_by_owner(self, key_pair):
+        """Test that one owner's cached private key is not served to another"""
+        handle = self.registry.private('abc', 'alice', lambda: key_pair['private_key'])
+        assert handle.can_decrypt
+
+        with pytest.raises(UnknownKey):
+            self.registry.private('abc', 'mallory', lambda: None)
@@ -0,0 +1,69 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from services import metrics
+from services.metrics import Registry
+
+
+class TestMetrics:
+    """Test suite for the Prometheus metrics registry"""
+
+    def test_counter_render(self):
+        """Test that counters render HELP, TYPE and one line per label combination"""
+        registry = Registry()
+        counter = registry.counter('requests_total', 'Requests', ('route', 'status'))
+        counter.inc('/a', '200')
+        counter.inc('/a', '200', amount=2)
+        counter.inc('/b', '404')
+
+        assert registry.render().splitlines() == [
+            '# HELP requests_total Requests',
+            '# TYPE requests_total counter',
+            'requests_total{route="/a",status="200"} 3',
+            'requests_total{route="/b",status="404"} 1',
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that bucket counts include every smaller bucket and +Inf equals the count"""
+        registry = Registry()
+        histogram = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, '/a')
+
+        lines = registry.render().splitlines()
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+
+    def test_timer_observes_duration(self):
+        """Test that time() records one observation even when the block raises"""
+        histogram = Registry().histogram('phase_seconds', 'Phase', ('phase',))
+        try:
+            with histogram.time('parse'):
+                raise ValueError
+        except ValueError:
+            pass
+
+        count, total = histogram.snapshot('parse')
+        assert count == 1
+        assert total >= 0
+
+    def test_label_values_escaped(self):
+        """Test that quotes, backslashes and newlines in label values are escaped"""
+        registry = Registry()
+        registry.counter('c', 'C', ('path',)).inc('a"b\\c\nd')
+
+        assert 'c{path="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+    def test_disabled_metrics_are_noops(self, monkeypatch):
+        """Test that METRICS_ENABLED=0 stops recording"""
+        monkeypatch.setattr(metrics, 'METRICS_ENABLED', False)
+        registry = Registry()
+        counter = registry.counter('c', 'C')
+        histogram = registry.histogram('h', 'H')
+        counter.inc()
+        histogram.observe(1.0)
+
+        assert histogram.snapshot() == (0, 0.0)
+        assert registry.render().splitlines() == ['# HELP c C', '# TYPE c counter', '# HELP h H', '# TYPE h histogram']
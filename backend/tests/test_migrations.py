@@ -0,0 +1,149 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from services.crypto_engine import RSAEngine
+from services.key_cache import KeyCache
+from database import migrations
+from database.migrations import upgrade_schema, dedupe_private_keys, pack_saved_ciphertexts, ciphertext_storage_report
+from models.savedCiphertext import SavedCiphertext
+from models.storedKey import StoredKey
+
+# SavedCiphertext as created before the key registry existed
+LEGACY_SCHEMA = '''
+CREATE TABLE "SavedCiphertext" (
+    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    user_id VARCHAR(255) NOT NULL,
+    user_email VARCHAR(255) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    ciphertext TEXT NOT NULL,
+    private_key TEXT NOT NULL,
+    created_at DATETIME
+)
+'''
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "legacy.db"}')
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_SCHEMA))
+        conn.execute(text('CREATE INDEX "ix_SavedCiphertext_user_id" ON "SavedCiphertext" (user_id)'))
+    yield engine
+    engine.dispose()
+
+
+class TestMigrations:
+    """Test suite for upgrading legacy databases"""
+
+    def setup_method(self):
+        self.engine = RSAEngine(cache=KeyCache())
+
+    def test_upgrade_schema(self, legacy_db):
+        """Test that the legacy table gains key_id, a nullable private_key and the new indexes"""
+        with legacy_db.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO \"SavedCiphertext\" (user_id, user_email, name, ciphertext, private_key) "
+                "VALUES ('u', 'u@example.com', 'kept', 'c', 'k')"
+            ))
+
+        assert upgrade_schema(legacy_db)
+
+        inspector = inspect(legacy_db)
+        columns = {column['name']: column for column in inspector.get_columns('SavedCiphertext')}
+        assert 'key_id' in columns and 'ciphertext_data' in columns
+        assert columns['private_key']['nullable'] and columns['ciphertext']['nullable']
+        assert 'ix_SavedCiphertext_user_created_id' in {i['name'] for i in inspector.get_indexes('SavedCiphertext')}
+        assert 'StoredKey' in inspector.get_table_names()
+
+        with legacy_db.connect() as conn:
+            assert conn.execute(text('SELECT name, private_key FROM "SavedCiphertext"')).all() == [('kept', 'k')]
+
+        # A second run finds nothing to do
+        assert upgrade_schema(legacy_db) == []
+
+    def test_failed_rebuild_rolls_back(self, legacy_db, monkeypatch):
+        """Test that a rebuild failing part way leaves the table, its data and its indexes as they were"""
+        with legacy_db.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO \"SavedCiphertext\" (user_id, user_email, name, ciphertext, private_key) "
+                "VALUES ('u', 'u@example.com', 'kept', 'c', 'k')"
+            ))
+        rebuild = migrations._rebuild_sqlite_table
+
+        def failing_rebuild(conn, table, old_columns):
+            rebuild(conn, table, old_columns)
+            raise RuntimeError("disk full")
+        monkeypatch.setattr(migrations, '_rebuild_sqlite_table', failing_rebuild)
+
+        with pytest.raises(RuntimeError):
+            upgrade_schema(legacy_db)
+
+        inspector = inspect(legacy_db)
+        assert 'SavedCiphertext_old' not in inspector.get_table_names()
+        assert 'key_id' not in {column['name'] for column in inspector.get_columns('SavedCiphertext')}
+        assert 'ix_SavedCiphertext_user_id' in {i['name'] for i in inspector.get_indexes('SavedCiphertext')}
+        with legacy_db.connect() as conn:
+            assert conn.execute(text('SELECT name FROM "SavedCiphertext"')).all() == [('kept',)]
+
+        # The next run starts from the untouched table and completes
+        monkeypatch.setattr(migrations, '_rebuild_sqlite_table', rebuild)
+        assert upgrade_schema(legacy_db)
+        with legacy_db.connect() as conn:
+            assert conn.execute(text('SELECT name, private_key FROM "SavedCiphertext"')).all() == [('kept', 'k')]
+
+    def test_dedupe_private_keys(self, legacy_db):
+        """Test that rows sharing a key end up referencing one stored key per user"""
+        shared = self.engine.generate_key_pair(1024)['private_key']
+        other = self.engine.generate_key_pair(1024)['private_key']
+        rows = [('alice', shared)] * 3 + [('alice', other), ('bob', shared), ('bob', 'not a key')]
+
+        with legacy_db.begin() as conn:
+            for i, (user_id, private_key) in enumerate(rows):
+                conn.execute(text(
+                    "INSERT INTO \"SavedCiphertext\" (user_id, user_email, name, ciphertext, private_key) "
+                    "VALUES (:user_id, 'e', :name, 'c', :private_key)"
+                ), {'user_id': user_id, 'name': f'row {i}', 'private_key': private_key})
+
+        upgrade_schema(legacy_db)
+        with Session(legacy_db) as session:
+            result = dedupe_private_keys(session, self.engine, batch_size=2)
+            assert result == {'rows': 5, 'keys': 3, 'skipped': 1}
+
+            saved = session.query(SavedCiphertext).order_by(SavedCiphertext.id).all()
+            assert len({row.key_id for row in saved[:3]}) == 1
+            assert saved[0].key_id != saved[4].key_id
+            assert all(row.private_key is None for row in saved[:5])
+            assert saved[5].private_key == 'not a key' and saved[5].key_id is None
+            assert saved[0].key.private_key == shared
+
+            # Rerunning only retries the row that could not be parsed
+            assert dedupe_private_keys(session, self.engine) == {'rows': 0, 'keys': 0, 'skipped': 1}
+            assert session.query(StoredKey).count() == 3
+
+    def test_pack_saved_ciphertexts(self, legacy_db):
+        """Test that text ciphertexts move to binary storage unchanged and smaller"""
+        public_key = self.engine.generate_key_pair(1024)['public_key']
+        texts = [self.engine.encrypt(f'message {i} ' * 20, public_key) for i in range(5)] + ['free text']
+
+        with legacy_db.begin() as conn:
+            for i, ciphertext in enumerate(texts):
+                conn.execute(text(
+                    "INSERT INTO \"SavedCiphertext\" (user_id, user_email, name, ciphertext, private_key) "
+                    "VALUES ('u', 'e', :name, :ciphertext, 'k')"
+                ), {'name': f'row {i}', 'ciphertext': ciphertext})
+
+        upgrade_schema(legacy_db)
+        with Session(legacy_db) as session:
+            before = ciphertext_storage_report(session)
+            result = pack_saved_ciphertexts(session, batch_size=4)
+            after = ciphertext_storage_report(session)
+
+            assert before['text_rows'] == 6 and before['binary_rows'] == 0
+            assert after == {'text_rows': 0, 'text_bytes': 0, 'binary_rows': 6, 'binary_bytes': result['stored_bytes']}
+            assert result['rows'] == 6
+            assert result['stored_bytes'] < result['text_bytes'] * 0.8
+
+            saved = session.query(SavedCiphertext).order_by(SavedCiphertext.id).all()
+            assert [row.ciphertext for row in saved] == texts
@@ -0,0 +1,70 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+from services.profiling import RequestProfiler, summarize
+
+
+def busy_function():
+    return sum(i * i for i in range(10000))
+
+
+class TestRequestProfiler:
+    """Test suite for the request profiler"""
+
+    def test_disabled_by_default(self, tmp_path):
+        """Test that without a sample rate or token nothing is selected"""
+        profiler = RequestProfiler(str(tmp_path), sample_rate=0, token=None)
+
+        assert not profiler.enabled
+        assert not profiler.wanted('anything')
+
+    def test_token_selects_request(self, tmp_path):
+        """Test that only the exact token selects a request"""
+        profiler = RequestProfiler(str(tmp_path), sample_rate=0, token='secret')
+
+        assert profiler.wanted('secret')
+        assert not profiler.wanted('wrong')
+        assert not profiler.wanted(None)
+
+    def test_sampling(self, tmp_path):
+        """Test that a sample rate of 1 selects every request"""
+        profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, token=None)
+
+        assert all(profiler.wanted() for _ in range(20))
+
+    def test_one_profile_at_a_time(self, tmp_path):
+        """Test that a second profile is refused while one is running"""
+        profiler = RequestProfiler(str(tmp_path), token='secret')
+        profile = profiler.start()
+        try:
+            assert profiler.start() is None
+        finally:
+            profiler.finish(profile, profiler.profile_id('GET /'))
+
+        profile = profiler.start()
+        assert profile is not None
+        profiler.finish(profile, profiler.profile_id('GET /'))
+
+    def test_writes_profile_and_summary(self, tmp_path):
+        """Test that finish writes a loadable profile and a cumulative-time summary"""
+        profiler = RequestProfiler(str(tmp_path), token='secret')
+        profile = profiler.start()
+        busy_function()
+        profile_id = profiler.profile_id('POST /api/decrypt')
+        profiler.finish(profile, profile_id, 'POST /api/decrypt')
+
+        assert profile_id.endswith('-POST--api-decrypt')
+        summary = (tmp_path / f'{profile_id}.txt').read_text()
+        assert summary.startswith('POST /api/decrypt')
+        assert 'cumulative' in summary and 'busy_function' in summary
+        assert 'busy_function' in summarize(profiler.profiles())
+
+    def test_rotation(self, tmp_path):
+        """Test that only the newest profiles are kept"""
+        profiler = RequestProfiler(str(tmp_path), token='secret', keep=3)
+        ids = []
+        for i in range(5):
+            ids.append(profiler.profile_id(f'GET /{i}'))
+            profiler.finish(profiler.start(), ids[-1])
+
+        assert [os.path.basename(path)[:-len('.prof')] for path in profiler.profiles()] == ids[2:]
+        assert sorted(os.listdir(tmp_path)) == sorted(f'{i}{ext}' for i in ids[2:] for ext in ('.prof', '.txt'))
@@ -0,0 +1,103 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import io
+import pytest
+import PyPDF2
+from services import text_extraction
+from services.text_extraction import extract_text, iter_text, ExtractionLimitExceeded, UnsupportedFileType
+from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from documents import make_pdf, make_docx
+
+
+def reference_pdf_text(data):
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return '\n'.join([page.extract_text() for page in reader.pages])
+
+
+class TestTextExtraction:
+    """Test suite for services.text_extraction"""
+
+    def test_txt_multibyte_across_reads(self, monkeypatch):
+        """Test that UTF-8 sequences split across read blocks decode correctly"""
+        monkeypatch.setattr(text_extraction, 'TEXT_READ_SIZE', 3)
+        text = "åéîøü 你好 👋" * 10
+
+        assert extract_text(io.BytesIO(text.encode('utf-8')), '.txt') == text
+
+    def test_pdf_serial_matches_reference(self, monkeypatch):
+        """Test that serial page extraction gives the same text as before"""
+        monkeypatch.setattr(text_extraction, 'PDF_EXTRACT_WORKERS', 1)
+        data = make_pdf(5, lines_per_page=3)
+
+        assert extract_text(io.BytesIO(data), '.pdf') == reference_pdf_text(data)
+
+    def test_pdf_parallel_matches_reference(self, monkeypatch):
+        """Test that the process pool returns pages in document order"""
+        monkeypatch.setattr(text_extraction, 'PDF_EXTRACT_WORKERS', 2)
+        monkeypatch.setattr(text_extraction, 'PDF_PARALLEL_MIN_PAGES', 2)
+        monkeypatch.setattr(text_extraction, 'PDF_PAGES_PER_TASK', 3)
+        data = make_pdf(20, lines_per_page=2)
+
+        try:
+            assert extract_text(io.BytesIO(data), '.pdf') == reference_pdf_text(data)
+        finally:
+            text_extraction.shutdown_pool()
+
+    def test_page_limit(self):
+        """Test that PDFs over the page limit are rejected before extraction"""
+        with pytest.raises(ExtractionLimitExceeded, match="3 pages"):
+            extract_text(io.BytesIO(make_pdf(3, lines_per_page=1)), '.pdf', max_pages=2)
+
+    def test_byte_limit(self):
+        """Test that extraction stops once the text exceeds the byte limit"""
+        pieces = iter_text(io.BytesIO(b'x' * 1000), '.txt', max_bytes=100)
+
+        with pytest.raises(ExtractionLimitExceeded):
+            list(pieces)
+
+    def test_unsupported(self):
+        """Test that unknown extensions are rejected"""
+        with pytest.raises(UnsupportedFileType):
+            iter_text(io.BytesIO(b''), '.png')
+
+
+class TestStreamingDocx:
+    """Test suite for the streaming DOCX extractor"""
+
+    @staticmethod
+    def python_docx_text(data, include_tables=False):
+        doc = Document(io.BytesIO(data))
+        lines = [para.text for para in doc.paragraphs]
+        if include_tables:
+            lines = []
+            for block in doc.element.body.iterchildren():
+                if block.tag.endswith('}p'):
+                    lines.append(Paragraph(block, doc).text)
+                elif block.tag.endswith('}tbl'):
+                    for row in Table(block, doc).rows:
+                        lines.extend(para.text for cell in row.cells for para in cell.paragraphs)
+        return '\n'.join(lines)
+
+    @pytest.mark.parametrize("paragraphs,table_rows", [(0, 0), (1, 0), (40, 0), (20, 4)])
+    def test_matches_python_docx(self, paragraphs, table_rows):
+        """Test that the streaming extractor gives python-docx's paragraph text"""
+        data = make_docx(paragraphs, table_rows=table_rows)
+
+        assert extract_text(io.BytesIO(data), '.docx') == self.python_docx_text(data)
+
+    def test_tables_included_when_enabled(self, monkeypatch):
+        """Test that table cell paragraphs are extracted in document order when enabled"""
+        monkeypatch.setattr(text_extraction, 'DOCX_INCLUDE_TABLES', True)
+        data = make_docx(3, table_rows=2, table_cols=2)
+
+        text = extract_text(io.BytesIO(data), '.docx')
+
+        assert text == self.python_docx_text(data, include_tables=True)
+        assert 'cell 1,1\nAfter the table' in text
+
+    def test_not_a_docx(self):
+        """Test that a non-zip upload is rejected"""
+        with pytest.raises(Exception):
+            extract_text(io.BytesIO(b'not a zip'), '.docx')
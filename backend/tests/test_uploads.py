@@ -0,0 +1,41 @@
+import os,sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import io
+from werkzeug.test import EnvironBuilder
+from services.uploads import SpooledUploadRequest
+from services.text_extraction import _spill_to_disk
+
+
+def make_request(content):
+    builder = EnvironBuilder(method='POST', data={'file': (io.BytesIO(content), 'doc.txt')})
+    return SpooledUploadRequest(builder.get_environ())
+
+
+class TestSpooledUploadRequest:
+    """Test suite for spooling uploads to disk"""
+
+    def test_small_upload_stays_in_memory(self):
+        """Test that uploads under the threshold are not written to disk"""
+        request = make_request(b'x' * 1024)
+        stream = request.files['file'].stream
+
+        assert not stream._rolled
+        assert stream.read() == b'x' * 1024
+        request.close()
+
+    def test_large_upload_goes_to_named_file(self, monkeypatch):
+        """Test that a sized request above the threshold is written to a named temp file"""
+        monkeypatch.setattr(SpooledUploadRequest, 'spool_bytes', 4096)
+        content = os.urandom(64 * 1024)
+        request = make_request(content)
+        stream = request.files['file'].stream
+
+        assert os.path.isfile(stream.name)
+        assert stream.read() == content
+
+        # PDF workers can open the upload by path without another copy
+        path, is_temp = _spill_to_disk(stream)
+        assert path == stream.name and not is_temp
+
+        request.close()
+        assert not os.path.exists(path)
@@ -48,11 +48,21 @@ const SavedCiphertexts = () => {
   const fetchSavedCiphertexts = async () => {
     try {
       setCiphertextsLoading(true);
-      const response = await savedCiphertextAPI.getAll();
+      // The list is paginated; follow the cursor until every page is loaded
+      let items = [];
+      let cursor = null;
+      do {
+        const response = await savedCiphertextAPI.getPage({
+          includeCiphertext: 1,
+          limit: 200,
+          ...(cursor ? { cursor } : {}),
+        });
+        if (!response.data.success) break;
+        items = items.concat(response.data.data || []);
+        cursor = response.data.next_cursor;
+      } while (cursor);
 
-      if (response.data.success) {
-        setSavedCiphertexts(response.data.data || []);
-      }
+      setSavedCiphertexts(items);
     } catch (err) {
       console.log(err.response.data.err);
       showSnackbar(
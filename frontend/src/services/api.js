@@ -22,10 +22,13 @@ export const rsaAPI = {
 
 // Saved Ciphertext Endpoints
 export const savedCiphertextAPI = {
-  getAll: () => api.get("/api/saved-ciphertexts"),
+  getPage: (params) => api.get("/api/saved-ciphertexts", { params }),
   create: (data) => api.post("/api/saved-ciphertexts", data),
   delete: (id) => api.delete(`/api/saved-ciphertexts/${id}`),
   decrypt: (id) => api.post(`/api/saved-ciphertexts/${id}/decrypt`),
+  createMany: (items) => api.post("/api/saved-ciphertexts/batch", { items }),
+  deleteMany: (ids) => api.delete("/api/saved-ciphertexts/batch", { data: { ids } }),
+  decryptMany: (ids) => api.post("/api/saved-ciphertexts/decrypt/batch", { ids }),
 };
 
 // User API Endpoints